@@ -0,0 +1,87 @@
+"""Low-stock alerts.
+
+An item is low when ``current_stock <= minimum_stock``, the same condition
+as the ``low_stock`` filter of the inventory list. Every write that changes
+either value already knows them before and after the change, so it calls
+``record_transition`` instead of anything rescanning the inventory: going
+low opens a ``StockAlert``, going back above the minimum resolves it. The
+open alerts are the backlog, read through a partial index on
+``resolved_at IS NULL``.
+
+Transitions are published on the ``ALERTS_TOPIC`` of ``broker`` once the
+transaction commits, so a rolled back change never reaches a stream.
+"""
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import broker
+from models import StockAlert
+from schemas import StockAlertResponse
+
+ALERTS_TOPIC = "stock_alerts"
+
+LOW_STOCK = "low_stock"
+STOCK_RESTORED = "stock_restored"
+
+_PENDING_KEY = "pending_stock_alerts"
+
+
+def is_low(current_stock: int, minimum_stock: int) -> bool:
+    return current_stock <= minimum_stock
+
+
+def alert_message(kind: str, alert: StockAlert) -> dict:
+    return {"type": kind, "alert": StockAlertResponse.model_validate(alert).model_dump(mode="json")}
+
+
+async def record_transition(
+    db: AsyncSession,
+    item_id: int,
+    was_low: bool,
+    current_stock: int,
+    minimum_stock: int,
+):
+    """Open or resolve the item's alert if the change crossed its minimum"""
+    now_low = is_low(current_stock, minimum_stock)
+    if now_low == was_low:
+        return
+
+    if now_low:
+        alert = StockAlert(item_id=item_id, current_stock=current_stock, minimum_stock=minimum_stock)
+        db.add(alert)
+        await db.flush()
+        kind = LOW_STOCK
+    else:
+        alert = (await db.scalars(
+            update(StockAlert)
+            .where(StockAlert.item_id == item_id, StockAlert.resolved_at.is_(None))
+            .values(resolved_at=datetime.utcnow())
+            .returning(StockAlert)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if alert is None:
+            return
+        kind = STOCK_RESTORED
+    db.info.setdefault(_PENDING_KEY, []).append(alert_message(kind, alert))
+
+
+async def open_alerts(db: AsyncSession) -> List[StockAlert]:
+    """The backlog: alerts of items still at or below their minimum, oldest first"""
+    return list((await db.scalars(
+        select(StockAlert).where(StockAlert.resolved_at.is_(None)).order_by(StockAlert.id)
+    )).all())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session):
+    for message in session.info.pop(_PENDING_KEY, ()):
+        broker.publish(ALERTS_TOPIC, message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
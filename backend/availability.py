@@ -0,0 +1,217 @@
+"""Resource availability for existing events and candidate bookings.
+
+A booking (venue, time window, guest count) is available when its venue
+has no overlapping booking, every role required by ``staffing.required_staff``
+has enough free people, and the stock of every category in
+``INVENTORY_PER_GUEST`` covers the guest count. Stock means the units not
+reserved by other events: ``available_stock`` plus whatever the booking's
+own event already holds.
+
+Any number of bookings is checked with the same six queries: venue
+bookings (events and recurring series), available staff per role and
+staff busy intervals over the window spanning all bookings, plus
+available stock and the bookings' own reservations per category. The
+per-booking work then happens in memory on intervals sorted by start
+time.
+"""
+import bisect
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import recurrence
+import scheduling
+import staffing
+import stock
+from models import (
+    Event, EventStatus, InventoryItem, Staff, StaffAssignment, StaffStatus, StockMovement
+)
+from schemas import EventAvailability, InventoryAvailability, RoleAvailability
+
+# category -> units needed per guest
+INVENTORY_PER_GUEST: Dict[str, float] = {
+    "Vajilla": 3,
+    "Cubertería": 3,
+    "Cristalería": 2,
+    "Mobiliario": 1,
+    "Mantelería": 0.1,
+}
+
+
+class Booking(NamedTuple):
+    event_id: Optional[int]
+    venue: str
+    start_time: datetime
+    end_time: datetime
+    guests_count: int
+
+
+def booking_for(event: Event) -> Booking:
+    return Booking(event.id, event.venue, event.start_time, event.end_time, event.guests_count)
+
+
+def required_inventory(guests_count: int) -> Dict[str, int]:
+    return {
+        category: math.ceil(guests_count * per_guest)
+        for category, per_guest in INVENTORY_PER_GUEST.items()
+    }
+
+
+class _Intervals:
+    """Intervals grouped by key and sorted by start, for overlap lookups"""
+
+    def __init__(self, rows: Iterable[tuple]):
+        grouped = defaultdict(list)
+        for key, start_time, end_time, payload in rows:
+            grouped[key].append((start_time, end_time, payload))
+        self._starts = {}
+        self._items = {}
+        for key, items in grouped.items():
+            items.sort(key=lambda item: item[0])
+            self._starts[key] = [item[0] for item in items]
+            self._items[key] = items
+
+    def overlapping(self, key, start_time: datetime, end_time: datetime):
+        """Payloads of intervals under ``key`` overlapping [start_time, end_time)"""
+        starts = self._starts.get(key)
+        if not starts:
+            return
+        # Intervals last at most MAX_EVENT_DURATION, so only this slice can overlap
+        low = bisect.bisect_right(starts, start_time - scheduling.MAX_EVENT_DURATION)
+        high = bisect.bisect_left(starts, end_time)
+        for _, item_end, payload in self._items[key][low:high]:
+            if item_end > start_time:
+                yield payload
+
+
+def _window_conditions(window_start: datetime, window_end: datetime):
+    return (
+        Event.start_time < window_end,
+        Event.start_time > window_start - scheduling.MAX_EVENT_DURATION,
+        Event.end_time > window_start,
+        Event.status != EventStatus.CANCELLED,
+    )
+
+
+async def check_bookings(db: AsyncSession, bookings: List[Booking]) -> List[EventAvailability]:
+    """Availability of every booking, in order, with a fixed number of queries"""
+    if not bookings:
+        return []
+
+    window_start = min(booking.start_time for booking in bookings)
+    window_end = max(booking.end_time for booking in bookings)
+    requirements = [staffing.required_staff(booking.guests_count) for booking in bookings]
+    roles = {role for needed in requirements for role in needed}
+
+    venues = {booking.venue for booking in bookings}
+    venue_rows = list(await db.execute(
+        select(Event.venue, Event.start_time, Event.end_time, Event.id).where(
+            Event.venue.in_(venues),
+            *_window_conditions(window_start, window_end),
+        )
+    ))
+    # Series occurrences carry themselves as payload, which never equals an event id
+    venue_rows.extend(
+        (occurrence.venue, occurrence.start_time, occurrence.end_time, occurrence)
+        for occurrence in await recurrence.occurrences_in_window(db, window_start, window_end, venues)
+    )
+    venue_bookings = _Intervals(venue_rows)
+
+    staff_totals = dict((await db.execute(
+        select(Staff.role, func.count())
+        .where(Staff.role.in_(roles), Staff.status == StaffStatus.AVAILABLE)
+        .group_by(Staff.role)
+    )).all())
+
+    # One interval per assignment of an available person, all under one key
+    busy_intervals = _Intervals(
+        (None, start_time, end_time, (event_id, staff_id, role))
+        for staff_id, role, event_id, start_time, end_time in await db.execute(
+            select(StaffAssignment.staff_id, Staff.role, Event.id, Event.start_time, Event.end_time)
+            .join(Staff, Staff.id == StaffAssignment.staff_id)
+            .join(Event, Event.id == StaffAssignment.event_id)
+            .where(
+                Staff.role.in_(roles),
+                Staff.status == StaffStatus.AVAILABLE,
+                *_window_conditions(window_start, window_end),
+            )
+        )
+    )
+
+    available_stock = dict((await db.execute(
+        select(InventoryItem.category, func.sum(InventoryItem.available_stock))
+        .where(InventoryItem.category.in_(INVENTORY_PER_GUEST))
+        .group_by(InventoryItem.category)
+    )).all())
+
+    held = defaultdict(int)
+    event_ids = {booking.event_id for booking in bookings if booking.event_id is not None}
+    if event_ids:
+        for event_id, category, units in await db.execute(
+            select(StockMovement.event_id, InventoryItem.category, stock.reservation_balance())
+            .join(InventoryItem, InventoryItem.id == StockMovement.item_id)
+            .where(
+                StockMovement.event_id.in_(event_ids),
+                stock.reservation_movements(),
+                InventoryItem.category.in_(INVENTORY_PER_GUEST),
+            )
+            .group_by(StockMovement.event_id, InventoryItem.category)
+        ):
+            held[event_id, category] = units or 0
+
+    results = []
+    for booking, needed in zip(bookings, requirements):
+        recommendations = []
+
+        venue_available = not any(
+            event_id != booking.event_id
+            for event_id in venue_bookings.overlapping(booking.venue, booking.start_time, booking.end_time)
+        )
+        if not venue_available:
+            recommendations.append("El venue no está disponible en ese horario")
+
+        # People on another overlapping event are busy; people on this event count as assigned
+        busy = set()
+        assigned = set()
+        for event_id, staff_id, role in busy_intervals.overlapping(None, booking.start_time, booking.end_time):
+            if event_id == booking.event_id:
+                assigned.add((staff_id, role))
+            else:
+                busy.add((staff_id, role))
+        busy_by_role = Counter(role for _, role in busy)
+        assigned_by_role = Counter(role for staff_id, role in assigned if (staff_id, role) not in busy)
+
+        staff = []
+        for role, required in needed.items():
+            available = staff_totals.get(role, 0) - busy_by_role[role]
+            staff.append(RoleAvailability(
+                role=role, required=required, available=available, assigned=assigned_by_role[role]
+            ))
+            if available < required:
+                recommendations.append(f"Personal insuficiente de {role}: {available} de {required}")
+
+        inventory = []
+        for category, required in required_inventory(booking.guests_count).items():
+            in_stock = (available_stock.get(category) or 0) + held[booking.event_id, category]
+            inventory.append(InventoryAvailability(category=category, required=required, in_stock=in_stock))
+            if in_stock < required:
+                recommendations.append(f"Stock insuficiente de {category}: {in_stock} de {required}")
+
+        results.append(EventAvailability(
+            event_id=booking.event_id,
+            venue=booking.venue,
+            start_time=booking.start_time,
+            end_time=booking.end_time,
+            guests_count=booking.guests_count,
+            venue_available=venue_available,
+            staff_available=all(item.available >= item.required for item in staff),
+            inventory_sufficient=all(item.in_stock >= item.required for item in inventory),
+            staff=staff,
+            inventory=inventory,
+            recommendations=recommendations,
+        ))
+    return results
@@ -0,0 +1,128 @@
+"""Shared steps of the batch create/update/delete endpoints.
+
+A batch validates every row on its own and reports one result per row,
+resolves existing rows with a single ``IN`` query, then writes all the
+accepted rows in one transaction: inserts as executemany ``INSERT ...
+RETURNING id`` in input order, updates as one executemany ``UPDATE ...
+WHERE id = ?`` (SQLAlchemy's bulk UPDATE by primary key).
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas import BatchItemResult, BatchResponse
+
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "5000"))
+BATCH_WRITE_SIZE = 1000
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def check_size(rows: Sequence, max_rows: int = BATCH_MAX_ROWS):
+    if len(rows) > max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch accepts at most {max_rows} rows"
+        )
+
+
+def validate_rows(raw_rows: Sequence[Any], schema: Type[BaseModel], results: List[BatchItemResult]) -> Dict[int, BaseModel]:
+    """Valid rows by index; the others get their error in ``results``"""
+    valid = {}
+    for index, raw in enumerate(raw_rows):
+        try:
+            valid[index] = schema.model_validate(raw)
+        except ValidationError as exc:
+            results[index].error = format_validation_error(exc)
+    return valid
+
+
+def reject_duplicates(keys: Dict[int, Any], results: List[BatchItemResult], message: str):
+    """Fail every row repeating the key of an earlier row of the batch"""
+    seen = set()
+    for index, key in list(keys.items()):
+        if key in seen:
+            results[index].error = message
+            del keys[index]
+        seen.add(key)
+
+
+def plan_deletes(ids: Sequence[int], blockers: Dict[int, Optional[str]], results: List[BatchItemResult], not_found: str) -> List[int]:
+    """Ids that can be deleted; ``blockers`` maps every existing id to why it must stay, or None"""
+    keys = dict(enumerate(ids))
+    reject_duplicates(keys, results, "Id repeated in the batch")
+    deletable = []
+    for index, row_id in keys.items():
+        if row_id not in blockers:
+            results[index].error = not_found
+        elif blockers[row_id]:
+            results[index].error = blockers[row_id]
+        else:
+            results[index].status = "deleted"
+            deletable.append(row_id)
+    return sorted(deletable)
+
+
+def fail_if_any(results: List[BatchItemResult], all_or_nothing: bool):
+    if all_or_nothing and any(result.error for result in results):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[result.model_dump() for result in results if result.error]
+        )
+
+
+async def insert_rows(db: AsyncSession, model, rows: Dict[int, dict], results: List[BatchItemResult]) -> List[int]:
+    """Insert ``rows`` (by result index) and record their ids; returns the new ids"""
+    indexes = sorted(rows)
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    created = []
+    for offset in range(0, len(indexes), BATCH_WRITE_SIZE):
+        chunk = indexes[offset:offset + BATCH_WRITE_SIZE]
+        ids = (await db.scalars(statement, [rows[index] for index in chunk])).all()
+        for index, row_id in zip(chunk, ids):
+            results[index].status = "created"
+            results[index].id = row_id
+        created.extend(ids)
+    return created
+
+
+async def update_rows(db: AsyncSession, model, rows: Dict[int, dict], results: List[BatchItemResult]) -> List[int]:
+    """Update ``rows`` (by result index, each with its ``id``); returns the updated ids"""
+    indexes = sorted(rows)
+    for offset in range(0, len(indexes), BATCH_WRITE_SIZE):
+        await db.execute(update(model), [rows[index] for index in indexes[offset:offset + BATCH_WRITE_SIZE]])
+    for index in indexes:
+        results[index].status = "updated"
+        results[index].id = rows[index]["id"]
+    return [rows[index]["id"] for index in indexes]
+
+
+def summarize(results: List[BatchItemResult]) -> BatchResponse:
+    counts: Dict[str, int] = {}
+    for result in results:
+        if result.error:
+            result.status = "error"
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return BatchResponse(
+        created=counts.get("created", 0),
+        updated=counts.get("updated", 0),
+        deleted=counts.get("deleted", 0),
+        failed=counts.get("error", 0),
+        results=results,
+    )
+
+
+def new_results(count: int, ids: Optional[Sequence[int]] = None) -> List[BatchItemResult]:
+    return [
+        BatchItemResult(index=index, status="error", id=ids[index] if ids is not None else None)
+        for index in range(count)
+    ]
@@ -0,0 +1 @@
+# Benchmarks for the BanquetPro API (run from the backend directory)
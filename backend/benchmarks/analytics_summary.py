@@ -0,0 +1,118 @@
+"""Benchmark for GET /api/v1/analytics/summary.
+
+Seeds a database with synthetic events and measures the number of SQL
+statements and the latency of ``get_analytics_summary``.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.analytics_summary --events 100000
+    python -m benchmarks.analytics_summary --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+import cache
+import rollups
+from database import to_async_url
+from models import Base, Client, Event, EventStatus
+from routers.analytics import get_analytics_summary
+
+EVENT_TYPES = ["Boda", "Corporativo", "Cumpleaños", "Graduación", "Conferencia"]
+VENUES = ["Salón Principal", "Salón Ejecutivo", "Gran Salón", "Terraza", "Jardín Principal", "Salón VIP"]
+
+
+async def seed(session, events_count, batch_size=10000):
+    """Insert one client and ``events_count`` events spread over the last two years"""
+    rng = random.Random(42)
+    client = Client(name="Benchmark Client", email="benchmark@example.com")
+    session.add(client)
+    await session.flush()
+
+    now = datetime.utcnow()
+    statuses = list(EventStatus)
+    rows = []
+    for i in range(events_count):
+        start = now - timedelta(days=rng.randint(0, 730), hours=rng.randint(0, 23))
+        rows.append({
+            "name": f"Event {i}",
+            "client_id": client.id,
+            "event_type": rng.choice(EVENT_TYPES),
+            "date": start,
+            "start_time": start,
+            "end_time": start + timedelta(hours=5),
+            "venue": rng.choice(VENUES),
+            "guests_count": rng.randint(20, 500),
+            "budget": round(rng.uniform(1000, 50000), 2),
+            "status": rng.choice(statuses),
+        })
+        if len(rows) >= batch_size:
+            await session.execute(insert(Event), rows)
+            rows = []
+    if rows:
+        await session.execute(insert(Event), rows)
+    await session.commit()
+
+
+async def run(args):
+    engine = create_async_engine(to_async_url(args.database_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+
+    started = time.perf_counter()
+    await seed(session, args.events)
+    print(f"Seeded {args.events} events in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    buckets = await rollups.rebuild(session)
+    print(f"Rebuilt {buckets} rollup buckets in {time.perf_counter() - started:.1f}s")
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a, **kw: statements.append(1))
+
+    request = Request({
+        "type": "http", "method": "GET", "path": "/api/v1/analytics/summary",
+        "query_string": b"", "headers": [],
+    })
+    timings = []
+    for _ in range(args.runs):
+        # Measure the uncached path: queries plus serialization
+        await cache.clear_cache()
+        statements.clear()
+        started = time.perf_counter()
+        response = await get_analytics_summary(request=request, start_date=None, end_date=None, db=session)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    summary = json.loads(response.body)
+    print(f"Months in window: {len(summary['monthly_revenue'])}")
+    print(f"Completed events in window: {summary['total_events']}")
+    print(f"SQL statements per request: {len(statements)}")
+    print(f"Latency p50: {statistics.median(timings):.1f} ms, max: {max(timings):.1f} ms")
+
+    await session.close()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Concurrency benchmark: blocking sync sessions vs. the async session path.
+
+Runs the same mix of slow and fast requests against two in-process apps:
+
+* ``sync``  - ``async def`` handlers using a synchronous ``Session``, as the
+  routers did before ``get_async_db`` existed; every query blocks the loop.
+* ``async`` - handlers using ``AsyncSession`` from ``get_async_db``.
+
+The slow endpoint runs a CPU-heavy recursive CTE (or ``pg_sleep`` on
+Postgres); the fast endpoint is a primary-key lookup on ``events``. The
+report shows total throughput and the latency of the fast requests while
+slow ones are in flight.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.concurrency --requests 200 --slow-ratio 0.1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from database import to_async_url
+from models import Base, Client, Event
+
+SQLITE_SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+POSTGRES_SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+def slow_statement(dialect: str):
+    if dialect == "postgresql":
+        return POSTGRES_SLOW_QUERY, {"seconds": 0.2}
+    return SQLITE_SLOW_QUERY, {"n": 1000000}
+
+
+def build_sync_app(database_url: str, pool_size: int) -> FastAPI:
+    # A blocked loop cannot release connections, so the pool must fit every
+    # in-flight request or checkout would deadlock instead of just being slow
+    engine = create_engine(database_url, pool_size=pool_size, max_overflow=0)
+    session_factory = sessionmaker(bind=engine)
+    statement, params = slow_statement(engine.dialect.name)
+
+    def get_session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow(db: Session = Depends(get_session)):
+        return {"value": db.execute(statement, params).scalar()}
+
+    @app.get("/fast")
+    async def fast(db: Session = Depends(get_session)):
+        return {"name": db.scalar(select(Event.name).where(Event.id == 1))}
+
+    return app
+
+
+def build_async_app(database_url: str, pool_size: int) -> FastAPI:
+    pool_kwargs = {} if database_url.startswith("sqlite") else {"pool_size": pool_size, "max_overflow": 0}
+    engine = create_async_engine(to_async_url(database_url), **pool_kwargs)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    statement, params = slow_statement(engine.dialect.name)
+
+    async def get_session():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow(db: AsyncSession = Depends(get_session)):
+        return {"value": (await db.execute(statement, params)).scalar()}
+
+    @app.get("/fast")
+    async def fast(db: AsyncSession = Depends(get_session)):
+        return {"name": await db.scalar(select(Event.name).where(Event.id == 1))}
+
+    return app
+
+
+def prepare_database(database_url: str):
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        client = Client(name="Benchmark Client", email="benchmark@example.com")
+        db.add(client)
+        db.flush()
+        start = datetime.utcnow()
+        db.add(Event(
+            name="Benchmark Event", client_id=client.id, event_type="Boda",
+            date=start, start_time=start, end_time=start + timedelta(hours=4),
+            venue="Salón Principal", guests_count=100, budget=1000.0,
+        ))
+        db.commit()
+    engine.dispose()
+
+
+async def run_mix(app: FastAPI, requests: int, slow_ratio: float, concurrency: int):
+    slow_every = max(1, round(1 / slow_ratio)) if slow_ratio > 0 else 0
+    paths = [
+        "/slow" if slow_every and i % slow_every == 0 else "/fast"
+        for i in range(requests)
+    ]
+    fast_latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                if path == "/fast":
+                    fast_latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(path) for path in paths))
+        elapsed = time.perf_counter() - started
+
+    fast_latencies.sort()
+    return {
+        "throughput_rps": requests / elapsed,
+        "fast_p50_ms": statistics.median(fast_latencies),
+        "fast_p99_ms": fast_latencies[int(len(fast_latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmpdir.name, 'concurrency.db')}"
+
+    prepare_database(database_url)
+    apps = (
+        ("sync", build_sync_app(database_url, args.concurrency)),
+        ("async", build_async_app(database_url, args.concurrency)),
+    )
+    for label, app in apps:
+        result = asyncio.run(run_mix(app, args.requests, args.slow_ratio, args.concurrency))
+        print(
+            f"{label:>5}: {result['throughput_rps']:7.1f} req/s | "
+            f"fast p50 {result['fast_p50_ms']:7.1f} ms | fast p99 {result['fast_p99_ms']:7.1f} ms"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Synthetic data for the benchmarks.
+
+Row generators are deterministic for a given seed, so two runs at the
+same scale benchmark the same data. ``seed_database`` bulk-inserts
+clients, events, staff and inventory with executemany batches, keeping
+the ratios of a busy installation: one client per 10 events, one staff
+member per 20 and one inventory item per 100.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert, select
+
+# models is imported inside the functions: importing it configures the
+# database from DATABASE_URL, which the benchmarks set after reading SCALES
+
+SCALES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+BATCH_SIZE = 10_000
+
+EVENT_TYPES = ["Boda", "Corporativo", "Cumpleaños", "Graduación", "Conferencia", "Quinceañera"]
+VENUES = [f"Salón {index}" for index in range(1, 41)]
+ROLES = ["Mesero", "Chef", "Sous Chef", "Bartender", "Coordinador", "Personal de Limpieza", "Seguridad"]
+CATEGORIES = ["Vajilla", "Cubertería", "Cristalería", "Mobiliario", "Mantelería", "Decoración"]
+# Names and notes give the search benchmark realistic term frequencies
+FIRST_NAMES = [
+    "María", "José", "Ana", "Luis", "Carmen", "Juan", "Laura", "Carlos", "Sofía", "Miguel",
+    "Lucía", "Jorge", "Elena", "Pedro", "Isabel", "Diego", "Valeria", "Andrés", "Paula", "Fernando",
+]
+SURNAMES = [
+    "García", "Martínez", "López", "Hernández", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez",
+    "Torres", "Flores", "Rivera", "Gómez", "Díaz", "Cruz", "Morales", "Reyes", "Jiménez", "Ruiz", "Vargas",
+    "Castillo", "Ortiz", "Mendoza", "Romero", "Herrera", "Medina", "Aguilar", "Navarro", "Castro", "Vega",
+]
+NOTES = [
+    "Menú vegetariano para la mesa principal", "Requiere pista de baile", "Decoración en tonos dorados",
+    "Barra libre hasta medianoche", "Invitados con movilidad reducida", "Montaje al aire libre",
+]
+
+# Events are spread over this window around the base date
+EVENT_WINDOW_DAYS = 3 * 365
+BASE_DATE = datetime(2026, 1, 1)
+
+
+def row_counts(events: int) -> Dict[str, int]:
+    return {
+        "events": events,
+        "clients": max(1, events // 10),
+        "staff": max(10, events // 20),
+        "inventory_items": max(10, events // 100),
+    }
+
+
+def generate_clients(count: int, rng: random.Random) -> Iterator[dict]:
+    for index in range(count):
+        yield {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+            "email": f"client{index}@bench.example.com",
+            "phone": f"+52 55 {rng.randint(1000, 9999)} {rng.randint(1000, 9999)}",
+            "company": f"Grupo {SURNAMES[index % len(SURNAMES)]} {index % 500}" if index % 3 == 0 else None,
+            "is_corporate": index % 3 == 0,
+        }
+
+
+def generate_events(count: int, client_count: int, rng: random.Random) -> Iterator[dict]:
+    """Events on hourly slots, so venue conflicts are as likely as in real calendars"""
+    from models import EventStatus
+
+    statuses = list(EventStatus)
+    for index in range(count):
+        start = BASE_DATE + timedelta(
+            days=rng.randint(-EVENT_WINDOW_DAYS // 2, EVENT_WINDOW_DAYS // 2),
+            hours=rng.randint(8, 20),
+        )
+        event_type = rng.choice(EVENT_TYPES)
+        yield {
+            "name": f"{event_type} {rng.choice(SURNAMES)}",
+            "client_id": rng.randint(1, client_count),
+            "event_type": event_type,
+            "date": start,
+            "start_time": start,
+            "end_time": start + timedelta(hours=rng.randint(2, 8)),
+            "venue": rng.choice(VENUES),
+            "guests_count": rng.randint(20, 500),
+            "budget": round(rng.uniform(1000, 80000), 2),
+            "status": rng.choice(statuses),
+            "notes": rng.choice(NOTES) if index % 4 == 0 else None,
+        }
+
+
+def generate_staff(count: int, rng: random.Random) -> Iterator[dict]:
+    from models import StaffStatus
+
+    statuses = [StaffStatus.AVAILABLE] * 8 + [StaffStatus.BUSY, StaffStatus.UNAVAILABLE]
+    for index in range(count):
+        yield {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+            "email": f"staff{index}@bench.example.com",
+            "role": rng.choice(ROLES),
+            "hourly_rate": round(rng.uniform(10, 60), 2),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "status": rng.choice(statuses),
+        }
+
+
+def generate_inventory(count: int, rng: random.Random) -> Iterator[dict]:
+    for index in range(count):
+        stock = rng.randint(0, 2000)
+        yield {
+            "name": f"Artículo {index}",
+            "category": rng.choice(CATEGORIES),
+            "current_stock": stock,
+            "reserved_stock": 0,
+            "available_stock": stock,
+            "minimum_stock": rng.randint(10, 200),
+            "maximum_stock": 5000,
+            "unit_cost": round(rng.uniform(0.5, 200), 2),
+        }
+
+
+async def _insert_batches(session, model, rows: Iterator[dict]):
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            await session.execute(insert(model), batch)
+            batch = []
+    if batch:
+        await session.execute(insert(model), batch)
+
+
+async def seed_database(session, events: int, seed: int = 42) -> Dict[str, int]:
+    """Insert a full data set sized for ``events`` events; returns the row counts"""
+    from models import Client, Event, InventoryItem, Staff
+
+    rng = random.Random(seed)
+    counts = row_counts(events)
+    await _insert_batches(session, Client, generate_clients(counts["clients"], rng))
+    await _insert_batches(session, Event, generate_events(counts["events"], counts["clients"], rng))
+    await _insert_batches(session, Staff, generate_staff(counts["staff"], rng))
+    await _insert_batches(session, InventoryItem, generate_inventory(counts["inventory_items"], rng))
+    await session.commit()
+    return counts
+
+
+async def sample_ids(session, model, count: int, seed: int = 7) -> List[int]:
+    """``count`` random ids of ``model`` (with repetition when the table is smaller)"""
+    ids = (await session.scalars(select(model.id))).all()
+    rng = random.Random(seed)
+    return [rng.choice(ids) for _ in range(count)]
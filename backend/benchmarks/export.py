@@ -0,0 +1,122 @@
+"""Benchmark for the streaming exports (GET /api/v1/events/export).
+
+Seeds synthetic events and downloads the full export through the app
+in-process, consuming the body chunk by chunk like a client writing it to
+disk. Reports rows per second and how much the peak RSS of the process
+grew during the export; with ``--compare-list`` it then loads the same
+rows the way paging the list endpoint does (ORM objects validated into
+response models) to show the difference.
+
+The peak RSS only ever grows, so the streamed export is measured first.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.export --events 1000000
+    python -m benchmarks.export --events 200000 --format ndjson --compare-list
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def download(app, query_string: str):
+    """GET the events export straight through the ASGI app, dropping each chunk.
+
+    httpx's ASGI transport buffers the whole body, which would hide what
+    the export itself keeps in memory.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/v1/events/export", "raw_path": b"/api/v1/events/export",
+        "query_string": query_string.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80), "root_path": "",
+    }
+    lines = size = 0
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; the response ends on its own
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal lines, size
+        if message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            lines += body.count(b"\n")
+            size += len(body)
+
+    await app(scope, receive, send)
+    return lines, size
+
+
+async def run(args):
+    # The exports read through the app's engine, configured at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["METRICS_ENABLED"] = "false"
+
+    from sqlalchemy import select
+
+    import database
+    from benchmarks.datagen import seed_database
+    from models import Base, Event
+    from schemas import EventResponse
+
+    engine = database.async_engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    started = time.perf_counter()
+    async with database.AsyncSessionLocal() as session:
+        await seed_database(session, args.events)
+    print(f"Seeded {args.events} events in {time.perf_counter() - started:.1f}s")
+
+    import main
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    lines, size = await download(main.app, f"format={args.format}")
+    elapsed = time.perf_counter() - started
+    rows = lines - 1 if args.format == "csv" else lines
+    print(f"Exported {rows} rows ({size / 2**20:.1f} MiB) in {elapsed:.1f}s, {rows / elapsed:.0f} rows/s")
+    print(f"Peak RSS growth during export: {peak_rss_mb() - baseline:.1f} MiB")
+
+    if args.compare_list:
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        async with database.AsyncSessionLocal() as session:
+            events = (await session.scalars(select(Event).order_by(Event.id))).all()
+            models = [EventResponse.model_validate(event) for event in events]
+        elapsed = time.perf_counter() - started
+        print(f"Loaded {len(models)} rows as ORM objects and models in {elapsed:.1f}s")
+        print(f"Peak RSS growth when materialized: {peak_rss_mb() - baseline:.1f} MiB")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--compare-list", action="store_true")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Microbenchmark of list serialization: Pydantic models vs the fastjson path.
+
+Seeds synthetic data, then serves pages of ``get_events`` and
+``get_inventory_items`` both ways, outside of HTTP and the response cache:
+
+    models   select ORM objects, validate them into the response model with
+             ``from_attributes`` and dump JSON (the path with ``include=``)
+    rows     select the response model's columns and encode the ``Row``
+             tuples with orjson (``fastjson.RowEncoder``)
+
+For each it reports the median time per page of the query plus
+serialization and of the serialization alone, and checks that both
+bodies are identical.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.serialization --events 10000 --limit 100
+    python -m benchmarks.serialization --limit 1000 --rounds 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import fastjson
+from benchmarks.datagen import seed_database
+from database import to_async_url
+from models import Base, Event, InventoryItem
+from pagination import paginate
+from routers.events import EVENT_ROWS, EVENT_SORT_COLUMNS
+from routers.inventory import INVENTORY_ROWS, INVENTORY_SORT_COLUMNS
+from schemas import EventResponse, InventoryItemResponse
+
+ENDPOINTS = [
+    ("get_events", Event, EventResponse, EVENT_ROWS, EVENT_SORT_COLUMNS),
+    ("get_inventory_items", InventoryItem, InventoryItemResponse, INVENTORY_ROWS, INVENTORY_SORT_COLUMNS),
+]
+
+
+def dump_models(adapter: TypeAdapter, rows) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def median_ms(samples: List[float]) -> float:
+    return round(statistics.median(samples) * 1000, 3)
+
+
+async def measure(session_factory, model, sort_columns, query, encode, limit: int, rounds: int):
+    """Median (query + encode, encode) times per page and the last body"""
+    total, encoding = [], []
+    body = b""
+    for _ in range(rounds):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            rows, _ = await paginate(session, query, model, sort_columns, limit=limit)
+            encode_started = time.perf_counter()
+            body = encode(rows)
+            finished = time.perf_counter()
+        total.append(finished - started)
+        encoding.append(finished - encode_started)
+    return median_ms(total), median_ms(encoding), body
+
+
+async def run(args):
+    engine = create_async_engine(to_async_url(args.database_url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        await seed_database(session, args.events)
+
+    print(f"{'endpoint':<22}{'path':<8}{'page ms':>10}{'encode ms':>11}")
+    for name, model, response_model, encoder, sort_columns in ENDPOINTS:
+        adapter = TypeAdapter(List[response_model])
+        models = await measure(
+            session_factory, model, sort_columns, select(model),
+            lambda rows: dump_models(adapter, rows), args.limit, args.rounds
+        )
+        rows = await measure(
+            session_factory, model, sort_columns, encoder.select(),
+            encoder.dump, args.limit, args.rounds
+        )
+        for path, (page_ms, encode_ms, _) in (("models", models), ("rows", rows)):
+            print(f"{name:<22}{path:<8}{page_ms:>10}{encode_ms:>11}")
+        print(
+            f"{'':<22}speedup {models[0] / rows[0]:>9.1f}x{models[1] / rows[1]:>10.1f}x"
+            f"  identical bodies: {models[2] == rows[2]}"
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=100, help="rows per page")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+    if not fastjson.ENABLED:
+        parser.error("the fast path is disabled (orjson missing or FAST_JSON=false)")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark for the automatic staff assignment engine.
+
+Seeds a staff pool and a calendar of events with existing assignments,
+then times ``auto_assign_staff`` for a large event: the candidate query
+(availability probe plus per-role ranking) and the bulk insert of the
+picks. Each run assigns a fresh event at the same time slot, so later
+runs see a pool already partly taken by the earlier ones.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.staff_assignment --staff 5000 --guests 500
+    python -m benchmarks.staff_assignment --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import staffing
+from database import to_async_url
+from models import Base, Client, Event, Staff, StaffAssignment, StaffStatus
+from routers.assignments import auto_assign_staff
+from schemas import AutoAssignRequest
+
+ROLES = list(staffing.STAFFING_RATIOS) + ["Gerente", "Fotógrafo", "DJ/Músico"]
+
+
+def event_row(client_id, index, start, guests):
+    return {
+        "name": f"Event {index}",
+        "client_id": client_id,
+        "event_type": "Boda",
+        "date": start,
+        "start_time": start,
+        "end_time": start + timedelta(hours=6),
+        "venue": f"Salón {index}",
+        "guests_count": guests,
+        "budget": 10000.0,
+    }
+
+
+async def seed(session, staff_count, events_count, assignments_per_event):
+    """Insert the staff pool and ``events_count`` past and future events with assignments"""
+    rng = random.Random(42)
+    statuses = [StaffStatus.AVAILABLE] * 8 + [StaffStatus.BUSY, StaffStatus.UNAVAILABLE]
+    await session.execute(insert(Staff), [
+        {
+            "name": f"Staff {i}",
+            "email": f"staff{i}@example.com",
+            "role": rng.choice(ROLES),
+            "hourly_rate": round(rng.uniform(10, 60), 2),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "status": rng.choice(statuses),
+        }
+        for i in range(staff_count)
+    ])
+    client = Client(name="Benchmark Client", email="benchmark@example.com")
+    session.add(client)
+    await session.flush()
+
+    base = datetime(2030, 6, 1, 18)
+    event_ids = (await session.scalars(
+        insert(Event).returning(Event.id, sort_by_parameter_order=True),
+        [
+            event_row(client.id, i, base + timedelta(days=rng.randint(-180, 180)), 100)
+            for i in range(events_count)
+        ],
+    )).all()
+    staff_ids = list(range(1, staff_count + 1))
+    await session.execute(insert(StaffAssignment), [
+        {"event_id": event_id, "staff_id": staff_id}
+        for event_id in event_ids
+        for staff_id in rng.sample(staff_ids, assignments_per_event)
+    ])
+    await session.commit()
+    return client.id, base
+
+
+async def run(args):
+    engine = create_async_engine(to_async_url(args.database_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        started = time.perf_counter()
+        client_id, base = await seed(session, args.staff, args.events, args.assignments_per_event)
+        print(f"Seeded {args.staff} staff, {args.events} events in {time.perf_counter() - started:.1f}s")
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a, **kw: statements.append(1))
+
+    timings = []
+    for run_index in range(args.runs):
+        async with session_factory() as session:
+            target_id = (await session.scalars(
+                insert(Event).returning(Event.id),
+                [event_row(client_id, args.events + run_index, base, args.guests)],
+            )).one()
+            await session.commit()
+
+        async with session_factory() as session:
+            statements.clear()
+            started = time.perf_counter()
+            result = await auto_assign_staff(target_id, AutoAssignRequest(), db=session)
+            timings.append((time.perf_counter() - started) * 1000)
+            assigned = sum(len(ids) for ids in result.assigned.values())
+            missing = sum(result.missing.values())
+            print(f"run {run_index + 1}: {assigned} assigned, {missing} missing, {len(statements)} statements")
+
+    async with session_factory() as session:
+        double_booked = (await session.scalars(
+            select(StaffAssignment.staff_id)
+            .join(Event, Event.id == StaffAssignment.event_id)
+            .where(Event.start_time == base, Event.guests_count == args.guests)
+            .group_by(StaffAssignment.staff_id)
+            .having(func.count() > 1)
+        )).all()
+        print(f"Staff double-booked in the target slot: {len(double_booked)}")
+
+    print(f"Latency p50: {statistics.median(timings):.1f} ms, max: {max(timings):.1f} ms")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--assignments-per-event", type=int, default=15)
+    parser.add_argument("--guests", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
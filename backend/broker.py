@@ -0,0 +1,89 @@
+"""In-process publish/subscribe for server-sent event streams.
+
+Each subscriber gets a bounded queue per topic. ``publish`` never blocks:
+a subscriber whose queue is full is too slow to keep up, so it is dropped
+and its stream ends, letting the client reconnect and reload the current
+state instead of silently missing messages.
+
+Messages only reach subscribers of this process.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Seconds without messages before a stream sends an SSE comment to keep proxies from closing it
+KEEPALIVE_SECONDS = 15
+
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, topic: str, max_queue: int):
+        self.topic = topic
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.closed = False
+
+    def _offer(self, message: Any):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._close()
+
+    def _close(self):
+        self.closed = True
+        _subscribers[self.topic].discard(self)
+        # Wake up a pending ``get``; the queue may be full, so make room first
+        while True:
+            try:
+                self._queue.put_nowait(_CLOSED)
+                return
+            except asyncio.QueueFull:
+                self._queue.get_nowait()
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        """Next message, ``None`` after ``timeout`` seconds; raises ``EOFError`` once closed"""
+        try:
+            message = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is _CLOSED:
+            raise EOFError(f"subscription to {self.topic} closed")
+        return message
+
+    def close(self):
+        if not self.closed:
+            self._close()
+
+
+_subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+
+def subscribe(topic: str, max_queue: int = SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+    subscription = Subscription(topic, max_queue)
+    _subscribers[topic].add(subscription)
+    return subscription
+
+
+def publish(topic: str, message: Any):
+    for subscription in list(_subscribers.get(topic, ())):
+        subscription._offer(message)
+
+
+def subscriber_count(topic: str) -> int:
+    return len(_subscribers.get(topic, ()))
+
+
+def sse_event(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    """Format one server-sent event with a JSON payload"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_comment(text: str = "keepalive") -> str:
+    return f": {text}\n\n"
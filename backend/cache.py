@@ -0,0 +1,311 @@
+"""Response cache for the hot read endpoints.
+
+An entry holds the serialized JSON body of a GET response, plus headers
+such as ``X-Next-Cursor``. Every entry is filed under one or more tags
+("events", "events:42", "analytics"). Each tag has a version number that
+is part of the entry key, so invalidating a tag is a single INCR. Entries
+built from an older version are simply never read again and age out by
+TTL. A read racing with a write stores its result under the versions it
+saw before querying, so it cannot bring back stale data after the write's
+invalidation.
+
+Redis (``REDIS_URL``) is used when it is reachable at startup. Otherwise
+an in-process LRU with TTL takes its place, which is enough for a single
+worker and for the tests.
+"""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+import etags
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_TAGS = int(os.getenv("CACHE_MAX_TAGS", "4096"))
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "banquetpro")
+
+CACHE_STATUS_HEADER = "X-Cache"
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL, and an LRU of tag versions.
+
+    Versions come from one counter, so a tag never reads a number it had
+    before. Tags without a version of their own read ``_floor``, which
+    moves past every issued version whenever one is evicted: that only
+    turns the entries of forgotten tags into misses, never brings back an
+    invalidated one.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_tags: int = CACHE_MAX_TAGS):
+        self.max_entries = max_entries
+        self.max_tags = max_tags
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_versions(self, tags: Sequence[str]) -> List[int]:
+        versions = []
+        for tag in tags:
+            version = self._versions.get(tag)
+            if version is None:
+                versions.append(self._floor)
+            else:
+                self._versions.move_to_end(tag)
+                versions.append(version)
+        return versions
+
+    async def bump_versions(self, tags: Sequence[str]):
+        for tag in tags:
+            self._counter += 1
+            self._versions[tag] = self._counter
+            self._versions.move_to_end(tag)
+        while len(self._versions) > self.max_tags:
+            self._versions.popitem(last=False)
+            self._counter += 1
+            self._floor = self._counter
+
+    async def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Shared cache in Redis; entries expire with SET EX, tag versions are plain counters"""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = CACHE_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def get_versions(self, tags: Sequence[str]) -> List[int]:
+        values = await self.client.mget([self._tag_key(tag) for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def bump_versions(self, tags: Sequence[str]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            await pipe.execute()
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class CacheStats:
+    """Hit/miss counters, exposed on the internal cache endpoint"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+backend = MemoryBackend()
+stats = CacheStats()
+
+
+async def init_cache():
+    """Switch to Redis when REDIS_URL is set and answers a PING"""
+    global backend
+    if not REDIS_URL or CACHE_TTL_SECONDS <= 0:
+        return
+    from redis import asyncio as redis_asyncio
+    client = redis_asyncio.from_url(REDIS_URL)
+    try:
+        await client.ping()
+    except (redis_asyncio.RedisError, OSError) as exc:
+        logger.warning("Redis unavailable (%s), using in-process response cache", exc)
+        await client.aclose()
+        return
+    backend = RedisBackend(client)
+
+
+async def close_cache():
+    await backend.close()
+
+
+async def clear_cache():
+    """Drop every entry and tag version (used by tests and maintenance scripts)"""
+    await backend.clear()
+    stats.reset()
+
+
+class CacheEntry:
+    """Result of a lookup: either a ready response or the key to store one under"""
+
+    def __init__(self, request: Request, key: Optional[str], response: Optional[Response] = None):
+        self.request = request
+        self.key = key
+        self.response = response
+
+
+def _request_key(request: Request, versions: Sequence[int]) -> str:
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    version_part = ".".join(str(version) for version in versions)
+    return f"{CACHE_KEY_PREFIX}:resp:{request.url.path}?{query}:{version_part}"
+
+
+def _pack(body: bytes, headers: Dict[str, str]) -> bytes:
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def _unpack(value: bytes):
+    headers, _, body = value.partition(b"\n")
+    return body, json.loads(headers)
+
+
+def _json_response(body: bytes, headers: Dict[str, str], cache_status: str) -> Response:
+    response = Response(content=body, media_type="application/json", headers=headers)
+    response.headers[CACHE_STATUS_HEADER] = cache_status
+    return response
+
+
+async def lookup(request: Request, *tags: str) -> CacheEntry:
+    """Return the cached response for ``request`` or the key to store it under"""
+    if CACHE_TTL_SECONDS <= 0:
+        return CacheEntry(request, None)
+    try:
+        key = _request_key(request, await backend.get_versions(tags))
+        value = await backend.get(key)
+    except Exception as exc:  # a broken cache must never fail the request
+        stats.errors += 1
+        logger.warning("Response cache lookup failed: %s", exc)
+        return CacheEntry(request, None)
+
+    if value is None:
+        stats.misses += 1
+        return CacheEntry(request, key)
+    stats.hits += 1
+    body, headers = _unpack(value)
+    etag = headers.get(etags.ETAG_HEADER)
+    if etag and etags.if_none_match(request, etag):
+        return CacheEntry(request, key, etags.not_modified(etag))
+    return CacheEntry(request, key, _json_response(body, headers, "HIT"))
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+async def store(
+    entry: CacheEntry,
+    model,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    etag: Optional[str] = None,
+    exclude_unset: bool = False,
+    encoder: Optional[Callable[[Any], bytes]] = None,
+) -> Response:
+    """Serialize ``content`` with ``model`` (the route's response model) and cache it.
+
+    With an ``etag`` computed from the loaded rows a matching If-None-Match
+    is answered with 304 before serializing; otherwise the ETag is a hash
+    of the body. ``exclude_unset`` leaves out fields ``content`` does not
+    have, such as relationships that were not included. An ``encoder``
+    (see ``fastjson``) replaces the model for content it can encode
+    directly.
+    """
+    if etag and etags.if_none_match(entry.request, etag):
+        return etags.not_modified(etag)
+
+    if encoder is not None:
+        body = encoder(content)
+    else:
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), exclude_unset=exclude_unset)
+    etag = etag or etags.body_etag(body)
+    headers = {**(headers or {}), etags.ETAG_HEADER: etag, "Cache-Control": etags.CACHE_CONTROL}
+    if entry.key is not None:
+        try:
+            await backend.set(entry.key, _pack(body, headers), CACHE_TTL_SECONDS)
+            stats.stores += 1
+        except Exception as exc:
+            stats.errors += 1
+            logger.warning("Response cache store failed: %s", exc)
+    if etags.if_none_match(entry.request, etag):
+        return etags.not_modified(etag)
+    return _json_response(body, headers, "MISS")
+
+
+async def invalidate(*tags: str):
+    """Invalidate every entry filed under any of ``tags``; call after the write commits"""
+    try:
+        await backend.bump_versions(tags)
+        stats.invalidations += 1
+    except Exception as exc:
+        stats.errors += 1
+        logger.error("Response cache invalidation failed for %s: %s", tags, exc)
+
+
+def cache_status() -> dict:
+    return {
+        "backend": backend.name,
+        "ttl_seconds": CACHE_TTL_SECONDS,
+        "stats": stats.snapshot(),
+    }
@@ -0,0 +1,222 @@
+"""Change feed for events, clients, staff and inventory.
+
+Writers call ``publish`` right after committing, next to the cache
+invalidation. A change is a notification, not a row image:
+
+    {"seq": 42, "resource": "events", "action": "updated", "ids": [7]}
+
+Clients refetch what they display, which the response cache serves
+cheaply, instead of polling full lists to find out what changed.
+
+Every change gets a sequence number and the last ``CHANGEFEED_BUFFER_SIZE``
+changes are kept in a ring buffer. A client that reconnects with the last
+sequence it saw (``Last-Event-ID``) is replayed what it missed; one that
+is further behind, or saw sequences from before a restart, gets a
+``reset`` and should reload its data. In memory the sequence starts at
+the startup time in milliseconds, so sequences from an earlier process
+are always out of the buffer.
+
+With a single worker changes go straight to the in-process ``broker``.
+When ``REDIS_URL`` is reachable at startup, every worker numbers and
+publishes its changes with one Lua script (INCR + PUBLISH run atomically,
+so the channel carries sequences in order) and a listener task in every
+worker feeds the channel into its own buffer and broker. If the listener
+loses Redis it resubscribes with exponential backoff; changes published
+meanwhile never reached this worker, so its buffer restarts at the
+current sequence and its open streams get a ``reset``.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set
+
+import broker
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+CHANGEFEED_BUFFER_SIZE = int(os.getenv("CHANGEFEED_BUFFER_SIZE", "1000"))
+CHANGEFEED_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "banquetpro")
+CHANGEFEED_RECONNECT_MAX_SECONDS = float(os.getenv("CHANGEFEED_RECONNECT_MAX_SECONDS", "30"))
+
+CHANGES_TOPIC = "changes"
+RESOURCES = ("events", "clients", "staff", "inventory", "series")
+
+_SEQ_KEY = f"{CHANGEFEED_KEY_PREFIX}:changefeed:seq"
+_CHANNEL = f"{CHANGEFEED_KEY_PREFIX}:changefeed"
+# First wait before resubscribing; it doubles up to CHANGEFEED_RECONNECT_MAX_SECONDS
+_RECONNECT_INITIAL_SECONDS = 0.5
+_PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', KEYS[2], seq .. ' ' .. ARGV[1])
+return seq
+"""
+
+
+class ChangeBuffer:
+    """The most recent changes, in sequence order"""
+
+    def __init__(self, size: int, last_seq: int = 0):
+        self._changes = deque(maxlen=size)
+        self.last_seq = last_seq
+
+    def append(self, change: dict):
+        if change["seq"] <= self.last_seq:
+            return
+        self._changes.append(change)
+        self.last_seq = change["seq"]
+        broker.publish(CHANGES_TOPIC, change)
+
+    def reset(self, seq: int):
+        """Drop the buffered changes and continue from ``seq``, telling the subscribers"""
+        self._changes.clear()
+        self.last_seq = seq
+        broker.publish(CHANGES_TOPIC, {"seq": seq, "reset": True})
+
+    def since(self, seq: int) -> Optional[List[dict]]:
+        """Changes after ``seq``, or ``None`` when some of them are no longer buffered"""
+        if seq > self.last_seq:
+            return None
+        missed = [change for change in self._changes if change["seq"] > seq]
+        expected = self.last_seq - seq
+        return missed if len(missed) == expected else None
+
+
+buffer = ChangeBuffer(CHANGEFEED_BUFFER_SIZE, last_seq=int(time.time() * 1000))
+
+_redis = None
+_listener: Optional[asyncio.Task] = None
+
+
+async def publish(resource: str, action: str, *ids: int):
+    """Announce that rows of ``resource`` were created, updated or deleted"""
+    payload = {
+        "resource": resource,
+        "action": action,
+        "ids": list(ids),
+        "at": datetime.utcnow().isoformat(),
+    }
+    if _redis is None:
+        buffer.append({"seq": buffer.last_seq + 1, **payload})
+        return
+    try:
+        await _redis.eval(_PUBLISH_SCRIPT, 2, _SEQ_KEY, _CHANNEL, json.dumps(payload))
+    except Exception as exc:
+        # The write is committed either way; clients catch up on their next reset
+        logger.warning("Could not publish %s %s change (%s)", resource, action, exc)
+
+
+async def _subscribe(client):
+    """Subscribe to the channel, then read the current sequence"""
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(_CHANNEL)
+        # Subscribed first: anything published after this read reaches the listener
+        return pubsub, int(await client.get(_SEQ_KEY) or 0)
+    except BaseException:
+        await pubsub.aclose()
+        raise
+
+
+async def _listen(client, pubsub):
+    delay = _RECONNECT_INITIAL_SECONDS
+    while True:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                seq, payload = message["data"].split(b" ", 1)
+                buffer.append({"seq": int(seq), **json.loads(payload)})
+            logger.warning("Change feed subscription ended")
+        except asyncio.CancelledError:
+            await pubsub.aclose()
+            raise
+        except Exception:
+            logger.exception("Change feed listener lost Redis")
+        await pubsub.aclose()
+
+        while True:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHANGEFEED_RECONNECT_MAX_SECONDS)
+            try:
+                pubsub, seq = await _subscribe(client)
+            except Exception as exc:
+                logger.warning("Change feed could not resubscribe (%s), retrying in %.1fs", exc, delay)
+                continue
+            break
+        delay = _RECONNECT_INITIAL_SECONDS
+        if seq != buffer.last_seq:
+            buffer.reset(seq)
+        logger.info("Change feed resubscribed at sequence %d", seq)
+
+
+async def stream(since: Optional[int], resources: Optional[Set[str]] = None) -> AsyncIterator[str]:
+    """Server-sent events: missed changes after ``since`` (or a reset), then live ones"""
+    # Subscribe before reading the buffer so no change falls in between
+    subscription = broker.subscribe(CHANGES_TOPIC)
+    try:
+        last_sent = buffer.last_seq
+        if since is not None:
+            missed = buffer.since(since)
+            if missed is None:
+                yield broker.sse_event("reset", {"seq": last_sent}, event_id=last_sent)
+            else:
+                for change in missed:
+                    if resources is None or change["resource"] in resources:
+                        yield broker.sse_event("change", change, event_id=change["seq"])
+        yield broker.sse_event("ready", {"seq": last_sent}, event_id=last_sent)
+        while True:
+            try:
+                change = await subscription.get(timeout=broker.KEEPALIVE_SECONDS)
+            except EOFError:
+                break
+            if change is None:
+                yield broker.sse_comment()
+            elif change.get("reset"):
+                last_sent = change["seq"]
+                yield broker.sse_event("reset", {"seq": last_sent}, event_id=last_sent)
+            elif change["seq"] > last_sent:
+                last_sent = change["seq"]
+                if resources is None or change["resource"] in resources:
+                    yield broker.sse_event("change", change, event_id=change["seq"])
+    finally:
+        subscription.close()
+
+
+async def init_changefeed():
+    """Relay changes through Redis when REDIS_URL is set and answers a PING"""
+    global _redis, _listener
+    if not REDIS_URL:
+        return
+    from redis import asyncio as redis_asyncio
+    client = redis_asyncio.from_url(REDIS_URL)
+    try:
+        pubsub, buffer.last_seq = await _subscribe(client)
+    except (redis_asyncio.RedisError, OSError) as exc:
+        logger.warning("Redis unavailable (%s), change feed limited to this process", exc)
+        await client.aclose()
+        return
+    _redis = client
+    _listener = asyncio.create_task(_listen(client, pubsub))
+
+
+async def close_changefeed():
+    global _redis, _listener
+    if _listener is not None:
+        _listener.cancel()
+        _listener = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def changefeed_status() -> dict:
+    return {
+        "backend": "redis" if _redis is not None else "memory",
+        "last_seq": buffer.last_seq,
+        "subscribers": broker.subscriber_count(CHANGES_TOPIC),
+    }
@@ -0,0 +1,86 @@
+"""Strong ETags and conditional requests for the resource endpoints.
+
+A resource's ETag is a hash of its (id, updated_at) pair, and a list's
+ETag is the hash of that pair for every row on the page plus the next
+cursor. Both come from the rows as loaded, so ``If-None-Match`` can be
+answered with 304 before the response is serialized. Writes honour
+``If-Match`` and answer 412 when the stored resource changed since the
+client read it.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+ETAG_HEADER = "ETag"
+# Browsers keep the response but revalidate it with If-None-Match on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def _version(row) -> str:
+    updated_at = getattr(row, "updated_at", None)
+    return f"{row.id}:{updated_at.isoformat() if updated_at else ''}"
+
+
+def _quote(digest: str) -> str:
+    return f'"{digest}"'
+
+
+def resource_etag(row) -> str:
+    return _quote(hashlib.blake2b(_version(row).encode(), digest_size=16).hexdigest())
+
+
+def list_etag(rows: Iterable, next_cursor: Optional[str] = None) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(_version(row).encode())
+        digest.update(b"|")
+    digest.update((next_cursor or "").encode())
+    return _quote(digest.hexdigest())
+
+
+def body_etag(body: bytes) -> str:
+    return _quote(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def _parse(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the client's copy is current (weak comparison, as for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _parse(header)
+    return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def check_if_match(request: Request, row):
+    """Raise 412 if an If-Match header does not match the current resource (strong comparison)"""
+    header = request.headers.get("if-match")
+    if not header:
+        return
+    tags = _parse(header)
+    if "*" in tags or resource_etag(row) in tags:
+        return
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource has been modified",
+        headers={ETAG_HEADER: resource_etag(row)},
+    )
+
+
+def set_etag(response: Response, row):
+    response.headers[ETAG_HEADER] = resource_etag(row)
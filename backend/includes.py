@@ -0,0 +1,64 @@
+"""Opt-in eager loading for the ``include=`` query parameter.
+
+Relationships are never lazy loaded while serializing a response: under
+the async session a lazy load cannot run, and in a list it would be one
+query per row. An endpoint declares the relationships it can include,
+each with the loader that fetches it for the whole page in one extra
+query (``selectinload`` for collections, ``joinedload`` for many-to-one)
+and the cache tag whose invalidation must also drop the response.
+
+``loaded`` wraps rows for serialization so relationships that were not
+requested look absent and keep their ``None`` default, instead of
+triggering a load.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect
+from sqlalchemy.orm.interfaces import LoaderOption
+
+
+class Relation(NamedTuple):
+    option: LoaderOption
+    # Cache tag of the related resource, if its changes must refresh the response
+    tag: Optional[str] = None
+
+
+def parse_include(include: Optional[str], relations: Dict[str, Relation]) -> Tuple[List[LoaderOption], List[str]]:
+    """Map "a,b" to (loader options, cache tags); 400 for unknown names"""
+    if not include:
+        return [], []
+    names = list(dict.fromkeys(name.strip() for name in include.split(",") if name.strip()))
+    unknown = [name for name in names if name not in relations]
+    if unknown:
+        allowed = ", ".join(sorted(relations))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid include '{', '.join(unknown)}'. Allowed: {allowed}"
+        )
+    selected = [relations[name] for name in names]
+    return [relation.option for relation in selected], [relation.tag for relation in selected if relation.tag]
+
+
+class _Loaded:
+    """Attribute view of an ORM row hiding whatever is not loaded yet"""
+
+    __slots__ = ("_row", "_unloaded")
+
+    def __init__(self, row):
+        self._row = row
+        self._unloaded = inspect(row).unloaded
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._unloaded:
+            raise AttributeError(name)
+        return loaded(getattr(self._row, name))
+
+
+def loaded(value: Any) -> Any:
+    """Wrap ORM rows (or lists of them) so serializing them never loads anything"""
+    if isinstance(value, list):
+        return [loaded(item) for item in value]
+    if hasattr(value, "_sa_instance_state"):
+        return _Loaded(value)
+    return value
@@ -3,12 +3,14 @@
 
 -- Create extension if needed
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Needed by the venue overlap exclusion constraint on events
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 -- Create schema if it doesn't exist
 CREATE SCHEMA IF NOT EXISTS public;
 
 -- Create tables if they don't exist (if not handled by SQLAlchemy)
--- This is just a placeholder - your actual schema will be created by SQLAlchemy's Base.metadata.create_all
+-- This is just a placeholder - the schema is managed by the Alembic migrations in backend/migrations
 
 -- Create initial admin user if needed
 -- INSERT INTO users (name, email, password, role)
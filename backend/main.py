@@ -1,24 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+from typing import Optional
+import os
 import uvicorn
 
-from database import engine, get_db
-from models import Base
-from routers import events, clients, staff, inventory, analytics
+import cache
+import changefeed
+import metrics
+from database import get_db, async_engine, async_pool_status, create_schema
+from routers import events, assignments, clients, staff, inventory, analytics, search, series
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create missing tables at startup. Off when migrations own the schema
+# (`alembic upgrade head` before the workers start), so importing this
+# module never touches the database and workers don't race on DDL
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() in ("1", "true", "yes")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 BanquetPro API starting up...")
+    if DB_CREATE_SCHEMA:
+        await create_schema()
+    await cache.init_cache()
+    await changefeed.init_changefeed()
     yield
     # Shutdown
     print("💤 BanquetPro API shutting down...")
+    await changefeed.close_changefeed()
+    await cache.close_cache()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="BanquetPro API",
@@ -30,6 +44,21 @@ app = FastAPI(
 # Security
 security = HTTPBearer()
 
+# Request metrics (latency, response size, DB queries and time per route), served on /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+def _pool_gauges():
+    pool = async_pool_status()["pool"]
+    for name in ("size", "checkedout", "overflow"):
+        if name in pool:
+            yield f"db_pool_{name}", f"Connection pool {name}", "gauge", pool[name]
+    yield "db_pool_timeouts_total", "Connection pool checkout timeouts", "counter", pool["timeouts"]
+    yield "db_pool_wait_seconds_max", "Longest wait for a pooled connection", "gauge", pool["wait_seconds_max"]
+
+metrics.register_collector(_pool_gauges)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -45,12 +74,65 @@ app.add_middleware(
 async def health_check():
     return {"status": "healthy", "service": "BanquetPro API"}
 
+# Internal endpoint with connection pool settings and checkout/wait metrics
+@app.get("/internal/db/pool", include_in_schema=False)
+async def db_pool_status():
+    return async_pool_status()
+
+# Internal endpoint with response cache backend and hit/miss counters
+@app.get("/internal/cache", include_in_schema=False)
+async def response_cache_status():
+    return cache.cache_status()
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Change feed: server-sent events with create/update/delete notifications
+@app.get("/api/v1/changes", tags=["Change Feed"])
+async def change_feed(
+    resources: Optional[str] = Query(None, description="Comma-separated subset of events, clients, staff, inventory"),
+    since: Optional[int] = Query(None, description="Last sequence seen; Last-Event-ID takes precedence"),
+    last_event_id: Optional[str] = Header(None),
+):
+    selected = None
+    if resources:
+        selected = {resource.strip() for resource in resources.split(",") if resource.strip()}
+        unknown = selected - set(changefeed.RESOURCES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown resources: {sorted(unknown)}. Allowed: {', '.join(changefeed.RESOURCES)}"
+            )
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid Last-Event-ID"
+            )
+    return StreamingResponse(
+        changefeed.stream(since, selected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Internal endpoint with change feed backend, last sequence and subscribers
+@app.get("/internal/changes", include_in_schema=False)
+async def change_feed_status():
+    return changefeed.changefeed_status()
+
 # Include routers
 app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
+app.include_router(assignments.router, prefix="/api/v1/events", tags=["Staff Assignments"])
 app.include_router(clients.router, prefix="/api/v1/clients", tags=["Clients"])
 app.include_router(staff.router, prefix="/api/v1/staff", tags=["Staff"])
 app.include_router(inventory.router, prefix="/api/v1/inventory", tags=["Inventory"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(series.router, prefix="/api/v1/series", tags=["Series"])
 
 @app.get("/")
 async def root():
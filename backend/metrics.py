@@ -0,0 +1,199 @@
+"""Request and database metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and labels it with the route
+template ("/api/v1/events/{event_id}"), never the raw path, so the number
+of series stays bounded. While a request runs, a ``RequestStats`` object
+in a context variable collects what the engine hooks in ``database``
+report for each statement: the query count and the time spent in the
+database. Both end up in per-route histograms next to latency and
+response size.
+
+Everything is plain counters and fixed-bucket histograms updated in
+place: a request costs a few dict lookups and a ``bisect`` per
+histogram, cheap enough to leave on in production.
+"""
+import bisect
+import contextvars
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_labels = self.label_names + ("le",)
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(bucket_labels, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ROUTE_LABELS + ("status",)
+)
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time to send the full response", ROUTE_LABELS, LATENCY_BUCKETS
+)
+response_size = Histogram(
+    "http_response_size_bytes", "Response body size", ROUTE_LABELS, SIZE_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ROUTE_LABELS, QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in the database per request", ROUTE_LABELS, LATENCY_BUCKETS
+)
+db_queries_total = Counter("db_queries_total", "SQL statements executed, inside or outside requests")
+db_seconds_total = Counter("db_query_seconds_total", "Time spent executing SQL statements")
+db_slow_queries_total = Counter("db_slow_queries_total", "SQL statements above the slow query threshold")
+
+_METRICS = [
+    requests_total, request_duration, response_size, request_queries, request_db_time,
+    db_queries_total, db_seconds_total, db_slow_queries_total,
+]
+
+# Callables returning extra (name, help, type, value) gauges at scrape time, e.g. pool occupancy
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, float]]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, str, str, float]]]):
+    _collectors.append(collector)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def record_query(seconds: float):
+    """Called by the engine hooks after every statement"""
+    db_queries_total.inc()
+    db_seconds_total.inc(amount=seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+def render() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, help_text, metric_type, value in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget every series (used by tests)"""
+    for metric in _METRICS:
+        metric._values.clear()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size, status and DB usage per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            requests_total.inc(labels + (str(status_code),))
+            request_duration.observe(labels, time.perf_counter() - started)
+            response_size.observe(labels, size)
+            request_queries.observe(labels, stats.queries)
+            request_db_time.observe(labels, stats.db_seconds)
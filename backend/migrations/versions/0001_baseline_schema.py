@@ -0,0 +1,128 @@
+"""Baseline schema
+
+The tables as ``Base.metadata.create_all`` built them before migrations
+existed. A database created that way is adopted with
+``alembic stamp 0001`` and then upgraded normally.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 04:10:42.861938
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('clients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('company', sa.String(length=100), nullable=True),
+    sa.Column('is_corporate', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index('ix_clients_id', 'clients', ['id'])
+
+    op.create_table('inventory_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('current_stock', sa.Integer(), nullable=False),
+    sa.Column('minimum_stock', sa.Integer(), nullable=False),
+    sa.Column('maximum_stock', sa.Integer(), nullable=False),
+    sa.Column('unit_cost', sa.Float(), nullable=True),
+    sa.Column('location', sa.String(length=100), nullable=True),
+    sa.Column('supplier', sa.String(length=100), nullable=True),
+    sa.Column('last_restocked', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_inventory_items_id', 'inventory_items', ['id'])
+
+    op.create_table('staff',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('role', sa.String(length=50), nullable=False),
+    sa.Column('specialty', sa.String(length=100), nullable=True),
+    sa.Column('hourly_rate', sa.Float(), nullable=True),
+    sa.Column('status', sa.Enum('AVAILABLE', 'BUSY', 'ON_EVENT', 'UNAVAILABLE', name='staffstatus'), nullable=True),
+    sa.Column('rating', sa.Float(), nullable=True),
+    sa.Column('total_events', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index('ix_staff_id', 'staff', ['id'])
+
+    op.create_table('suppliers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('contact_person', sa.String(length=100), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('category', sa.String(length=50), nullable=True),
+    sa.Column('rating', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_suppliers_id', 'suppliers', ['id'])
+
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('venue', sa.String(length=100), nullable=False),
+    sa.Column('guests_count', sa.Integer(), nullable=False),
+    sa.Column('budget', sa.Float(), nullable=False),
+    sa.Column('status', sa.Enum('PLANNING', 'CONFIRMED', 'IN_PREPARATION', 'COMPLETED', 'CANCELLED', name='eventstatus'), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_events_id', 'events', ['id'])
+
+    op.create_table('staff_assignments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=True),
+    sa.Column('staff_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_at', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['staff_id'], ['staff.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_staff_assignments_id', 'staff_assignments', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('staff_assignments')
+    op.drop_table('events')
+    op.drop_table('suppliers')
+    op.drop_table('staff')
+    op.drop_table('inventory_items')
+    op.drop_table('clients')
+    if op.get_context().dialect.name == 'postgresql':
+        for enum_name in ('staffstatus', 'eventstatus'):
+            sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,81 @@
+"""Venue overlap index and exclusion constraint
+
+Adds the (venue, start_time, end_time) index behind the overlap check.
+On Postgres the database also rejects overlapping bookings with an
+exclusion constraint, which cannot be added while the table holds any.
+Bookings made before the overlap rule only compared the date, so the
+upgrade first cancels them: per venue, in start order, a booking that
+overlaps one already kept is cancelled and its notes say which one. The
+cleanup needs a connection, so an offline (``--sql``) upgrade adds the
+constraint directly and fails if overlaps remain.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 04:11:02.668340
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+events = sa.table(
+    'events',
+    sa.column('id', sa.Integer),
+    sa.column('venue', sa.String),
+    sa.column('start_time', sa.DateTime),
+    sa.column('end_time', sa.DateTime),
+    sa.column('status', sa.String),
+    sa.column('notes', sa.Text),
+)
+
+
+def _cancel_overlapping_bookings():
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.select(events.c.id, events.c.venue, events.c.start_time, events.c.end_time, events.c.notes)
+        .where(events.c.status != 'CANCELLED')
+        .order_by(events.c.venue, events.c.start_time, events.c.id)
+    )
+    venue, kept_id, kept_end = None, None, None
+    cancelled = []
+    for event_id, event_venue, start_time, end_time, notes in result:
+        if event_venue == venue and start_time < kept_end:
+            note = f'Cancelado al migrar: se solapa con el evento {kept_id}'
+            cancelled.append({'event_id': event_id, 'notes': f'{notes}\n{note}' if notes else note})
+            continue
+        venue, kept_id, kept_end = event_venue, event_id, end_time
+    if cancelled:
+        connection.execute(
+            events.update()
+            .where(events.c.id == sa.bindparam('event_id'))
+            .values(status='CANCELLED', notes=sa.bindparam('notes')),
+            cancelled
+        )
+
+
+def upgrade() -> None:
+    op.create_index('ix_events_venue_start_end', 'events', ['venue', 'start_time', 'end_time'])
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    if not context.is_offline_mode():
+        _cancel_overlapping_bookings()
+    # The database itself rejects overlapping bookings of a venue
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        "ALTER TABLE events ADD CONSTRAINT ex_events_venue_overlap "
+        "EXCLUDE USING gist (venue WITH =, tsrange(start_time, end_time) WITH &&) "
+        "WHERE (status <> 'CANCELLED')"
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE events DROP CONSTRAINT ex_events_venue_overlap')
+    op.drop_index('ix_events_venue_start_end', table_name='events')
@@ -0,0 +1,85 @@
+"""Analytics rollups of events
+
+Creates ``event_rollups`` and fills the daily and monthly buckets from
+the existing events, as ``python rollups.py rebuild`` does. The fill
+needs a connection, so an offline (``--sql``) upgrade only creates the
+table and the rebuild has to be run afterwards.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 04:11:47.915203
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+import rollups
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENT_STATUSES = ('PLANNING', 'CONFIRMED', 'IN_PREPARATION', 'COMPLETED', 'CANCELLED')
+
+events = sa.table(
+    'events',
+    sa.column('date', sa.DateTime),
+    sa.column('event_type', sa.String),
+    sa.column('status', sa.String),
+    sa.column('budget', sa.Float),
+)
+
+
+def upgrade() -> None:
+    table = op.create_table('event_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    # The type was created with events
+    sa.Column('status', sa.Enum(*EVENT_STATUSES, name='eventstatus').with_variant(
+        postgresql.ENUM(*EVENT_STATUSES, name='eventstatus', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('events_count', sa.Integer(), nullable=False),
+    sa.Column('budget_total', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period', 'period_start', 'event_type', 'status', name='uq_event_rollups_bucket')
+    )
+    op.create_index('ix_event_rollups_id', 'event_rollups', ['id'])
+    if context.is_offline_mode():
+        return
+
+    result = op.get_bind().execute(
+        sa.select(events.c.date, events.c.event_type, events.c.status, sa.func.count(), sa.func.sum(events.c.budget))
+        .group_by(events.c.date, events.c.event_type, events.c.status)
+    )
+    buckets = defaultdict(lambda: [0, 0.0])
+    for day, event_type, status, count, budget in result:
+        day = day.date()
+        for key in ((rollups.DAY, day), (rollups.MONTH, day.replace(day=1))):
+            bucket = buckets[key + (event_type, status or 'PLANNING')]
+            bucket[0] += count
+            bucket[1] += budget or 0.0
+    rows = [
+        {
+            'period': period,
+            'period_start': period_start,
+            'event_type': event_type,
+            'status': status,
+            'events_count': count,
+            'budget_total': budget,
+        }
+        for (period, period_start, event_type, status), (count, budget) in buckets.items()
+    ]
+    for offset in range(0, len(rows), 5000):
+        op.bulk_insert(table, rows[offset:offset + 5000])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_rollups_id', table_name='event_rollups')
+    op.drop_table('event_rollups')
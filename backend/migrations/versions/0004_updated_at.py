@@ -0,0 +1,33 @@
+"""updated_at on clients, staff and inventory items
+
+The ETags are computed from ``updated_at``. Existing rows take their
+``created_at``, so they get a version without pretending to have been
+modified now.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 04:12:58.207431
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('clients', 'staff', 'inventory_items')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,39 @@
+"""One assignment per staff member and event, and the staffing indexes
+
+Adds the (event_id, staff_id) unique constraint, after deleting the
+repeated assignments the old endpoints could create (the first one of
+each pair is kept), and the indexes used to find busy and available
+staff. SQLite rebuilds ``staff_assignments`` to add the constraint.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 04:13:36.052794
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        'DELETE FROM staff_assignments '
+        'WHERE event_id IS NOT NULL AND staff_id IS NOT NULL AND id NOT IN ('
+        'SELECT MIN(id) FROM staff_assignments GROUP BY event_id, staff_id)'
+    )
+    with op.batch_alter_table('staff_assignments') as batch_op:
+        batch_op.create_unique_constraint('uq_staff_assignments_event_staff', ['event_id', 'staff_id'])
+    op.create_index('ix_staff_assignments_staff_event', 'staff_assignments', ['staff_id', 'event_id'])
+    op.create_index('ix_staff_role_status_rating', 'staff', ['role', 'status', 'rating'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_staff_role_status_rating', table_name='staff')
+    op.drop_index('ix_staff_assignments_staff_event', table_name='staff_assignments')
+    with op.batch_alter_table('staff_assignments') as batch_op:
+        batch_op.drop_constraint('uq_staff_assignments_event_staff', type_='unique')
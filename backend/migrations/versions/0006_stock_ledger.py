@@ -0,0 +1,81 @@
+"""Stock reservations, movement ledger and low-stock alerts
+
+Adds ``reserved_stock`` and ``available_stock`` to the inventory items.
+Nothing is reserved yet, so every item starts with ``available_stock =
+current_stock``. Creates ``stock_movements`` and ``stock_alerts``; items
+already at or below their minimum get their open alert, as if they had
+just crossed it. SQLite rebuilds ``inventory_items`` to add the checks.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 04:14:09.726381
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.add_column(sa.Column('reserved_stock', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('available_stock', sa.Integer(), nullable=True))
+    op.execute('UPDATE inventory_items SET available_stock = current_stock')
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.alter_column('reserved_stock', existing_type=sa.Integer(), server_default=None)
+        batch_op.alter_column('available_stock', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_check_constraint('ck_inventory_items_reserved_stock', 'reserved_stock >= 0')
+        batch_op.create_check_constraint('ck_inventory_items_available_stock', 'available_stock >= 0')
+    op.create_index('ix_inventory_items_low_stock', 'inventory_items', ['id'], postgresql_where=sa.text('current_stock <= minimum_stock'), sqlite_where=sa.text('current_stock <= minimum_stock'))
+
+    op.create_table('stock_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=True),
+    sa.Column('movement_type', sa.Enum('RESTOCK', 'RESERVE', 'RELEASE', 'CONSUME', 'ADJUST', name='stockmovementtype'), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['item_id'], ['inventory_items.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movements_event_item', 'stock_movements', ['event_id', 'item_id'])
+    op.create_index('ix_stock_movements_item_id_id', 'stock_movements', ['item_id', 'id'])
+
+    op.create_table('stock_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('current_stock', sa.Integer(), nullable=False),
+    sa.Column('minimum_stock', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['inventory_items.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_alerts_item_id_id', 'stock_alerts', ['item_id', 'id'])
+    op.create_index('ix_stock_alerts_open_item_id', 'stock_alerts', ['item_id'], unique=True, postgresql_where=sa.text('resolved_at IS NULL'), sqlite_where=sa.text('resolved_at IS NULL'))
+    op.execute(
+        'INSERT INTO stock_alerts (item_id, current_stock, minimum_stock, created_at) '
+        'SELECT id, current_stock, minimum_stock, CURRENT_TIMESTAMP FROM inventory_items '
+        'WHERE current_stock <= minimum_stock'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stock_alerts')
+    op.drop_table('stock_movements')
+    if op.get_context().dialect.name == 'postgresql':
+        sa.Enum(name='stockmovementtype').drop(op.get_bind(), checkfirst=True)
+    op.drop_index('ix_inventory_items_low_stock', table_name='inventory_items')
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.drop_constraint('ck_inventory_items_available_stock', type_='check')
+        batch_op.drop_constraint('ck_inventory_items_reserved_stock', type_='check')
+        batch_op.drop_column('available_stock')
+        batch_op.drop_column('reserved_stock')
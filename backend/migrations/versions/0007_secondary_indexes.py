@@ -0,0 +1,62 @@
+"""Secondary indexes for the hot filters
+
+Adds the indexes behind the list filters, keyset pagination, the events
+of a client and the analytics summary, and drops the ``ix_<table>_id``
+indexes that duplicated the primary keys. On Postgres the indexes are
+built ``CONCURRENTLY`` so existing tables stay writable meanwhile.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 04:18:05.412077
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_events_status_date', 'events', ['status', 'date']),
+    ('ix_events_date_id', 'events', ['date', 'id']),
+    ('ix_events_start_time_id', 'events', ['start_time', 'id']),
+    ('ix_events_client_id', 'events', ['client_id']),
+    ('ix_staff_status', 'staff', ['status']),
+    ('ix_inventory_items_category_id', 'inventory_items', ['category', 'id']),
+    ('ix_event_rollups_status_period_start', 'event_rollups', ['status', 'period', 'period_start']),
+]
+
+# Indexes on the primary key column, which the primary key already provides
+PRIMARY_KEY_INDEXES = [
+    ('ix_clients_id', 'clients'),
+    ('ix_events_id', 'events'),
+    ('ix_staff_id', 'staff'),
+    ('ix_staff_assignments_id', 'staff_assignments'),
+    ('ix_inventory_items_id', 'inventory_items'),
+    ('ix_suppliers_id', 'suppliers'),
+    ('ix_event_rollups_id', 'event_rollups'),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+    for name, table in PRIMARY_KEY_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for name, table in PRIMARY_KEY_INDEXES:
+        op.create_index(name, table, ['id'])
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
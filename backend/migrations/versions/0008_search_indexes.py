@@ -0,0 +1,56 @@
+"""Full-text search indexes for clients, events and staff
+
+On Postgres adds the generated ``search_vector`` column (which rewrites
+each table once) and builds its GIN index ``CONCURRENTLY``. On SQLite
+creates the FTS5 tables with their sync triggers and fills them from the
+existing rows. The statements come from ``search``; the columns are
+fixed here as they were when this revision was written.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 04:31:12.208514
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+import search
+
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_FIELDS = {
+    'clients': ('name', 'company', 'email'),
+    'events': ('name', 'venue', 'notes'),
+    'staff': ('name', 'role', 'specialty'),
+}
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        for table, fields in SEARCH_FIELDS.items():
+            for statement in search.postgres_ddl(table, fields)[:-1]:
+                op.execute(statement)
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for table, fields in SEARCH_FIELDS.items():
+                op.execute(search.postgres_ddl(table, fields, concurrently=True)[-1])
+    else:
+        for table, fields in SEARCH_FIELDS.items():
+            for statement in search.sqlite_ddl(table, fields):
+                op.execute(statement)
+            op.execute(f"INSERT INTO {table}_search({table}_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for table in SEARCH_FIELDS:
+        if op.get_context().dialect.name == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {search.SEARCH_VECTOR}")
+        else:
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{trigger}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_search")
@@ -0,0 +1,79 @@
+"""Per-day venue occupancy for the calendar
+
+Creates ``venue_occupancy`` and fills it from the existing events and
+assignments, as ``python occupancy.py rebuild`` does. The fill needs a
+connection, so an offline (``--sql``) upgrade only creates the table and
+the rebuild has to be run afterwards.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 05:02:47.130952
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+import occupancy
+
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+events = sa.table(
+    'events',
+    sa.column('id', sa.Integer),
+    sa.column('venue', sa.String),
+    sa.column('start_time', sa.DateTime),
+    sa.column('end_time', sa.DateTime),
+    sa.column('status', sa.String),
+)
+staff_assignments = sa.table('staff_assignments', sa.column('event_id', sa.Integer))
+
+
+def upgrade() -> None:
+    table = op.create_table('venue_occupancy',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('venue', sa.String(length=100), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('events_count', sa.Integer(), nullable=False),
+    sa.Column('booked_minutes', sa.Integer(), nullable=False),
+    sa.Column('staff_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('venue', 'day', name='uq_venue_occupancy_venue_day')
+    )
+    op.create_index('ix_venue_occupancy_day', 'venue_occupancy', ['day'])
+    if context.is_offline_mode():
+        return
+
+    staff_counts = (
+        sa.select(staff_assignments.c.event_id, sa.func.count().label('staff'))
+        .group_by(staff_assignments.c.event_id)
+        .subquery()
+    )
+    result = op.get_bind().execute(
+        sa.select(events.c.venue, events.c.start_time, events.c.end_time, sa.func.coalesce(staff_counts.c.staff, 0))
+        .outerjoin(staff_counts, staff_counts.c.event_id == events.c.id)
+        .where(events.c.status != 'CANCELLED')
+    )
+    days = defaultdict(lambda: [0, 0, 0])
+    for venue, start_time, end_time, staff in result:
+        for day, minutes in occupancy.split_days(start_time, end_time):
+            counts = days[(venue, day)]
+            counts[0] += 1
+            counts[1] += minutes
+            counts[2] += staff
+    rows = [
+        {'venue': venue, 'day': day, 'events_count': count, 'booked_minutes': minutes, 'staff_count': staff}
+        for (venue, day), (count, minutes, staff) in days.items()
+    ]
+    for offset in range(0, len(rows), 5000):
+        op.bulk_insert(table, rows[offset:offset + 5000])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_venue_occupancy_day', table_name='venue_occupancy')
+    op.drop_table('venue_occupancy')
@@ -0,0 +1,66 @@
+"""Recurring event series
+
+Creates ``event_series`` and adds ``events.series_id`` for the events
+materialized from an occurrence. The column is nullable, so adding it
+does not rewrite ``events``; its index is built ``CONCURRENTLY`` on
+Postgres.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 05:41:26.093518
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('event_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('venue', sa.String(length=100), nullable=False),
+    sa.Column('guests_count', sa.Integer(), nullable=False),
+    sa.Column('budget', sa.Float(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('rrule', sa.String(length=500), nullable=False),
+    sa.Column('last_end', sa.DateTime(), nullable=True),
+    sa.Column('exdates', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_event_series_venue_start', 'event_series', ['venue', 'start_time'])
+    op.create_index('ix_event_series_client_id', 'event_series', ['client_id'])
+
+    if op.get_context().dialect.name == 'postgresql':
+        op.add_column('events', sa.Column('series_id', sa.Integer(), nullable=True))
+        op.create_foreign_key('events_series_id_fkey', 'events', 'event_series', ['series_id'], ['id'])
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            op.create_index('ix_events_series_id', 'events', ['series_id'], postgresql_concurrently=True)
+    else:
+        # SQLite only takes the reference inline in ADD COLUMN, which alembic does not emit
+        op.execute('ALTER TABLE events ADD COLUMN series_id INTEGER REFERENCES event_series (id)')
+        op.create_index('ix_events_series_id', 'events', ['series_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_series_id', table_name='events')
+    if op.get_context().dialect.name == 'postgresql':
+        op.drop_constraint('events_series_id_fkey', 'events', type_='foreignkey')
+    op.drop_column('events', 'series_id')
+    op.drop_index('ix_event_series_client_id', table_name='event_series')
+    op.drop_index('ix_event_series_venue_start', table_name='event_series')
+    op.drop_table('event_series')
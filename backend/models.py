@@ -1,11 +1,11 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Enum
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Boolean, Text, ForeignKey, Enum, UniqueConstraint, Index, CheckConstraint, DDL, JSON, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
-Base = declarative_base()
+import search
+from database import Base
 
 class EventStatus(enum.Enum):
     PLANNING = "planning"
@@ -20,10 +20,31 @@ class StaffStatus(enum.Enum):
     ON_EVENT = "on_event"
     UNAVAILABLE = "unavailable"
 
+class StockMovementType(enum.Enum):
+    RESTOCK = "restock"
+    RESERVE = "reserve"
+    RELEASE = "release"
+    CONSUME = "consume"
+    ADJUST = "adjust"
+
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Serves the venue overlap check: venue = ? AND start_time in a bounded range,
+        # and any other venue filter through its leading column
+        Index("ix_events_venue_start_end", "venue", "start_time", "end_time"),
+        # status_filter on the list plus date ranges, and the rollup rebuild by status
+        Index("ix_events_status_date", "status", "date"),
+        # Keyset pagination with sort=date / sort=start_time (cursor is (column, id))
+        Index("ix_events_date_id", "date", "id"),
+        Index("ix_events_start_time_id", "start_time", "id"),
+        # Events of a client (include=events, delete check)
+        Index("ix_events_client_id", "client_id"),
+        # Events materialized from a series (series delete)
+        Index("ix_events_series_id", "series_id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(200), nullable=False)
     client_id = Column(Integer, ForeignKey("clients.id"))
     event_type = Column(String(50), nullable=False)
@@ -35,6 +56,8 @@ class Event(Base):
     budget = Column(Float, nullable=False)
     status = Column(Enum(EventStatus), default=EventStatus.PLANNING)
     notes = Column(Text)
+    # Series the event was materialized from, if any (see recurrence.py)
+    series_id = Column(Integer, ForeignKey("event_series.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -42,10 +65,56 @@ class Event(Base):
     client = relationship("Client", back_populates="events")
     staff_assignments = relationship("StaffAssignment", back_populates="event")
 
+# On Postgres the database itself rejects overlapping bookings of a venue
+event.listen(
+    Event.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
+event.listen(
+    Event.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE events ADD CONSTRAINT ex_events_venue_overlap "
+        "EXCLUDE USING gist (venue WITH =, tsrange(start_time, end_time) WITH &&) "
+        "WHERE (status <> 'CANCELLED')"
+    ).execute_if(dialect="postgresql")
+)
+search.attach(Event.__table__, "name", "venue", "notes")
+
+class EventSeries(Base):
+    """Recurring event: one template and a recurrence rule, expanded on demand (see recurrence.py)"""
+    __tablename__ = "event_series"
+    __table_args__ = (
+        # Series of the venues in an overlap check, active in a window
+        Index("ix_event_series_venue_start", "venue", "start_time"),
+        Index("ix_event_series_client_id", "client_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200), nullable=False)
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    venue = Column(String(100), nullable=False)
+    guests_count = Column(Integer, nullable=False)
+    budget = Column(Float, nullable=False)
+    notes = Column(Text)
+    # Slot of the first occurrence; every occurrence lasts the same
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    # RFC 5545 RRULE without DTSTART, e.g. "FREQ=WEEKLY;BYDAY=TU;COUNT=20"
+    rrule = Column(String(500), nullable=False)
+    # End of the last occurrence; NULL for a rule without COUNT or UNTIL
+    last_end = Column(DateTime)
+    # ISO start times of the skipped or materialized occurrences
+    exdates = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Client(Base):
     __tablename__ = "clients"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False)
     phone = Column(String(20))
@@ -53,14 +122,23 @@ class Client(Base):
     company = Column(String(100))
     is_corporate = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     events = relationship("Event", back_populates="client")
 
+search.attach(Client.__table__, "name", "company", "email")
+
 class Staff(Base):
     __tablename__ = "staff"
+    __table_args__ = (
+        # Serves the candidate scan of the assignment engine
+        Index("ix_staff_role_status_rating", "role", "status", "rating"),
+        # status_filter on the list, which does not filter by role
+        Index("ix_staff_status", "status"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False)
     phone = Column(String(20))
@@ -71,14 +149,23 @@ class Staff(Base):
     rating = Column(Float, default=0.0)
     total_events = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     assignments = relationship("StaffAssignment", back_populates="staff_member")
 
+search.attach(Staff.__table__, "name", "role", "specialty")
+
 class StaffAssignment(Base):
     __tablename__ = "staff_assignments"
+    __table_args__ = (
+        # Also the index for event_id = ? (the staff of an event)
+        UniqueConstraint("event_id", "staff_id", name="uq_staff_assignments_event_staff"),
+        # Serves the "is this person busy" probe: staff_id = ? then events by PK
+        Index("ix_staff_assignments_staff_event", "staff_id", "event_id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey("events.id"))
     staff_id = Column(Integer, ForeignKey("staff.id"))
     assigned_at = Column(DateTime, default=datetime.utcnow)
@@ -88,13 +175,31 @@ class StaffAssignment(Base):
     event = relationship("Event", back_populates="staff_assignments")
     staff_member = relationship("Staff", back_populates="assignments")
 
+def _initial_available_stock(context):
+    return context.get_current_parameters()["current_stock"]
+
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (
+        CheckConstraint("reserved_stock >= 0", name="ck_inventory_items_reserved_stock"),
+        CheckConstraint("available_stock >= 0", name="ck_inventory_items_available_stock"),
+        # Partial index holding only the items at or below their minimum (the low_stock filter)
+        Index(
+            "ix_inventory_items_low_stock", "id",
+            postgresql_where=text("current_stock <= minimum_stock"),
+            sqlite_where=text("current_stock <= minimum_stock"),
+        ),
+        # category filter on the list (ordered by id) and the availability check
+        Index("ix_inventory_items_category_id", "category", "id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     category = Column(String(50), nullable=False)
+    # Physical stock; reserved_stock is promised to events, available_stock = current - reserved
     current_stock = Column(Integer, nullable=False)
+    reserved_stock = Column(Integer, nullable=False, default=0)
+    available_stock = Column(Integer, nullable=False, default=_initial_available_stock)
     minimum_stock = Column(Integer, nullable=False)
     maximum_stock = Column(Integer, nullable=False)
     unit_cost = Column(Float)
@@ -102,11 +207,50 @@ class InventoryItem(Base):
     supplier = Column(String(100))
     last_restocked = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StockMovement(Base):
+    """Append-only ledger of every change to an item's stock"""
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_item_id_id", "item_id", "id"),
+        Index("ix_stock_movements_event_item", "event_id", "item_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="SET NULL"))
+    movement_type = Column(Enum(StockMovementType), nullable=False)
+    # Units moved; only adjustments are signed
+    quantity = Column(Integer, nullable=False)
+    notes = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class StockAlert(Base):
+    """Low-stock episode of an item, open until its stock rises above the minimum again"""
+    __tablename__ = "stock_alerts"
+    __table_args__ = (
+        # Partial index over the open alerts only; also allows a single open alert per item
+        Index(
+            "ix_stock_alerts_open_item_id", "item_id", unique=True,
+            postgresql_where=text("resolved_at IS NULL"),
+            sqlite_where=text("resolved_at IS NULL"),
+        ),
+        Index("ix_stock_alerts_item_id_id", "item_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
+    # Stock and minimum when the item crossed its minimum
+    current_stock = Column(Integer, nullable=False)
+    minimum_stock = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    resolved_at = Column(DateTime)
 
 class Supplier(Base):
     __tablename__ = "suppliers"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     contact_person = Column(String(100))
     email = Column(String(100))
@@ -116,3 +260,38 @@ class Supplier(Base):
     rating = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class EventRollup(Base):
+    """Pre-aggregated event counts and budget per period, type and status"""
+    __tablename__ = "event_rollups"
+    __table_args__ = (
+        UniqueConstraint("period", "period_start", "event_type", "status", name="uq_event_rollups_bucket"),
+        # The analytics summary reads one status over a window of periods
+        Index("ix_event_rollups_status_period_start", "status", "period", "period_start"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    period = Column(String(10), nullable=False)  # "day" or "month"
+    period_start = Column(Date, nullable=False)
+    event_type = Column(String(50), nullable=False)
+    status = Column(Enum(EventStatus), nullable=False)
+    events_count = Column(Integer, nullable=False, default=0)
+    budget_total = Column(Float, nullable=False, default=0.0)
+
+class VenueOccupancy(Base):
+    """Events, booked minutes and assigned staff per venue and day (see occupancy.py)"""
+    __tablename__ = "venue_occupancy"
+    __table_args__ = (
+        # Also serves the calendar filtered by venue
+        UniqueConstraint("venue", "day", name="uq_venue_occupancy_venue_day"),
+        # The calendar of every venue over a range of days
+        Index("ix_venue_occupancy_day", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    venue = Column(String(100), nullable=False)
+    day = Column(Date, nullable=False)
+    events_count = Column(Integer, nullable=False, default=0)
+    booked_minutes = Column(Integer, nullable=False, default=0)
+    # Assignments of the day's events; a person on two events counts twice
+    staff_count = Column(Integer, nullable=False, default=0)
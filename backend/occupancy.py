@@ -0,0 +1,238 @@
+"""Per-day occupancy of each venue, maintained incrementally like the rollups.
+
+A non-cancelled event occupies its venue on every day that its
+[start_time, end_time) interval touches (days of the stored naive UTC
+times). For each (venue, day) the ``venue_occupancy`` table keeps the
+number of events, the minutes booked within that day and the staff
+assigned to those events. The event and assignment routers apply deltas
+in the same transaction as the write, so the calendar reads a month or a
+year of occupancy from that table instead of aggregating ``events``.
+
+Full rebuild (e.g. after a bulk load or to repair drift):
+
+    python occupancy.py rebuild
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Event, EventStatus, StaffAssignment, VenueOccupancy
+
+
+# Per-day columns read by the calendar, after the day itself
+DAY_COLUMNS = (
+    VenueOccupancy.day,
+    VenueOccupancy.venue,
+    VenueOccupancy.events_count,
+    VenueOccupancy.booked_minutes,
+    VenueOccupancy.staff_count,
+)
+
+
+class Booking(NamedTuple):
+    """The part of an event that the occupancy aggregates"""
+    venue: str
+    start_time: datetime
+    end_time: datetime
+    # Cancelled events occupy nothing
+    active: bool
+
+
+def booking(event: Event) -> Booking:
+    """Snapshot the occupancy-relevant fields of an event"""
+    return Booking(
+        venue=event.venue,
+        start_time=event.start_time,
+        end_time=event.end_time,
+        active=event.status != EventStatus.CANCELLED,
+    )
+
+
+def split_days(start_time: datetime, end_time: datetime) -> Iterator[Tuple[date, int]]:
+    """(day, minutes booked that day) for every day the interval touches"""
+    day = start_time.date()
+    while True:
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+        booked = min(end_time, day_end) - max(start_time, day_start)
+        yield day, max(int(booked.total_seconds() // 60), 0)
+        if end_time <= day_end:
+            return
+        day += timedelta(days=1)
+
+
+async def _upsert_day(db: AsyncSession, venue: str, day: date, events: int, minutes: int, staff: int):
+    """Add the counts to the (venue, day) row, creating it if missing"""
+    dialect = db.bind.dialect.name
+    values = {
+        "venue": venue,
+        "day": day,
+        "events_count": events,
+        "booked_minutes": minutes,
+        "staff_count": staff,
+    }
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(VenueOccupancy).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["venue", "day"],
+            set_={
+                "events_count": VenueOccupancy.events_count + stmt.excluded.events_count,
+                "booked_minutes": VenueOccupancy.booked_minutes + stmt.excluded.booked_minutes,
+                "staff_count": VenueOccupancy.staff_count + stmt.excluded.staff_count,
+            },
+        )
+        await db.execute(stmt)
+        return
+
+    result = await db.execute(
+        update(VenueOccupancy)
+        .where(VenueOccupancy.venue == venue, VenueOccupancy.day == day)
+        .values(
+            events_count=VenueOccupancy.events_count + events,
+            booked_minutes=VenueOccupancy.booked_minutes + minutes,
+            staff_count=VenueOccupancy.staff_count + staff,
+        )
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(VenueOccupancy).values(**values))
+
+
+async def _add(db: AsyncSession, item: Booking, events: int, staff: int):
+    """Add ``events`` times the booking and ``staff`` people to each of its days"""
+    if not item.active:
+        return
+    for day, minutes in split_days(item.start_time, item.end_time):
+        await _upsert_day(db, item.venue, day, events, events * minutes, staff)
+
+
+async def assigned_staff(db: AsyncSession, event_id: int) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(StaffAssignment).where(StaffAssignment.event_id == event_id)
+    )
+
+
+async def record_event_created(db: AsyncSession, event: Event):
+    await _add(db, booking(event), 1, 0)
+
+
+async def record_events_created(db: AsyncSession, items: Iterable[Booking]):
+    """Apply many new events (without staff yet) at once, one upsert per touched day"""
+    days = defaultdict(lambda: [0, 0])
+    for item in items:
+        if not item.active:
+            continue
+        for day, minutes in split_days(item.start_time, item.end_time):
+            counts = days[(item.venue, day)]
+            counts[0] += 1
+            counts[1] += minutes
+    for (venue, day), (events, minutes) in days.items():
+        await _upsert_day(db, venue, day, events, minutes, 0)
+
+
+async def record_event_updated(db: AsyncSession, before: Booking, event: Event):
+    after = booking(event)
+    if after == before:
+        return
+    staff = await assigned_staff(db, event.id)
+    await _add(db, before, -1, -staff)
+    await _add(db, after, 1, staff)
+
+
+async def record_event_deleted(db: AsyncSession, event: Event):
+    """Remove an event with its staff; call before deleting its assignments"""
+    staff = await assigned_staff(db, event.id)
+    await _add(db, booking(event), -1, -staff)
+
+
+async def record_staff_changed(db: AsyncSession, event: Event, delta: int):
+    """Count ``delta`` more (or fewer) people assigned to ``event``"""
+    if delta:
+        await _add(db, booking(event), 0, delta)
+
+
+async def read_days(
+    db: AsyncSession, start_day: date, end_day: date, venue: Optional[str] = None
+) -> Dict[date, List[dict]]:
+    """Occupied venues per day in [start_day, end_day), ordered by venue.
+
+    Each is a dict shaped like ``schemas.VenueDayOccupancy``; a year of
+    every venue is thousands of rows, so they are not loaded as ORM objects.
+    """
+    query = select(*DAY_COLUMNS).where(
+        VenueOccupancy.day >= start_day,
+        VenueOccupancy.day < end_day,
+        VenueOccupancy.events_count != 0,
+    )
+    if venue is not None:
+        query = query.where(VenueOccupancy.venue == venue)
+    days = defaultdict(list)
+    for row in await db.execute(query.order_by(VenueOccupancy.day, VenueOccupancy.venue)):
+        values = row._asdict()
+        days[values.pop("day")].append(values)
+    return days
+
+
+async def rebuild(db: AsyncSession, batch_size: int = 5000) -> int:
+    """Recompute every row from the events and assignments; returns the number of rows"""
+    staff_counts = (
+        select(StaffAssignment.event_id, func.count().label("staff"))
+        .group_by(StaffAssignment.event_id)
+        .subquery()
+    )
+    result = await db.stream(
+        select(Event.venue, Event.start_time, Event.end_time, func.coalesce(staff_counts.c.staff, 0))
+        .outerjoin(staff_counts, staff_counts.c.event_id == Event.id)
+        .where(Event.status != EventStatus.CANCELLED)
+    )
+    days = defaultdict(lambda: [0, 0, 0])
+    async for venue, start_time, end_time, staff in result:
+        for day, minutes in split_days(start_time, end_time):
+            counts = days[(venue, day)]
+            counts[0] += 1
+            counts[1] += minutes
+            counts[2] += staff
+
+    await db.execute(delete(VenueOccupancy))
+    rows = [
+        {"venue": venue, "day": day, "events_count": events, "booked_minutes": minutes, "staff_count": staff}
+        for (venue, day), (events, minutes, staff) in days.items()
+    ]
+    for offset in range(0, len(rows), batch_size):
+        await db.execute(insert(VenueOccupancy), rows[offset:offset + batch_size])
+    await db.commit()
+    return len(rows)
+
+
+async def _run(command: str):
+    import cache
+    from database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        if command == "rebuild":
+            rows = await rebuild(db)
+            print(f"Rebuilt {rows} venue occupancy rows")
+    # Cached calendars were built from the old rows
+    await cache.init_cache()
+    await cache.invalidate("events")
+    await cache.close_cache()
+    await async_engine.dispose()
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Manage the venue occupancy table")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    main()
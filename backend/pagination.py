@@ -0,0 +1,124 @@
+"""Keyset (cursor) pagination for the list endpoints.
+
+Rows are ordered by (sort key, id). A page ends with an opaque cursor
+holding the sort key and id of its last row; the next page continues
+strictly after that pair with a WHERE clause instead of OFFSET, so every
+page costs the same index range scan and concurrent inserts do not
+shift rows between pages.
+
+Endpoints expose the cursor of the next page in the ``X-Next-Cursor``
+response header, keeping the response body a plain list.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    payload = json.dumps({"s": sort, "v": _encode_value(value), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Return the (sort value, id) stored in ``cursor``; 400 if it is invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort:
+            raise ValueError("cursor was issued for a different sort order")
+        return _decode_value(payload["v"]), int(payload["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from exc
+
+
+def resolve_sort(sort: str, sort_columns: Dict[str, Any]):
+    """Map ``sort`` ("name" or "-name" for descending) to (column, descending)"""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in sort_columns:
+        allowed = ", ".join(sorted(sort_columns))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort field '{key}'. Allowed: {allowed}"
+        )
+    return sort_columns[key], descending
+
+
+def _selects_entity(query, model) -> bool:
+    descriptions = query.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is model
+
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    model,
+    sort_columns: Dict[str, Any],
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> Tuple[List[Any], Optional[str]]:
+    """Run ``query`` ordered by (sort key, id) and return (rows, next cursor).
+
+    ``query`` selects either ``model`` (rows are ORM objects) or columns
+    including ``id`` and the sort columns (rows are ``Row`` tuples). With
+    ``cursor`` the page starts right after the cursor position and ``skip``
+    is ignored; without it ``skip`` works as a plain offset.
+    """
+    column, descending = resolve_sort(sort, sort_columns)
+    id_column = model.id
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if column is id_column:
+            query = query.where(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            query = query.where(or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            query = query.where(or_(column > value, and_(column == value, id_column > last_id)))
+    elif skip:
+        query = query.offset(skip)
+
+    if column is id_column:
+        order_by = (id_column.desc() if descending else id_column.asc(),)
+    elif descending:
+        order_by = (column.desc(), id_column.desc())
+    else:
+        order_by = (column.asc(), id_column.asc())
+
+    result = await db.execute(query.order_by(*order_by).limit(limit))
+    rows = (result.scalars() if _selects_entity(query, model) else result).all()
+
+    next_cursor = None
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return rows, next_cursor
+
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -0,0 +1,209 @@
+"""Check that the hot queries are served by the indexes meant for them.
+
+Each entry of ``HOT_QUERIES`` is a query shaped like the one an endpoint
+runs, paired with the index it should use. ``check`` asks the database
+for the plan of each (``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN
+(FORMAT JSON)`` on Postgres) and reports the indexes it chose. On
+Postgres sequential scans are disabled for the check: on a small or
+empty table a full scan is the right plan, and what matters here is
+that the index can serve the query at all.
+
+    cd backend && python query_plans.py check
+
+exits with status 1 when some query does not use its index, so it can
+run in CI right after ``alembic upgrade head``.
+"""
+import argparse
+import re
+import sys
+from datetime import date, datetime
+from typing import Callable, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.engine import Connection
+
+import rollups
+import scheduling
+from models import (
+    Event, EventRollup, EventSeries, EventStatus, InventoryItem, Staff, StaffAssignment, StaffStatus,
+    StockAlert, StockMovement, VenueOccupancy,
+)
+
+
+class HotQuery(NamedTuple):
+    name: str
+    build: Callable[[], object]
+    # Any of these indexes satisfies the check (unique constraints get dialect-specific names)
+    indexes: Tuple[str, ...]
+
+
+_SAMPLE_TIME = datetime(2026, 6, 1, 18, 0)
+
+HOT_QUERIES = [
+    HotQuery(
+        "events_by_status",
+        lambda: select(Event).where(Event.status == EventStatus.CONFIRMED)
+        .order_by(Event.date, Event.id).limit(100),
+        ("ix_events_status_date",),
+    ),
+    HotQuery(
+        "events_page_by_date",
+        lambda: select(Event).order_by(Event.date, Event.id).limit(100),
+        ("ix_events_date_id",),
+    ),
+    HotQuery(
+        "events_page_by_start_time",
+        lambda: select(Event).order_by(Event.start_time, Event.id).limit(100),
+        ("ix_events_start_time_id",),
+    ),
+    HotQuery(
+        "venue_overlap",
+        lambda: select(Event.id).where(
+            *scheduling.overlap_conditions("Salón 1", _SAMPLE_TIME, _SAMPLE_TIME.replace(hour=23))
+        ).limit(1),
+        ("ix_events_venue_start_end",),
+    ),
+    HotQuery(
+        "calendar_events",
+        lambda: select(Event.id).where(
+            Event.start_time < datetime(2026, 7, 1),
+            Event.start_time > datetime(2026, 6, 1) - scheduling.MAX_EVENT_DURATION,
+            Event.end_time > datetime(2026, 6, 1),
+        ).order_by(Event.start_time, Event.id),
+        ("ix_events_start_time_id",),
+    ),
+    HotQuery(
+        "calendar_occupancy",
+        lambda: select(VenueOccupancy).where(
+            VenueOccupancy.day >= date(2026, 1, 1),
+            VenueOccupancy.day < date(2027, 1, 1),
+            VenueOccupancy.events_count != 0,
+        ),
+        ("ix_venue_occupancy_day",),
+    ),
+    HotQuery(
+        "venue_series",
+        lambda: select(EventSeries).where(
+            EventSeries.venue.in_(["Salón Principal"]),
+            EventSeries.start_time < datetime(2026, 6, 16),
+        ),
+        ("ix_event_series_venue_start",),
+    ),
+    HotQuery(
+        "client_has_events",
+        lambda: select(exists().where(Event.client_id == 1)),
+        ("ix_events_client_id",),
+    ),
+    HotQuery(
+        "staff_by_status",
+        lambda: select(Staff).where(Staff.status == StaffStatus.AVAILABLE).limit(100),
+        ("ix_staff_status",),
+    ),
+    HotQuery(
+        "event_staff",
+        lambda: select(StaffAssignment).where(StaffAssignment.event_id == 1),
+        ("uq_staff_assignments_event_staff", "sqlite_autoindex_staff_assignments_1"),
+    ),
+    HotQuery(
+        "staff_assignments",
+        lambda: select(StaffAssignment.event_id).where(StaffAssignment.staff_id == 1),
+        ("ix_staff_assignments_staff_event",),
+    ),
+    HotQuery(
+        "inventory_by_category",
+        lambda: select(InventoryItem).where(InventoryItem.category == "Vajilla")
+        .order_by(InventoryItem.id).limit(100),
+        ("ix_inventory_items_category_id",),
+    ),
+    HotQuery(
+        "inventory_low_stock",
+        lambda: select(InventoryItem).where(InventoryItem.current_stock <= InventoryItem.minimum_stock)
+        .order_by(InventoryItem.id).limit(100),
+        ("ix_inventory_items_low_stock",),
+    ),
+    HotQuery(
+        "item_movements",
+        lambda: select(StockMovement).where(StockMovement.item_id == 1)
+        .order_by(StockMovement.id.desc()).limit(100),
+        ("ix_stock_movements_item_id_id",),
+    ),
+    HotQuery(
+        "open_alert_of_item",
+        lambda: select(StockAlert.id).where(StockAlert.item_id == 1, StockAlert.resolved_at.is_(None)),
+        ("ix_stock_alerts_open_item_id",),
+    ),
+    HotQuery(
+        "analytics_summary",
+        lambda: select(EventRollup.period_start, EventRollup.events_count).where(
+            EventRollup.status == EventStatus.COMPLETED,
+            rollups.window_filter(date(2025, 6, 15), date(2026, 6, 15)),
+        ),
+        ("ix_event_rollups_status_period_start",),
+    ),
+]
+
+
+class PlanResult(NamedTuple):
+    name: str
+    expected: Tuple[str, ...]
+    used: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return any(index in self.used for index in self.expected)
+
+
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _postgres_indexes(node: dict) -> Iterable[str]:
+    if "Index Name" in node:
+        yield node["Index Name"]
+    for child in node.get("Plans", []):
+        yield from _postgres_indexes(child)
+
+
+def used_indexes(conn: Connection, statement) -> List[str]:
+    """Names of the indexes in the plan of ``statement``, in plan order"""
+    dialect = conn.dialect.name
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+        return [match.group(1) for row in rows for match in _SQLITE_INDEX.finditer(row[-1])]
+    if dialect == "postgresql":
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+        return list(_postgres_indexes(plan[0]["Plan"]))
+    raise ValueError(f"EXPLAIN check not supported on {dialect}")
+
+
+def check(conn: Connection, queries: Iterable[HotQuery] = HOT_QUERIES) -> List[PlanResult]:
+    results = []
+    for query in queries:
+        # One transaction per plan so SET LOCAL never leaks into the next one
+        with conn.begin():
+            results.append(PlanResult(query.name, query.indexes, used_indexes(conn, query.build())))
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Check the query plans of the hot queries")
+    parser.add_argument("command", choices=["check"])
+    parser.parse_args(argv)
+
+    from database import engine
+
+    with engine.connect() as conn:
+        results = check(conn)
+    width = max(len(result.name) for result in results)
+    for result in results:
+        mark = "ok  " if result.ok else "MISS"
+        print(f"{mark} {result.name:<{width}}  expected {result.expected[0]}, used {', '.join(result.used) or 'no index'}")
+    failed: Set[str] = {result.name for result in results if not result.ok}
+    if failed:
+        print(f"{len(failed)} queries do not use their index", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
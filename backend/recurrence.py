@@ -0,0 +1,140 @@
+"""Recurring event series, expanded lazily.
+
+A series (``models.EventSeries``) stores once the template of its events
+(client, name, type, venue, guests, budget, notes), the slot of the first
+one ([start_time, end_time)) and an RFC 5545 recurrence rule such as
+``FREQ=WEEKLY;BYDAY=TU;COUNT=20``. Its occurrences are never stored:
+``occurrences`` computes with dateutil the ones inside a window, minus
+the ``exdates`` of the series. An occurrence that is skipped, or turned
+into a real event to assign staff and stock to it, is added to
+``exdates``, so a slot is never counted both as an occurrence and as an
+event.
+
+``scheduling`` adds the occurrences of a venue's series to every overlap
+check, and the calendar merges them with the events of the window.
+"""
+import re
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterable, List, NamedTuple, Optional
+
+from dateutil.rrule import rrule, rrulestr
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import EventSeries
+
+# Sub-daily rules would book a venue more often than any event lasts
+ALLOWED_FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+# Occurrences of a finite rule, whether bounded by COUNT or by UNTIL
+MAX_COUNT = 1000
+MAX_INTERVAL = 365
+
+# Times are stored as naive UTC, so a UTC UNTIL is read without its "Z"
+_UTC_UNTIL = re.compile(r"(UNTIL=\d{8}(?:T\d{6})?)Z", re.IGNORECASE)
+
+
+class Occurrence(NamedTuple):
+    series_id: Optional[int]
+    venue: str
+    start_time: datetime
+    end_time: datetime
+
+
+def parse_rule(rule: str, start_time: datetime) -> rrule:
+    """The recurrence of ``rule`` from ``start_time``; ValueError with a message if not accepted"""
+    text = _UTC_UNTIL.sub(r"\1", rule.strip()).upper()
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    parts = dict(part.split("=", 1) for part in text.split(";") if "=" in part)
+    if parts.get("FREQ") not in ALLOWED_FREQUENCIES:
+        raise ValueError(f"FREQ debe ser uno de {', '.join(ALLOWED_FREQUENCIES)}")
+    if "COUNT" in parts and not (parts["COUNT"].isdigit() and 0 < int(parts["COUNT"]) <= MAX_COUNT):
+        raise ValueError(f"COUNT debe estar entre 1 y {MAX_COUNT}")
+    if "INTERVAL" in parts and not (parts["INTERVAL"].isdigit() and 0 < int(parts["INTERVAL"]) <= MAX_INTERVAL):
+        raise ValueError(f"INTERVAL debe estar entre 1 y {MAX_INTERVAL}")
+    try:
+        parsed = rrulestr(text, dtstart=start_time)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Regla de recurrencia inválida: {exc}") from exc
+    if not isinstance(parsed, rrule) or parsed.after(start_time, inc=True) is None:
+        raise ValueError("La regla de recurrencia no produce ninguna ocurrencia")
+    return parsed
+
+
+def is_finite(rule: str) -> bool:
+    return bool(re.search(r"\b(COUNT|UNTIL)=", rule, re.IGNORECASE))
+
+
+def last_start(rule: str, start_time: datetime) -> Optional[datetime]:
+    """Start of the last occurrence, or None for a rule without end; validates the rule either way"""
+    parsed = parse_rule(rule, start_time)
+    if not is_finite(rule):
+        return None
+    # A far UNTIL would otherwise be walked occurrence by occurrence
+    starts = list(islice(parsed, MAX_COUNT + 1))
+    if len(starts) > MAX_COUNT:
+        raise ValueError(f"La regla no puede producir más de {MAX_COUNT} ocurrencias")
+    return starts[-1] if starts else None
+
+
+def occurrences(series: EventSeries, window_start: datetime, window_end: datetime) -> List[Occurrence]:
+    """Occurrences of ``series`` overlapping [window_start, window_end), in order"""
+    duration = series.end_time - series.start_time
+    skipped = set(series.exdates or ())
+    return [
+        Occurrence(series.id, series.venue, start, start + duration)
+        for start in parse_rule(series.rrule, series.start_time).between(
+            window_start - duration, window_end, inc=True
+        )
+        if start + duration > window_start and start < window_end and start.isoformat() not in skipped
+    ]
+
+
+def is_occurrence(series: EventSeries, start_time: datetime) -> bool:
+    """True if the series has a (not skipped) occurrence starting at ``start_time``"""
+    starts = parse_rule(series.rrule, series.start_time).between(start_time, start_time, inc=True)
+    return bool(starts) and start_time.isoformat() not in (series.exdates or ())
+
+
+async def series_in_window(
+    db: AsyncSession,
+    window_start: datetime,
+    window_end: datetime,
+    venues: Optional[Iterable[str]] = None,
+    exclude_series_ids: Iterable[int] = (),
+) -> List[EventSeries]:
+    """Series that can have occurrences in the window, optionally only of ``venues``"""
+    query = select(EventSeries).where(
+        EventSeries.start_time < window_end,
+        or_(EventSeries.last_end.is_(None), EventSeries.last_end > window_start),
+    )
+    if venues is not None:
+        query = query.where(EventSeries.venue.in_(set(venues)))
+    exclude_series_ids = list(exclude_series_ids)
+    if exclude_series_ids:
+        query = query.where(EventSeries.id.notin_(exclude_series_ids))
+    return list((await db.scalars(query.order_by(EventSeries.id))).all())
+
+
+async def occurrences_in_window(
+    db: AsyncSession,
+    window_start: datetime,
+    window_end: datetime,
+    venues: Optional[Iterable[str]] = None,
+    exclude_series_ids: Iterable[int] = (),
+) -> List[Occurrence]:
+    """Occurrences of every series in the window, with one query for the series"""
+    return [
+        occurrence
+        for series in await series_in_window(db, window_start, window_end, venues, exclude_series_ids)
+        for occurrence in occurrences(series, window_start, window_end)
+    ]
+
+
+def self_overlap(starts: List[datetime], duration: timedelta) -> Optional[datetime]:
+    """First occurrence starting before the previous one ends, if any"""
+    for previous, start in zip(starts, starts[1:]):
+        if start < previous + duration:
+            return start
+    return None
@@ -0,0 +1,243 @@
+"""Incrementally maintained analytics rollups for events.
+
+Every event contributes to one daily and one monthly bucket keyed by
+(period, period_start, event_type, status). The event routers apply
+deltas to those buckets in the same transaction as the write, so the
+analytics endpoints can read the small rollup table instead of scanning
+``events``.
+
+Full rebuild (e.g. after a bulk load or to repair drift):
+
+    python rollups.py rebuild
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, false, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Event, EventRollup, EventStatus
+
+DAY = "day"
+MONTH = "month"
+
+
+class EventContribution(NamedTuple):
+    """The part of an event that the rollups aggregate"""
+    day: date
+    event_type: str
+    status: EventStatus
+    budget: float
+
+
+def contribution(event: Event) -> EventContribution:
+    """Snapshot the rollup-relevant fields of an event"""
+    return EventContribution(
+        day=event.date.date(),
+        event_type=event.event_type,
+        status=event.status or EventStatus.PLANNING,
+        budget=event.budget or 0.0,
+    )
+
+
+async def _upsert_bucket(db: AsyncSession, period: str, period_start: date, event_type: str,
+                         status: EventStatus, count: int, budget: float):
+    """Add ``count`` and ``budget`` to a bucket, creating it if missing"""
+    dialect = db.bind.dialect.name
+    values = {
+        "period": period,
+        "period_start": period_start,
+        "event_type": event_type,
+        "status": status,
+        "events_count": count,
+        "budget_total": budget,
+    }
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(EventRollup).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["period", "period_start", "event_type", "status"],
+            set_={
+                "events_count": EventRollup.events_count + stmt.excluded.events_count,
+                "budget_total": EventRollup.budget_total + stmt.excluded.budget_total,
+            },
+        )
+        await db.execute(stmt)
+        return
+
+    result = await db.execute(
+        update(EventRollup)
+        .where(
+            EventRollup.period == period,
+            EventRollup.period_start == period_start,
+            EventRollup.event_type == event_type,
+            EventRollup.status == status,
+        )
+        .values(
+            events_count=EventRollup.events_count + count,
+            budget_total=EventRollup.budget_total + budget,
+        )
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(EventRollup).values(**values))
+
+
+async def apply(db: AsyncSession, item: EventContribution, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) an event from its day and month buckets"""
+    month_start = item.day.replace(day=1)
+    for period, period_start in ((DAY, item.day), (MONTH, month_start)):
+        await _upsert_bucket(
+            db, period, period_start, item.event_type, item.status,
+            sign, sign * item.budget,
+        )
+
+
+async def record_event_created(db: AsyncSession, event: Event):
+    await apply(db, contribution(event), 1)
+
+
+async def record_events_created(db: AsyncSession, items: Iterable[EventContribution]):
+    """Apply many new events at once, one upsert per touched bucket"""
+    buckets = {}
+    for item in items:
+        for key in ((DAY, item.day), (MONTH, item.day.replace(day=1))):
+            bucket = buckets.setdefault(key + (item.event_type, item.status), [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += item.budget
+    for (period, period_start, event_type, event_status), (count, budget) in buckets.items():
+        await _upsert_bucket(db, period, period_start, event_type, event_status, count, budget)
+
+
+async def record_event_deleted(db: AsyncSession, event: Event):
+    await apply(db, contribution(event), -1)
+
+
+async def record_event_updated(db: AsyncSession, before: EventContribution, event: Event):
+    after = contribution(event)
+    if after == before:
+        return
+    await apply(db, before, -1)
+    await apply(db, after, 1)
+
+
+def _next_month(day: date) -> date:
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def window_filter(start_day: date, end_day: date):
+    """Filter selecting the buckets that exactly cover [start_day, end_day].
+
+    Whole months inside the window are read from monthly buckets and the
+    partial months at either edge from daily buckets, so the number of rows
+    read stays small regardless of the window length.
+    """
+    if end_day < start_day:
+        return false()
+
+    first_full_month = start_day if start_day.day == 1 else _next_month(start_day)
+    if (end_day + timedelta(days=1)).day == 1:
+        after_last_full_month = _next_month(end_day)
+    else:
+        after_last_full_month = end_day.replace(day=1)
+
+    if first_full_month >= after_last_full_month:
+        return and_(
+            EventRollup.period == DAY,
+            EventRollup.period_start >= start_day,
+            EventRollup.period_start <= end_day,
+        )
+
+    return or_(
+        and_(
+            EventRollup.period == MONTH,
+            EventRollup.period_start >= first_full_month,
+            EventRollup.period_start < after_last_full_month,
+        ),
+        and_(
+            EventRollup.period == DAY,
+            EventRollup.period_start >= start_day,
+            EventRollup.period_start < first_full_month,
+        ),
+        and_(
+            EventRollup.period == DAY,
+            EventRollup.period_start >= after_last_full_month,
+            EventRollup.period_start <= end_day,
+        ),
+    )
+
+
+async def rebuild(db: AsyncSession, batch_size: int = 5000) -> int:
+    """Recompute every bucket from the events table; returns the number of buckets"""
+    year_col = func.extract("year", Event.date)
+    month_col = func.extract("month", Event.date)
+    day_col = func.extract("day", Event.date)
+    daily = (await db.execute(
+        select(
+            year_col,
+            month_col,
+            day_col,
+            Event.event_type,
+            Event.status,
+            func.count(Event.id),
+            func.sum(Event.budget),
+        ).group_by(year_col, month_col, day_col, Event.event_type, Event.status)
+    )).all()
+
+    buckets = {}
+    for year, month, day, event_type, event_status, count, budget in daily:
+        day_start = date(int(year), int(month), int(day))
+        event_status = event_status or EventStatus.PLANNING
+        for key in ((DAY, day_start), (MONTH, day_start.replace(day=1))):
+            bucket = buckets.setdefault(key + (event_type, event_status), [0, 0.0])
+            bucket[0] += count
+            bucket[1] += budget or 0.0
+
+    await db.execute(delete(EventRollup))
+    rows = [
+        {
+            "period": period,
+            "period_start": period_start,
+            "event_type": event_type,
+            "status": event_status,
+            "events_count": count,
+            "budget_total": budget,
+        }
+        for (period, period_start, event_type, event_status), (count, budget) in buckets.items()
+    ]
+    for offset in range(0, len(rows), batch_size):
+        await db.execute(insert(EventRollup), rows[offset:offset + batch_size])
+    await db.commit()
+    return len(rows)
+
+
+async def _run(command: str):
+    import cache
+    from database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        if command == "rebuild":
+            buckets = await rebuild(db)
+            print(f"Rebuilt {buckets} rollup buckets")
+    # Cached analytics responses were built from the old buckets
+    await cache.init_cache()
+    await cache.invalidate("analytics")
+    await cache.close_cache()
+    await async_engine.dispose()
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Manage analytics rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    main()
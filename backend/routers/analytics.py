@@ -1,55 +1,73 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from sqlalchemy import func
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
 
-from database import get_db
-from models import Event, EventStatus
+import cache
+import rollups
+from database import get_async_db
+from models import EventRollup, EventStatus
 from schemas import AnalyticsResponse, RevenueData, EventTypeStats
 
 router = APIRouter()
 
 @router.get("/summary", response_model=AnalyticsResponse)
 async def get_analytics_summary(
+    request: Request,
     start_date: datetime = None,
     end_date: datetime = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get summary analytics data for the business"""
+    entry = await cache.lookup(request, "analytics")
+    if entry.response:
+        return entry.response
+    
     # Default to last 12 months if no dates specified
     if not end_date:
         end_date = datetime.utcnow()
     if not start_date:
         start_date = end_date - timedelta(days=365)
     
-    # Query for completed events within date range
-    events_query = db.query(Event).filter(
-        Event.status == EventStatus.COMPLETED,
-        Event.date >= start_date,
-        Event.date <= end_date
-    )
+    # Read completed-event buckets from the rollup table; full months come
+    # from monthly buckets and the partial months at the edges from daily ones
+    buckets = (await db.execute(select(
+        EventRollup.period_start,
+        EventRollup.event_type,
+        EventRollup.events_count,
+        EventRollup.budget_total
+    ).where(
+        EventRollup.status == EventStatus.COMPLETED,
+        EventRollup.events_count != 0,
+        rollups.window_filter(start_date.date(), end_date.date())
+    ))).all()
+    
+    totals_by_month = {}
+    totals_by_type = {}
+    for period_start, event_type, count, revenue in buckets:
+        for totals, key in (
+            (totals_by_month, (period_start.year, period_start.month)),
+            (totals_by_type, event_type),
+        ):
+            current_count, current_revenue = totals.get(key, (0, 0))
+            totals[key] = (current_count + count, current_revenue + revenue)
     
     # Count total events and revenue
-    total_events = events_query.count()
-    total_revenue = db.query(func.sum(Event.budget)).scalar() or 0
+    total_events = sum(count for count, _ in totals_by_month.values())
+    total_revenue = await db.scalar(select(func.sum(EventRollup.budget_total)).where(
+        EventRollup.period == rollups.MONTH
+    )) or 0
     
-    # Calculate monthly revenue
+    # Fill every month of the window, including months without events
     monthly_revenue = []
     current_date = start_date
     while current_date <= end_date:
-        month_end = datetime(current_date.year, current_date.month, 1) + timedelta(days=32)
-        month_end = datetime(month_end.year, month_end.month, 1) - timedelta(days=1)
-        
-        month_events = events_query.filter(
-            func.extract('year', Event.date) == current_date.year,
-            func.extract('month', Event.date) == current_date.month
+        month_count, month_revenue = totals_by_month.get(
+            (current_date.year, current_date.month), (0, 0)
         )
         
-        month_count = month_events.count()
-        month_revenue = sum(event.budget for event in month_events)
-        
         month_name = current_date.strftime("%B %Y")
         monthly_revenue.append(
             RevenueData(
@@ -66,18 +84,8 @@ async def get_analytics_summary(
             current_date = datetime(current_date.year, current_date.month + 1, 1)
     
     # Calculate event type statistics
-    event_types = db.query(
-        Event.event_type,
-        func.count(Event.id),
-        func.sum(Event.budget)
-    ).filter(
-        Event.status == EventStatus.COMPLETED,
-        Event.date >= start_date,
-        Event.date <= end_date
-    ).group_by(Event.event_type).all()
-    
     event_type_stats = []
-    for event_type, count, revenue in event_types:
+    for event_type, (count, revenue) in totals_by_type.items():
         percentage = (count / total_events) * 100 if total_events > 0 else 0
         event_type_stats.append(
             EventTypeStats(
@@ -92,10 +100,10 @@ async def get_analytics_summary(
     # For now, using a dummy value
     average_satisfaction = 4.5
     
-    return AnalyticsResponse(
+    return await cache.store(entry, AnalyticsResponse, AnalyticsResponse(
         monthly_revenue=monthly_revenue,
         event_types=event_type_stats,
         total_events=total_events,
         total_revenue=total_revenue,
         average_satisfaction=average_satisfaction
-    )
+    ))
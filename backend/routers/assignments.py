@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+import cache
+import occupancy
+import staffing
+from database import get_async_db
+from models import Event, EventStatus, Staff, StaffAssignment, StaffStatus
+from schemas import (
+    AutoAssignRequest, AutoAssignResponse, StaffAssignmentCreate, StaffAssignmentResponse
+)
+
+router = APIRouter()
+
+async def _get_active_event(db: AsyncSession, event_id: int) -> Event:
+    event = await db.get(Event, event_id)
+    if not event:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento no encontrado"
+        )
+    if event.status in (EventStatus.CANCELLED, EventStatus.COMPLETED):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se puede asignar personal a un evento cancelado o completado"
+        )
+    return event
+
+@router.get("/{event_id}/staff", response_model=List[StaffAssignmentResponse])
+async def get_event_assignments(event_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obtener el personal asignado a un evento"""
+    assignments = await db.scalars(
+        select(StaffAssignment)
+        .where(StaffAssignment.event_id == event_id)
+        .order_by(StaffAssignment.id)
+    )
+    return assignments.all()
+
+@router.post("/{event_id}/staff", response_model=List[StaffAssignmentResponse])
+async def assign_staff(
+    event_id: int,
+    assignment: StaffAssignmentCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Asignar miembros concretos del personal a un evento"""
+    event = await _get_active_event(db, event_id)
+    staff_ids = list(dict.fromkeys(assignment.staff_ids))
+    
+    await staffing.lock_assignments(db)
+    statuses = dict((await db.execute(
+        select(Staff.id, Staff.status).where(Staff.id.in_(staff_ids))
+    )).all())
+    missing = [staff_id for staff_id in staff_ids if staff_id not in statuses]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Personal no encontrado: {missing}"
+        )
+    
+    unavailable = [staff_id for staff_id in staff_ids if statuses[staff_id] != StaffStatus.AVAILABLE]
+    if unavailable:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Personal no disponible: {unavailable}"
+        )
+    
+    busy = await staffing.busy_staff_ids(db, event, staff_ids)
+    if busy:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Personal ya asignado en ese horario: {sorted(busy)}"
+        )
+    
+    assignments = await staffing.create_assignments(db, event_id, staff_ids, assignment.notes)
+    await occupancy.record_staff_changed(db, event, len(assignments))
+    await db.commit()
+    await cache.invalidate("assignments")
+    return assignments
+
+@router.post("/{event_id}/staff/auto", response_model=AutoAssignResponse)
+async def auto_assign_staff(
+    event_id: int,
+    options: AutoAssignRequest = AutoAssignRequest(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Elegir y asignar el mejor personal disponible para un evento, por rol"""
+    event = await _get_active_event(db, event_id)
+    requested = options.roles if options.roles is not None else staffing.required_staff(event.guests_count)
+    
+    await staffing.lock_assignments(db)
+    already_assigned = await staffing.assigned_by_role(db, event_id)
+    needed = {
+        role: count - already_assigned.get(role, 0)
+        for role, count in requested.items()
+        if count > already_assigned.get(role, 0)
+    }
+    picked = await staffing.pick_staff(
+        db, event, needed, strategy=options.strategy, min_rating=options.min_rating
+    )
+    
+    assignments = []
+    if not options.dry_run:
+        staff_ids = [staff_id for role_ids in picked.values() for staff_id in role_ids]
+        assignments = await staffing.create_assignments(
+            db, event_id, staff_ids, notes="Asignado automáticamente"
+        )
+        await occupancy.record_staff_changed(db, event, len(assignments))
+        await db.commit()
+        await cache.invalidate("assignments")
+    
+    return AutoAssignResponse(
+        event_id=event_id,
+        requested=requested,
+        already_assigned=already_assigned,
+        assigned=picked,
+        missing={
+            role: count - len(picked.get(role, []))
+            for role, count in needed.items()
+            if count > len(picked.get(role, []))
+        },
+        assignments=assignments,
+    )
+
+@router.delete("/{event_id}/staff/{staff_id}")
+async def unassign_staff(event_id: int, staff_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Quitar a un miembro del personal de un evento"""
+    result = await db.execute(
+        delete(StaffAssignment).where(
+            StaffAssignment.event_id == event_id,
+            StaffAssignment.staff_id == staff_id
+        )
+    )
+    if not result.rowcount:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asignación no encontrada"
+        )
+    event = await db.get(Event, event_id)
+    if event:
+        await occupancy.record_staff_changed(db, event, -1)
+    await db.commit()
+    await cache.invalidate("assignments")
+    return {"message": "Personal desasignado exitosamente"}
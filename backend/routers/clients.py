@@ -1,41 +1,101 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 
-from database import get_db
-from models import Client
-from schemas import ClientCreate, ClientResponse
+import cache
+import changefeed
+import etags
+import exports
+import fastjson
+import includes
+from database import get_async_db
+from pagination import paginate, next_cursor_headers
+from models import Client, Event, EventSeries
+from schemas import ClientCreate, ClientDetailResponse, ClientResponse
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ClientResponse])
+# Columns accepted by the `sort` parameter of the list endpoint
+CLIENT_SORT_COLUMNS = {
+    "id": Client.id,
+    "name": Client.name,
+    "email": Client.email,
+}
+
+# Relationships accepted by the `include` parameter
+CLIENT_INCLUDES = {
+    "events": includes.Relation(selectinload(Client.events), "events"),
+}
+
+# Columns of ClientResponse, for the list without relationships
+CLIENT_ROWS = fastjson.RowEncoder(Client, ClientResponse)
+
+@router.get("/", response_model=List[ClientDetailResponse], response_model_exclude_unset=True)
 async def get_clients(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get a list of all clients"""
-    clients = db.query(Client).offset(skip).limit(limit).all()
-    return clients
+    """Get a list of all clients, optionally with their events (`include=events`)"""
+    options, include_tags = includes.parse_include(include, CLIENT_INCLUDES)
+    entry = await cache.lookup(request, "clients", *include_tags)
+    if entry.response:
+        return entry.response
+    
+    # Without relationships the page is encoded from plain columns
+    fast = fastjson.ENABLED and not options
+    clients, next_cursor = await paginate(
+        db, CLIENT_ROWS.select() if fast else select(Client).options(*options), Client, CLIENT_SORT_COLUMNS,
+        sort=sort, cursor=cursor, skip=skip, limit=limit
+    )
+    return await cache.store(
+        entry, List[ClientDetailResponse], clients if fast else includes.loaded(clients), next_cursor_headers(next_cursor),
+        etag=None if options else etags.list_etag(clients, next_cursor), exclude_unset=True,
+        encoder=CLIENT_ROWS.dump if fast else None
+    )
+
+@router.get("/export")
+async def export_clients(format: str = "csv"):
+    """Stream every client as CSV or NDJSON with constant memory"""
+    return exports.export_response(select(*exports.table_columns(Client)).order_by(Client.id), format, "clients")
 
-@router.get("/{client_id}", response_model=ClientResponse)
-async def get_client(client_id: int, db: Session = Depends(get_db)):
-    """Get a specific client by ID"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+@router.get("/{client_id}", response_model=ClientDetailResponse, response_model_exclude_unset=True)
+async def get_client(
+    client_id: int,
+    request: Request,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific client by ID, optionally with their events"""
+    options, include_tags = includes.parse_include(include, CLIENT_INCLUDES)
+    entry = await cache.lookup(request, f"clients:{client_id}", *include_tags)
+    if entry.response:
+        return entry.response
+    
+    client = await db.get(Client, client_id, options=options)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
-    return client
+    return await cache.store(
+        entry, ClientDetailResponse, includes.loaded(client),
+        etag=None if options else etags.resource_etag(client), exclude_unset=True
+    )
 
 @router.post("/", response_model=ClientResponse)
-async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
+async def create_client(client: ClientCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Create a new client"""
     # Check if client with the same email already exists
-    existing_client = db.query(Client).filter(Client.email == client.email).first()
-    if existing_client:
+    email_taken = await db.scalar(select(exists().where(Client.email == client.email)))
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -43,28 +103,34 @@ async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
     
     db_client = Client(**client.dict())
     db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+    await db.commit()
+    await cache.invalidate("clients")
+    await changefeed.publish("clients", "created", db_client.id)
+    await db.refresh(db_client)
+    etags.set_etag(response, db_client)
     return db_client
 
 @router.put("/{client_id}", response_model=ClientResponse)
 async def update_client(
     client_id: int,
     client_data: ClientCreate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing client"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = await db.get(Client, client_id, with_for_update=True)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
+    etags.check_if_match(request, client)
     
     # Check if updated email conflicts with another client
     if client_data.email != client.email:
-        existing_client = db.query(Client).filter(Client.email == client_data.email).first()
-        if existing_client:
+        email_taken = await db.scalar(select(exists().where(Client.email == client_data.email)))
+        if email_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -73,27 +139,36 @@ async def update_client(
     for key, value in client_data.dict().items():
         setattr(client, key, value)
     
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await cache.invalidate("clients", f"clients:{client_id}")
+    await changefeed.publish("clients", "updated", client_id)
+    await db.refresh(client)
+    etags.set_etag(response, client)
     return client
 
 @router.delete("/{client_id}")
-async def delete_client(client_id: int, db: Session = Depends(get_db)):
+async def delete_client(client_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Delete a client"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = await db.get(Client, client_id, with_for_update=True)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
+    etags.check_if_match(request, client)
     
-    # Check if client has associated events before deletion
-    if client.events:
+    # Check if client has associated events before deletion, recurring series included
+    has_events = await db.scalar(select(exists().where(Event.client_id == client_id)))
+    if not has_events:
+        has_events = await db.scalar(select(exists().where(EventSeries.client_id == client_id)))
+    if has_events:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete client with associated events"
         )
     
-    db.delete(client)
-    db.commit()
+    await db.delete(client)
+    await db.commit()
+    await cache.invalidate("clients", f"clients:{client_id}")
+    await changefeed.publish("clients", "deleted", client_id)
     return {"message": "Client deleted successfully"}
@@ -1,126 +1,554 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
+import os
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
-
-from database import get_db
-from models import Event, Client, EventStatus
-from schemas import EventCreate, EventResponse, EventUpdate
+import availability
+import batch
+import cache
+import changefeed
+import etags
+import exports
+import fastjson
+import includes
+import occupancy
+import recurrence
+import rollups
+import scheduling
+import stock
+from database import get_async_db
+from pagination import paginate, next_cursor_headers
+from models import Event, Client, EventStatus, StaffAssignment
+from schemas import (
+    AvailabilityBatchRequest, CalendarEvent, CalendarResponse, EventAvailability, EventCreate, EventDay,
+    EventDetailResponse, EventImportResponse, EventImportResult, EventResponse, EventUpdate
+)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[EventResponse])
+# Columns accepted by the `sort` parameter of the list endpoint
+EVENT_SORT_COLUMNS = {
+    "id": Event.id,
+    "name": Event.name,
+    "date": Event.date,
+    "start_time": Event.start_time,
+}
+
+# Relaciones aceptadas por el parámetro `include`
+EVENT_INCLUDES = {
+    "client": includes.Relation(joinedload(Event.client), "clients"),
+    "staff_assignments": includes.Relation(selectinload(Event.staff_assignments), "assignments"),
+}
+
+# Columnas de EventResponse para la lista sin relaciones
+EVENT_ROWS = fastjson.RowEncoder(Event, EventResponse)
+
+VENUE_UNAVAILABLE = scheduling.VENUE_UNAVAILABLE
+
+# Límites de la importación masiva
+BULK_IMPORT_MAX_ROWS = int(os.getenv("EVENT_BULK_IMPORT_MAX_ROWS", "20000"))
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Reservas por llamada a la verificación de disponibilidad en lote
+AVAILABILITY_BATCH_MAX = 500
+
+# Días por consulta del calendario (una vista anual)
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "366"))
+
+# Columnas de CalendarEvent
+CALENDAR_COLUMNS = [getattr(Event, field) for field in CalendarEvent.model_fields]
+
+async def _ensure_venue_available(
+    db: AsyncSession,
+    venue: str,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_event_id: int = None
+):
+    """Validar el horario y que no se solape con otra reserva del venue"""
+    error = scheduling.validate_time_range(start_time, end_time)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    
+    conflict = await scheduling.find_venue_conflict(
+        db, venue, start_time, end_time, exclude_event_id=exclude_event_id
+    )
+    if conflict:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=VENUE_UNAVAILABLE
+        )
+
+@router.get("/", response_model=List[EventDetailResponse], response_model_exclude_unset=True)
 async def get_events(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    status_filter: str = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    status_filter: Optional[EventStatus] = None,
+    date_from: Optional[EventDay] = None,
+    date_to: Optional[EventDay] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Obtener lista de eventos con filtros opcionales"""
-    query = db.query(Event)
+    """Obtener lista de eventos con filtros opcionales y relaciones (`include=client,staff_assignments`)"""
+    options, include_tags = includes.parse_include(include, EVENT_INCLUDES)
+    entry = await cache.lookup(request, "events", *include_tags)
+    if entry.response:
+        return entry.response
     
+    # Sin relaciones la página se codifica directamente desde las columnas
+    fast = fastjson.ENABLED and not options
+    query = EVENT_ROWS.select() if fast else select(Event).options(*options)
+    query = _filter_events(query, status_filter, date_from, date_to)
+    
+    events, next_cursor = await paginate(
+        db, query, Event, EVENT_SORT_COLUMNS,
+        sort=sort, cursor=cursor, skip=skip, limit=limit
+    )
+    # Con relaciones incluidas el ETag sale del cuerpo, que también cambia con ellas
+    return await cache.store(
+        entry, List[EventDetailResponse], events if fast else includes.loaded(events), next_cursor_headers(next_cursor),
+        etag=None if options else etags.list_etag(events, next_cursor), exclude_unset=True,
+        encoder=EVENT_ROWS.dump if fast else None
+    )
+
+def _filter_events(query, status_filter: Optional[EventStatus], date_from: Optional[datetime], date_to: Optional[datetime]):
+    """Filtros comunes a la lista y a la exportación; el rango de fechas es [date_from, date_to)"""
     if status_filter:
-        query = query.filter(Event.status == status_filter)
+        query = query.where(Event.status == status_filter)
+    if date_from:
+        query = query.where(Event.date >= date_from)
+    if date_to:
+        query = query.where(Event.date < date_to)
+    return query
+
+@router.get("/export")
+async def export_events(
+    format: str = "csv",
+    status_filter: Optional[EventStatus] = None,
+    date_from: Optional[EventDay] = None,
+    date_to: Optional[EventDay] = None,
+):
+    """Exportar todos los eventos filtrados como CSV o NDJSON, en streaming y con memoria constante"""
+    query = select(*exports.table_columns(Event)).order_by(Event.id)
+    return exports.export_response(_filter_events(query, status_filter, date_from, date_to), format, "events")
+
+def _parse_import_body(body: bytes, content_type: str) -> List[dict]:
+    """Convertir el cuerpo (JSON, NDJSON o CSV) en una lista de filas"""
+    text = body.decode("utf-8-sig")
+    media_type = content_type.split(";")[0].strip().lower()
+    
+    if media_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    
+    if media_type in ("text/csv", "application/csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        # Las celdas vacías se omiten para que apliquen los valores por defecto
+        return [
+            {key: value for key, value in row.items() if key and value not in ("", None)}
+            for row in reader
+        ]
+    
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Se esperaba un arreglo JSON de eventos")
+    return rows
+
+@router.get("/calendar", response_model=CalendarResponse)
+async def get_calendar(
+    request: Request,
+    start_day: date = Query(alias="from"),
+    end_day: date = Query(alias="to"),
+    venue: Optional[str] = None,
+    include_events: bool = True,
+    include_cancelled: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Eventos agrupados por día y ocupación de cada venue en [from, to), para las vistas de mes y año"""
+    if end_day <= start_day:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha final debe ser posterior a la inicial"
+        )
+    if (end_day - start_day).days > CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El calendario abarca como máximo {CALENDAR_MAX_DAYS} días por consulta"
+        )
+    entry = await cache.lookup(request, "events", "assignments", "series")
+    if entry.response:
+        return entry.response
+    
+    # Se arma con dicts y filas: un año de todos los venues son miles de objetos
+    days = {
+        start_day + timedelta(days=offset): {
+            "date": start_day + timedelta(days=offset), "events": [], "venues": [], "staff_count": 0
+        }
+        for offset in range((end_day - start_day).days)
+    }
+    window_start = datetime.combine(start_day, datetime.min.time())
+    window_end = datetime.combine(end_day, datetime.min.time())
+    # Las ocurrencias de las series no se guardan: se calculan para la ventana
+    occurrences = [
+        (series, occurrence)
+        for series in await recurrence.series_in_window(
+            db, window_start, window_end, None if venue is None else [venue]
+        )
+        for occurrence in recurrence.occurrences(series, window_start, window_end)
+    ]
+    if include_events:
+        # Rango acotado sobre start_time, como la verificación de solapamiento:
+        # ningún evento dura más que MAX_EVENT_DURATION
+        query = select(*CALENDAR_COLUMNS).where(
+            Event.start_time < window_end,
+            Event.start_time > window_start - scheduling.MAX_EVENT_DURATION,
+            Event.end_time > window_start,
+        )
+        if venue is not None:
+            query = query.where(Event.venue == venue)
+        if not include_cancelled:
+            query = query.where(Event.status != EventStatus.CANCELLED)
+        events = [row._asdict() for row in await db.execute(query.order_by(Event.start_time, Event.id))]
+        if occurrences:
+            events.extend(
+                {
+                    "id": None,
+                    "name": series.name,
+                    "client_id": series.client_id,
+                    "event_type": series.event_type,
+                    "venue": occurrence.venue,
+                    "start_time": occurrence.start_time,
+                    "end_time": occurrence.end_time,
+                    "guests_count": series.guests_count,
+                    "status": EventStatus.PLANNING,
+                    "series_id": series.id,
+                }
+                for series, occurrence in occurrences
+            )
+            events.sort(key=lambda event: event["start_time"])
+        for event in events:
+            for day, _ in occupancy.split_days(event["start_time"], event["end_time"]):
+                if day in days:
+                    days[day]["events"].append(event)
+    
+    for day, venues in (await occupancy.read_days(db, start_day, end_day, venue)).items():
+        days[day]["venues"] = venues
+        days[day]["staff_count"] = sum(venue_day["staff_count"] for venue_day in venues)
+    # La tabla de ocupación solo cuenta eventos; se suman las ocurrencias de cada día
+    for _, occurrence in occurrences:
+        for day, minutes in occupancy.split_days(occurrence.start_time, occurrence.end_time):
+            if day not in days:
+                continue
+            venues = days[day]["venues"]
+            venue_day = next((item for item in venues if item["venue"] == occurrence.venue), None)
+            if venue_day is None:
+                venue_day = {"venue": occurrence.venue, "events_count": 0, "booked_minutes": 0, "staff_count": 0}
+                venues.append(venue_day)
+                venues.sort(key=lambda item: item["venue"])
+            venue_day["events_count"] += 1
+            venue_day["booked_minutes"] += minutes
+    
+    return await cache.store(
+        entry, CalendarResponse, {"date_from": start_day, "date_to": end_day, "days": list(days.values())},
+        encoder=fastjson.dumps if fastjson.ENABLED else None
+    )
+
+@router.post("/bulk", response_model=EventImportResponse)
+async def import_events(
+    request: Request,
+    all_or_nothing: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Importar eventos en lote desde un arreglo JSON, NDJSON o CSV"""
+    try:
+        raw_rows = _parse_import_body(
+            await request.body(), request.headers.get("content-type", "application/json")
+        )
+    except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No se pudo leer el archivo de importación: {exc}"
+        )
+    
+    if len(raw_rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La importación admite como máximo {BULK_IMPORT_MAX_ROWS} eventos"
+        )
+    
+    results = [EventImportResult(index=index, status="error") for index in range(len(raw_rows))]
+    candidates = {}
+    
+    # Validar cada fila de forma independiente
+    for index, raw in enumerate(raw_rows):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("Cada fila debe ser un objeto")
+            event = EventCreate.model_validate(raw)
+        except ValidationError as exc:
+            results[index].error = batch.format_validation_error(exc)
+            continue
+        except ValueError as exc:
+            results[index].error = str(exc)
+            continue
     
-    events = query.offset(skip).limit(limit).all()
-    return events
+        error = scheduling.validate_time_range(event.start_time, event.end_time)
+        if error:
+            results[index].error = error
+            continue
+        candidates[index] = event
+    
+    # Resolver todos los clientes con una sola consulta
+    client_ids = {event.client_id for event in candidates.values()}
+    existing_clients = set()
+    if client_ids:
+        existing_clients = set((await db.scalars(
+            select(Client.id).where(Client.id.in_(client_ids))
+        )).all())
+    for index, event in list(candidates.items()):
+        if event.client_id not in existing_clients:
+            results[index].error = "Cliente no encontrado"
+            del candidates[index]
+    
+    # Verificar solapamientos contra la base de datos y dentro del lote
+    if candidates:
+        existing = await scheduling.load_venue_timeline(
+            db,
+            {event.venue for event in candidates.values()},
+            min(event.start_time for event in candidates.values()),
+            max(event.end_time for event in candidates.values()),
+        )
+        accepted = scheduling.VenueTimeline()
+        ordered = sorted(candidates.items(), key=lambda item: (item[1].venue, item[1].start_time, item[0]))
+        for index, event in ordered:
+            if existing.overlaps(event.venue, event.start_time, event.end_time):
+                results[index].error = VENUE_UNAVAILABLE
+            elif accepted.overlaps(event.venue, event.start_time, event.end_time):
+                results[index].error = f"{VENUE_UNAVAILABLE} (se solapa con otra fila del lote)"
+            else:
+                accepted.add(event.venue, event.start_time, event.end_time)
+                continue
+            del candidates[index]
+    
+    failed = len(raw_rows) - len(candidates)
+    if all_or_nothing and failed:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[result.model_dump() for result in results if result.error]
+        )
+    
+    # Insertar en bloques con executemany, conservando el orden para mapear los IDs
+    indexes = sorted(candidates)
+    rows = [candidates[index].model_dump() for index in indexes]
+    async with scheduling.booking_writes(db):
+        statement = insert(Event).returning(Event.id, sort_by_parameter_order=True)
+        for offset in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            batch_ids = (await db.scalars(statement, rows[offset:offset + BULK_INSERT_BATCH_SIZE])).all()
+            for index, event_id in zip(indexes[offset:offset + BULK_INSERT_BATCH_SIZE], batch_ids):
+                results[index].status = "created"
+                results[index].id = event_id
+    
+        await rollups.record_events_created(db, (
+            rollups.EventContribution(
+                day=event.date.date(),
+                event_type=event.event_type,
+                status=EventStatus.PLANNING,
+                budget=event.budget,
+            )
+            for event in candidates.values()
+        ))
+        await occupancy.record_events_created(db, (
+            occupancy.Booking(event.venue, event.start_time, event.end_time, active=True)
+            for event in candidates.values()
+        ))
+    await cache.invalidate("events", "analytics")
+    if candidates:
+        await changefeed.publish("events", "created", *(result.id for result in results if result.id))
+    
+    return EventImportResponse(created=len(candidates), failed=failed, results=results)
 
-@router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: int, db: Session = Depends(get_db)):
-    """Obtener evento específico por ID"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+@router.get("/{event_id}", response_model=EventDetailResponse, response_model_exclude_unset=True)
+async def get_event(
+    event_id: int,
+    request: Request,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener evento específico por ID, con relaciones opcionales"""
+    options, include_tags = includes.parse_include(include, EVENT_INCLUDES)
+    entry = await cache.lookup(request, f"events:{event_id}", *include_tags)
+    if entry.response:
+        return entry.response
+    
+    event = await db.get(Event, event_id, options=options)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento no encontrado"
         )
-    return event
+    return await cache.store(
+        entry, EventDetailResponse, includes.loaded(event),
+        etag=None if options else etags.resource_etag(event), exclude_unset=True
+    )
 
 @router.post("/", response_model=EventResponse)
-async def create_event(event: EventCreate, db: Session = Depends(get_db)):
+async def create_event(event: EventCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Crear nuevo evento"""
     # Verificar que el cliente existe
-    client = db.query(Client).filter(Client.id == event.client_id).first()
+    client = await db.get(Client, event.client_id)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cliente no encontrado"
         )
     
-    # Verificar disponibilidad del venue en la fecha
-    existing_event = db.query(Event).filter(
-        Event.venue == event.venue,
-        Event.date == event.date,
-        Event.status != EventStatus.CANCELLED
-    ).first()
-    
-    if existing_event:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El venue no está disponible en esa fecha"
-        )
+    # Verificar que el venue no tenga otra reserva que se solape
+    await _ensure_venue_available(db, event.venue, event.start_time, event.end_time)
     
     db_event = Event(**event.dict())
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    async with scheduling.booking_writes(db):
+        db.add(db_event)
+        await db.flush()
+        await rollups.record_event_created(db, db_event)
+        await occupancy.record_event_created(db, db_event)
+    await cache.invalidate("events", "analytics")
+    await changefeed.publish("events", "created", db_event.id)
+    await db.refresh(db_event)
+    etags.set_etag(response, db_event)
     return db_event
 
 @router.put("/{event_id}", response_model=EventResponse)
 async def update_event(
     event_id: int,
     event_update: EventUpdate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar evento existente"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id, with_for_update=True)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento no encontrado"
         )
+    etags.check_if_match(request, event)
     
+    before = rollups.contribution(event)
+    booked_before = occupancy.booking(event)
     update_data = event_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(event, field, value)
     
-    event.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(event)
+    # Revalidar el horario si cambia la reserva o se reactiva el evento
+    booking_fields = {"venue", "start_time", "end_time", "status"}
+    new_status = update_data.get("status", event.status)
+    if booking_fields & update_data.keys() and new_status != EventStatus.CANCELLED:
+        await _ensure_venue_available(
+            db,
+            update_data.get("venue", event.venue),
+            update_data.get("start_time", event.start_time),
+            update_data.get("end_time", event.end_time),
+            exclude_event_id=event.id
+        )
+    
+    # Las consultas siguientes pueden vaciar el UPDATE del evento (autoflush)
+    async with scheduling.booking_writes(db):
+        for field, value in update_data.items():
+            setattr(event, field, value)
+        
+        # Un evento cancelado devuelve al inventario todo lo que tenía reservado
+        released = {}
+        if new_status == EventStatus.CANCELLED and before.status != EventStatus.CANCELLED:
+            released = await stock.release_event(db, event_id, notes="Evento cancelado")
+        
+        event.updated_at = datetime.utcnow()
+        await rollups.record_event_updated(db, before, event)
+        await occupancy.record_event_updated(db, booked_before, event)
+    await cache.invalidate("events", f"events:{event_id}", "analytics")
+    await changefeed.publish("events", "updated", event_id)
+    if released:
+        await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in released))
+        await changefeed.publish("inventory", "updated", *sorted(released))
+    await db.refresh(event)
+    etags.set_etag(response, event)
     return event
 
 @router.delete("/{event_id}")
-async def delete_event(event_id: int, db: Session = Depends(get_db)):
+async def delete_event(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Eliminar evento"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id, with_for_update=True)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento no encontrado"
         )
+    etags.check_if_match(request, event)
     
-    db.delete(event)
-    db.commit()
+    await rollups.record_event_deleted(db, event)
+    await occupancy.record_event_deleted(db, event)
+    await db.execute(delete(StaffAssignment).where(StaffAssignment.event_id == event_id))
+    released = await stock.release_event(db, event_id, notes="Evento eliminado")
+    await db.delete(event)
+    await db.commit()
+    await cache.invalidate("events", f"events:{event_id}", "analytics", "assignments")
+    await changefeed.publish("events", "deleted", event_id)
+    if released:
+        await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in released))
+        await changefeed.publish("inventory", "updated", *sorted(released))
     return {"message": "Evento eliminado exitosamente"}
 
-@router.get("/{event_id}/availability")
-async def check_availability(event_id: int, db: Session = Depends(get_db)):
-    """Verificar disponibilidad de recursos para un evento"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+@router.get("/{event_id}/availability", response_model=EventAvailability)
+async def check_availability(event_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Verificar disponibilidad de venue, personal e inventario para un evento"""
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento no encontrado"
         )
     
-    # Aquí implementarías la lógica para verificar disponibilidad
-    # de personal, inventario, venues, etc.
+    results = await availability.check_bookings(db, [availability.booking_for(event)])
+    return results[0]
+
+@router.post("/availability", response_model=List[EventAvailability])
+async def check_availability_batch(
+    batch: AvailabilityBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Verificar disponibilidad de varios eventos y fechas candidatas en una sola llamada"""
+    if len(batch.event_ids) + len(batch.candidates) > AVAILABILITY_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Se pueden verificar como máximo {AVAILABILITY_BATCH_MAX} reservas por llamada"
+        )
     
-    return {
-        "event_id": event_id,
-        "venue_available": True,
-        "staff_available": True,
-        "inventory_sufficient": True,
-        "recommendations": []
-    }
+    events = {}
+    if batch.event_ids:
+        events = {
+            event.id: event
+            for event in (await db.scalars(select(Event).where(Event.id.in_(batch.event_ids)))).all()
+        }
+    missing = [event_id for event_id in batch.event_ids if event_id not in events]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Eventos no encontrados: {missing}"
+        )
+    
+    bookings = [availability.booking_for(events[event_id]) for event_id in batch.event_ids]
+    for candidate in batch.candidates:
+        error = scheduling.validate_time_range(candidate.start_time, candidate.end_time)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+        bookings.append(availability.Booking(
+            None, candidate.venue, candidate.start_time, candidate.end_time, candidate.guests_count
+        ))
+    return await availability.check_bookings(db, bookings)
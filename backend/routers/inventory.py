@@ -1,99 +1,474 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
 
-from database import get_db
-from models import InventoryItem
-from schemas import InventoryItemCreate, InventoryItemResponse
+import alerts
+import batch
+import broker
+import cache
+import changefeed
+import etags
+import exports
+import fastjson
+import stock
+from database import get_async_db
+from pagination import paginate, next_cursor_headers
+from models import Event, InventoryItem, StockAlert, StockMovement, StockMovementType
+from schemas import (
+    BatchDeleteRequest, BatchResponse, InventoryItemCreate, InventoryItemResponse, StockAlertResponse, StockMovementCreate,
+    StockMovementResponse, StockReleaseResponse, StockReservationRequest
+)
 
 router = APIRouter()
 
+# Columns accepted by the `sort` parameter of the list endpoint
+INVENTORY_SORT_COLUMNS = {
+    "id": InventoryItem.id,
+    "name": InventoryItem.name,
+    "category": InventoryItem.category,
+}
+
+# Columns of InventoryItemResponse, for the fast list path
+INVENTORY_ROWS = fastjson.RowEncoder(InventoryItem, InventoryItemResponse)
+
+STOCK_MOVEMENT_SORT_COLUMNS = {
+    "id": StockMovement.id,
+}
+
+STOCK_ALERT_SORT_COLUMNS = {
+    "id": StockAlert.id,
+}
+
+def _stock_http_error(exc: stock.StockError) -> HTTPException:
+    if isinstance(exc, stock.ItemNotFound):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+def _validate_quantity(movement_type: StockMovementType, quantity: int):
+    if movement_type == StockMovementType.ADJUST:
+        valid = quantity != 0
+    else:
+        valid = quantity > 0
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantity must be greater than zero"
+        )
+
+async def _ensure_event_exists(db: AsyncSession, event_id: Optional[int]):
+    if event_id is not None and await db.get(Event, event_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+
+async def _reload(db: AsyncSession, item_id: int) -> InventoryItem:
+    """Fresh copy of an item after a stock UPDATE issued outside the ORM"""
+    return await db.get(InventoryItem, item_id, populate_existing=True)
+
 @router.get("/", response_model=List[InventoryItemResponse])
 async def get_inventory_items(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
     category: str = None,
     low_stock: bool = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a list of inventory items with optional filters"""
-    query = db.query(InventoryItem)
+    entry = await cache.lookup(request, "inventory")
+    if entry.response:
+        return entry.response
     
-    if category:
-        query = query.filter(InventoryItem.category == category)
+    query = INVENTORY_ROWS.select() if fastjson.ENABLED else select(InventoryItem)
+    query = _filter_items(query, category, low_stock)
     
+    items, next_cursor = await paginate(
+        db, query, InventoryItem, INVENTORY_SORT_COLUMNS,
+        sort=sort, cursor=cursor, skip=skip, limit=limit
+    )
+    return await cache.store(
+        entry, List[InventoryItemResponse], items, next_cursor_headers(next_cursor),
+        etag=etags.list_etag(items, next_cursor),
+        encoder=INVENTORY_ROWS.dump if fastjson.ENABLED else None
+    )
+
+def _filter_items(query, category: Optional[str], low_stock: bool):
+    """Filters shared by the list and the export"""
+    if category:
+        query = query.where(InventoryItem.category == category)
     if low_stock:
-        query = query.filter(InventoryItem.current_stock <= InventoryItem.minimum_stock)
+        query = query.where(InventoryItem.current_stock <= InventoryItem.minimum_stock)
+    return query
+
+@router.get("/export")
+async def export_inventory_items(format: str = "csv", category: str = None, low_stock: bool = False):
+    """Stream the filtered inventory as CSV or NDJSON with constant memory"""
+    query = select(*exports.table_columns(InventoryItem)).order_by(InventoryItem.id)
+    return exports.export_response(_filter_items(query, category, low_stock), format, "inventory")
+
+@router.get("/alerts", response_model=List[StockAlertResponse])
+async def get_stock_alerts(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_resolved: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the open low-stock alerts, optionally with the resolved ones"""
+    query = select(StockAlert)
+    if not include_resolved:
+        query = query.where(StockAlert.resolved_at.is_(None))
     
-    items = query.offset(skip).limit(limit).all()
-    return items
+    alerts_page, next_cursor = await paginate(
+        db, query, StockAlert, STOCK_ALERT_SORT_COLUMNS, cursor=cursor, limit=limit
+    )
+    response.headers.update(next_cursor_headers(next_cursor))
+    return alerts_page
+
+@router.get("/alerts/stream")
+async def stream_stock_alerts(db: AsyncSession = Depends(get_async_db)):
+    """Server-sent events with the open low-stock alerts, then every new crossing"""
+    # Subscribe before reading the backlog so no crossing falls in between
+    subscription = broker.subscribe(alerts.ALERTS_TOPIC)
+    try:
+        backlog = await alerts.open_alerts(db)
+    except BaseException:
+        subscription.close()
+        raise
+    await db.close()
+    
+    async def events():
+        try:
+            for alert in backlog:
+                message = alerts.alert_message(alerts.LOW_STOCK, alert)
+                yield broker.sse_event(message["type"], message["alert"])
+            yield broker.sse_event("ready", {"open_alerts": len(backlog)})
+            # Runs until the client disconnects and Starlette cancels the response
+            while True:
+                try:
+                    message = await subscription.get(timeout=broker.KEEPALIVE_SECONDS)
+                except EOFError:
+                    break
+                if message is None:
+                    yield broker.sse_comment()
+                else:
+                    yield broker.sse_event(message["type"], message["alert"])
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{item_id}", response_model=InventoryItemResponse)
-async def get_inventory_item(item_id: int, db: Session = Depends(get_db)):
+async def get_inventory_item(item_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific inventory item by ID"""
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    entry = await cache.lookup(request, f"inventory:{item_id}")
+    if entry.response:
+        return entry.response
+    
+    item = await db.get(InventoryItem, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Inventory item not found"
         )
-    return item
+    return await cache.store(entry, InventoryItemResponse, item, etag=etags.resource_etag(item))
 
 @router.post("/", response_model=InventoryItemResponse)
-async def create_inventory_item(item: InventoryItemCreate, db: Session = Depends(get_db)):
+async def create_inventory_item(item: InventoryItemCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Create a new inventory item"""
     db_item = InventoryItem(**item.dict())
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.flush()
+    await alerts.record_transition(db, db_item.id, False, db_item.current_stock, db_item.minimum_stock)
+    await db.commit()
+    await cache.invalidate("inventory")
+    await changefeed.publish("inventory", "created", db_item.id)
+    await db.refresh(db_item)
+    etags.set_etag(response, db_item)
     return db_item
 
+@router.post("/batch", response_model=BatchResponse)
+async def upsert_inventory_batch(
+    rows: List[Any] = Body(...),
+    all_or_nothing: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create or update inventory items in one transaction, matched by name and location"""
+    batch.check_size(rows)
+    results = batch.new_results(len(rows))
+    items = batch.validate_rows(rows, InventoryItemCreate, results)
+    keys = {index: (item.name, item.location) for index, item in items.items()}
+    batch.reject_duplicates(keys, results, "Name and location repeated in the batch")
+    
+    # One IN query finds the items to update, locked like a single update
+    matches = {}
+    for row in (await db.execute(
+        select(
+            InventoryItem.id, InventoryItem.name, InventoryItem.location, InventoryItem.current_stock,
+            InventoryItem.reserved_stock, InventoryItem.minimum_stock
+        )
+        .where(InventoryItem.name.in_({name for name, _ in keys.values()}))
+        .order_by(InventoryItem.id)
+        .with_for_update()
+    )).all():
+        matches.setdefault((row.name, row.location), []).append(row)
+    
+    to_insert, to_update, current = {}, {}, {}
+    for index, key in keys.items():
+        item = items[index]
+        found = matches.get(key, [])
+        if not found:
+            to_insert[index] = item.model_dump()
+        elif len(found) > 1:
+            results[index].error = "Several inventory items share this name and location"
+        elif item.current_stock < found[0].reserved_stock:
+            results[index].error = f"Stock cannot be set below the reserved quantity ({found[0].reserved_stock})"
+        else:
+            to_update[index] = {"id": found[0].id, **item.model_dump(exclude={"current_stock"})}
+            current[index] = found[0]
+    batch.fail_if_any(results, all_or_nothing)
+    
+    try:
+        created = await batch.insert_rows(db, InventoryItem, to_insert, results)
+        updated = await batch.update_rows(db, InventoryItem, to_update, results)
+        for index in to_insert:
+            await alerts.record_transition(
+                db, results[index].id, False, items[index].current_stock, items[index].minimum_stock
+            )
+        # Stock changes go through the ledger, as in a single update
+        adjustments = {}
+        for index, row in current.items():
+            item = items[index]
+            await alerts.record_transition(
+                db, row.id, alerts.is_low(row.current_stock, row.minimum_stock),
+                row.current_stock, item.minimum_stock
+            )
+            if item.current_stock != row.current_stock:
+                adjustments[row.id] = item.current_stock - row.current_stock
+        await stock.apply_movements(db, StockMovementType.ADJUST, adjustments, notes="Batch update")
+        await db.commit()
+    except stock.StockError as exc:
+        await db.rollback()
+        raise _stock_http_error(exc)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Inventory changed while applying the batch; retry it"
+        )
+    await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in updated))
+    if created:
+        await changefeed.publish("inventory", "created", *created)
+    if updated:
+        await changefeed.publish("inventory", "updated", *updated)
+    return batch.summarize(results)
+
+@router.post("/batch/delete", response_model=BatchResponse)
+async def delete_inventory_batch(
+    request: BatchDeleteRequest,
+    all_or_nothing: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete inventory items in one transaction; items with ledger movements are kept"""
+    batch.check_size(request.ids)
+    results = batch.new_results(len(request.ids), request.ids)
+    has_movements = select(StockMovement.id).where(StockMovement.item_id == InventoryItem.id).exists()
+    found = dict((await db.execute(
+        select(InventoryItem.id, has_movements)
+        .where(InventoryItem.id.in_(set(request.ids)))
+        .with_for_update(of=InventoryItem)
+    )).all())
+    blockers = {
+        item_id: "Inventory item has stock movements" if moved else None
+        for item_id, moved in found.items()
+    }
+    ids = batch.plan_deletes(request.ids, blockers, results, "Inventory item not found")
+    batch.fail_if_any(results, all_or_nothing)
+    
+    try:
+        if ids:
+            # Alerts are derived from the stock; they go with their item
+            await db.execute(delete(StockAlert).where(StockAlert.item_id.in_(ids)))
+            await db.execute(delete(InventoryItem).where(InventoryItem.id.in_(ids)))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Stock moved while deleting the items; retry the batch"
+        )
+    if ids:
+        await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in ids))
+        await changefeed.publish("inventory", "deleted", *ids)
+    return batch.summarize(results)
+
 @router.put("/{item_id}", response_model=InventoryItemResponse)
 async def update_inventory_item(
     item_id: int,
     item_data: InventoryItemCreate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing inventory item"""
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    item = await db.get(InventoryItem, item_id, with_for_update=True)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Inventory item not found"
         )
+    etags.check_if_match(request, item)
     
-    for key, value in item_data.dict().items():
+    # Stock changes go through the ledger; the reserved units must stay covered
+    new_stock = item_data.current_stock
+    if new_stock < item.reserved_stock:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stock cannot be set below the reserved quantity ({item.reserved_stock})"
+        )
+    was_low = alerts.is_low(item.current_stock, item.minimum_stock)
+    for key, value in item_data.dict(exclude={"current_stock"}).items():
         setattr(item, key, value)
+    await db.flush()
+    await alerts.record_transition(db, item_id, was_low, item.current_stock, item.minimum_stock)
+    if new_stock != item.current_stock:
+        await stock.apply_movement(
+            db, item_id, StockMovementType.ADJUST, new_stock - item.current_stock,
+            notes="Manual update"
+        )
     
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await cache.invalidate("inventory", f"inventory:{item_id}")
+    await changefeed.publish("inventory", "updated", item_id)
+    item = await _reload(db, item_id)
+    etags.set_etag(response, item)
     return item
 
 @router.put("/{item_id}/restock", response_model=InventoryItemResponse)
 async def restock_inventory_item(
     item_id: int,
     quantity: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Restock an inventory item"""
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Inventory item not found"
-        )
-    
     if quantity <= 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Restock quantity must be greater than zero"
         )
     
-    item.current_stock += quantity
-    item.last_restocked = datetime.utcnow()
+    # A precondition needs the current version; otherwise the update is a single atomic statement
+    if request.headers.get("if-match"):
+        item = await db.get(InventoryItem, item_id, with_for_update=True)
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Inventory item not found"
+            )
+        etags.check_if_match(request, item)
+    
+    try:
+        await stock.apply_movement(db, item_id, StockMovementType.RESTOCK, quantity)
+    except stock.StockError as exc:
+        raise _stock_http_error(exc)
     
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await cache.invalidate("inventory", f"inventory:{item_id}")
+    await changefeed.publish("inventory", "updated", item_id)
+    item = await _reload(db, item_id)
+    etags.set_etag(response, item)
     return item
+
+@router.get("/{item_id}/movements", response_model=List[StockMovementResponse])
+async def get_stock_movements(
+    item_id: int,
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "-id",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the stock ledger of an inventory item, newest first by default"""
+    movements, next_cursor = await paginate(
+        db, select(StockMovement).where(StockMovement.item_id == item_id), StockMovement,
+        STOCK_MOVEMENT_SORT_COLUMNS, sort=sort, cursor=cursor, limit=limit
+    )
+    response.headers.update(next_cursor_headers(next_cursor))
+    return movements
+
+@router.post("/{item_id}/movements", response_model=InventoryItemResponse)
+async def create_stock_movement(
+    item_id: int,
+    movement: StockMovementCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record a stock movement (restock, reserve, release, consume or adjust)"""
+    _validate_quantity(movement.movement_type, movement.quantity)
+    await _ensure_event_exists(db, movement.event_id)
+    
+    try:
+        await stock.apply_movement(
+            db, item_id, movement.movement_type, movement.quantity,
+            event_id=movement.event_id, notes=movement.notes
+        )
+    except stock.StockError as exc:
+        raise _stock_http_error(exc)
+    
+    await db.commit()
+    await cache.invalidate("inventory", f"inventory:{item_id}")
+    await changefeed.publish("inventory", "updated", item_id)
+    return await _reload(db, item_id)
+
+@router.post("/reservations", response_model=List[InventoryItemResponse])
+async def reserve_stock(reservation: StockReservationRequest, db: AsyncSession = Depends(get_async_db)):
+    """Reserve stock of several items for an event; all lines succeed or none do"""
+    quantities = {}
+    for line in reservation.items:
+        _validate_quantity(StockMovementType.RESERVE, line.quantity)
+        quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+    await _ensure_event_exists(db, reservation.event_id)
+    
+    try:
+        await stock.apply_movements(
+            db, StockMovementType.RESERVE, quantities, event_id=reservation.event_id
+        )
+    except stock.StockError as exc:
+        raise _stock_http_error(exc)
+    
+    await db.commit()
+    await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in quantities))
+    await changefeed.publish("inventory", "updated", *sorted(quantities))
+    return (await db.scalars(
+        select(InventoryItem)
+        .where(InventoryItem.id.in_(quantities))
+        .order_by(InventoryItem.id)
+        .execution_options(populate_existing=True)
+    )).all()
+
+@router.post("/reservations/{event_id}/release", response_model=StockReleaseResponse)
+async def release_stock(event_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Release everything still reserved for an event"""
+    await _ensure_event_exists(db, event_id)
+    try:
+        released = await stock.release_event(db, event_id)
+    except stock.StockError as exc:
+        raise _stock_http_error(exc)
+    
+    await db.commit()
+    await cache.invalidate("inventory", *(f"inventory:{item_id}" for item_id in released))
+    if released:
+        await changefeed.publish("inventory", "updated", *sorted(released))
+    return StockReleaseResponse(event_id=event_id, released=released)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+import cache
+import search
+from database import get_async_db
+from pagination import decode_cursor, encode_cursor, next_cursor_headers
+from schemas import SearchHit
+
+router = APIRouter()
+
+# Searchable resources, in the order that breaks ties between equal scores
+SEARCH_TYPES = ("clients", "events", "staff")
+
+def _parse_types(types: Optional[str]) -> List[str]:
+    if not types:
+        return list(SEARCH_TYPES)
+    names = list(dict.fromkeys(name.strip() for name in types.split(",") if name.strip()))
+    unknown = [name for name in names if name not in SEARCH_TYPES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid type '{', '.join(unknown)}'. Allowed: {', '.join(SEARCH_TYPES)}"
+        )
+    return [name for name in SEARCH_TYPES if name in names]
+
+@router.get("/", response_model=List[SearchHit])
+async def search_resources(
+    request: Request,
+    q: str,
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search clients, events and staff by name and other text fields, best matches first"""
+    terms = search.terms(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The query needs at least one word of {search.MIN_TERM_LENGTH} or more characters"
+        )
+    selected = _parse_types(types)
+    entry = await cache.lookup(request, *selected)
+    if entry.response:
+        return entry.response
+
+    # The cursor is only valid for the same terms and types
+    cursor_scope = f"search:{','.join(selected)}:{' '.join(terms)}"
+    position = None
+    if cursor:
+        (score, type_index), hit_id = decode_cursor(cursor, cursor_scope)
+        position = (float(score), int(type_index), hit_id)
+
+    try:
+        hits, next_position = await search.search(db, terms, selected, limit, position)
+    except NotImplementedError as exc:
+        # Only Postgres and SQLite have the search indexes
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+    next_cursor = None
+    if next_position:
+        score, type_index, hit_id = next_position
+        next_cursor = encode_cursor(cursor_scope, [score, type_index], hit_id)
+    return await cache.store(
+        entry, List[SearchHit], [
+            SearchHit(
+                type=hit.type,
+                id=hit.id,
+                score=hit.score,
+                title=hit.fields[0],
+                details=dict(zip(search.SEARCH_FIELDS[hit.type][1:], hit.fields[1:])),
+            )
+            for hit in hits
+        ],
+        next_cursor_headers(next_cursor)
+    )
@@ -0,0 +1,307 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+import os
+
+import cache
+import changefeed
+import etags
+import occupancy
+import recurrence
+import rollups
+import scheduling
+from database import get_async_db
+from pagination import paginate, next_cursor_headers
+from models import Client, Event, EventSeries
+from schemas import (
+    EventResponse, EventSeriesCreate, EventSeriesResponse, EventSeriesUpdate, SeriesOccurrence,
+    SeriesOccurrenceRequest
+)
+
+router = APIRouter()
+
+# Columnas aceptadas por el parámetro `sort` de la lista
+SERIES_SORT_COLUMNS = {
+    "id": EventSeries.id,
+    "name": EventSeries.name,
+    "start_time": EventSeries.start_time,
+}
+
+VENUE_UNAVAILABLE = scheduling.VENUE_UNAVAILABLE
+
+# Días desde la primera ocurrencia que se verifican contra las reservas existentes
+SERIES_CHECK_DAYS = int(os.getenv("SERIES_CHECK_DAYS", "366"))
+
+# Días por consulta de ocurrencias
+OCCURRENCES_MAX_DAYS = 366
+
+# Campos que cambian las ocurrencias y obligan a verificar de nuevo el venue
+BOOKING_FIELDS = {"venue", "start_time", "end_time", "rrule"}
+
+def _not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Serie no encontrada"
+    )
+
+async def _check_series(db: AsyncSession, series: EventSeries, skip_conflicts: bool):
+    """Validar el horario y la regla, calcular `last_end` y verificar las ocurrencias contra el venue.
+
+    Las ocurrencias de los próximos SERIES_CHECK_DAYS días se comparan en
+    memoria con las reservas del venue, cargadas en dos consultas. Con
+    `skip_conflicts` las que chocan se omiten (`exdates`) en vez de
+    rechazar la serie.
+    """
+    error = scheduling.validate_time_range(series.start_time, series.end_time)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    try:
+        last_start = recurrence.last_start(series.rrule, series.start_time)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    duration = series.end_time - series.start_time
+    series.last_end = last_start + duration if last_start else None
+
+    window_start = series.start_time
+    window_end = window_start + timedelta(days=SERIES_CHECK_DAYS)
+    if series.last_end:
+        window_end = min(window_end, series.last_end)
+    occurrences = recurrence.occurrences(series, window_start, window_end)
+    overlap = recurrence.self_overlap([occurrence.start_time for occurrence in occurrences], duration)
+    if overlap:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Las ocurrencias de la serie se solapan entre sí ({overlap.isoformat()})"
+        )
+
+    timeline = await scheduling.load_venue_timeline(
+        db, [series.venue], window_start, window_end,
+        exclude_series_ids=() if series.id is None else (series.id,)
+    )
+    conflicts = [
+        occurrence.start_time.isoformat()
+        for occurrence in occurrences
+        if timeline.overlaps(occurrence.venue, occurrence.start_time, occurrence.end_time)
+    ]
+    if conflicts and not skip_conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{VENUE_UNAVAILABLE} en {len(conflicts)} ocurrencias: {', '.join(conflicts[:10])}"
+        )
+    if conflicts:
+        series.exdates = sorted(set(series.exdates or ()) | set(conflicts))
+
+async def _get_occurrence(db: AsyncSession, series_id: int, start_time: datetime) -> EventSeries:
+    series = await db.get(EventSeries, series_id, with_for_update=True)
+    if not series:
+        raise _not_found()
+    if not recurrence.is_occurrence(series, start_time):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ocurrencia no encontrada"
+        )
+    return series
+
+@router.get("/", response_model=List[EventSeriesResponse])
+async def get_series_list(
+    request: Request,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    client_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener las series de eventos recurrentes, opcionalmente de un cliente"""
+    entry = await cache.lookup(request, "series")
+    if entry.response:
+        return entry.response
+
+    query = select(EventSeries)
+    if client_id is not None:
+        query = query.where(EventSeries.client_id == client_id)
+    series, next_cursor = await paginate(
+        db, query, EventSeries, SERIES_SORT_COLUMNS, sort=sort, cursor=cursor, limit=limit
+    )
+    return await cache.store(
+        entry, List[EventSeriesResponse], series, next_cursor_headers(next_cursor),
+        etag=etags.list_etag(series, next_cursor)
+    )
+
+@router.get("/{series_id}", response_model=EventSeriesResponse)
+async def get_series(series_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Obtener una serie por ID"""
+    entry = await cache.lookup(request, f"series:{series_id}")
+    if entry.response:
+        return entry.response
+
+    series = await db.get(EventSeries, series_id)
+    if not series:
+        raise _not_found()
+    return await cache.store(entry, EventSeriesResponse, series, etag=etags.resource_etag(series))
+
+@router.post("/", response_model=EventSeriesResponse)
+async def create_series(
+    series: EventSeriesCreate,
+    response: Response,
+    skip_conflicts: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crear una serie: la plantilla y la regla se guardan una vez y las ocurrencias se calculan al consultarlas"""
+    client = await db.get(Client, series.client_id)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cliente no encontrado"
+        )
+
+    db_series = EventSeries(**series.model_dump(), exdates=[])
+    await _check_series(db, db_series, skip_conflicts)
+    db.add(db_series)
+    await db.commit()
+    await cache.invalidate("series")
+    await changefeed.publish("series", "created", db_series.id)
+    await db.refresh(db_series)
+    etags.set_etag(response, db_series)
+    return db_series
+
+@router.put("/{series_id}", response_model=EventSeriesResponse)
+async def update_series(
+    series_id: int,
+    series_update: EventSeriesUpdate,
+    request: Request,
+    response: Response,
+    skip_conflicts: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Actualizar la plantilla o la regla de una serie; los eventos ya materializados no cambian"""
+    series = await db.get(EventSeries, series_id, with_for_update=True)
+    if not series:
+        raise _not_found()
+    etags.check_if_match(request, series)
+
+    update_data = series_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(series, field, value)
+    if BOOKING_FIELDS & update_data.keys():
+        await _check_series(db, series, skip_conflicts)
+
+    series.updated_at = datetime.utcnow()
+    await db.commit()
+    await cache.invalidate("series", f"series:{series_id}")
+    await changefeed.publish("series", "updated", series_id)
+    await db.refresh(series)
+    etags.set_etag(response, series)
+    return series
+
+@router.delete("/{series_id}")
+async def delete_series(series_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Eliminar una serie y sus ocurrencias futuras; los eventos materializados se conservan"""
+    series = await db.get(EventSeries, series_id, with_for_update=True)
+    if not series:
+        raise _not_found()
+    etags.check_if_match(request, series)
+
+    detached = (await db.scalars(
+        update(Event).where(Event.series_id == series_id).values(series_id=None).returning(Event.id)
+    )).all()
+    await db.delete(series)
+    await db.commit()
+    await cache.invalidate("series", f"series:{series_id}")
+    await changefeed.publish("series", "deleted", series_id)
+    if detached:
+        await cache.invalidate("events", *(f"events:{event_id}" for event_id in detached))
+        await changefeed.publish("events", "updated", *detached)
+    return {"message": "Serie eliminada exitosamente"}
+
+@router.get("/{series_id}/occurrences", response_model=List[SeriesOccurrence])
+async def get_occurrences(
+    series_id: int,
+    request: Request,
+    start_day: date = Query(alias="from"),
+    end_day: date = Query(alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ocurrencias de la serie en [from, to), calculadas a partir de la regla"""
+    if not 0 < (end_day - start_day).days <= OCCURRENCES_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango debe abarcar entre 1 y {OCCURRENCES_MAX_DAYS} días"
+        )
+    entry = await cache.lookup(request, f"series:{series_id}")
+    if entry.response:
+        return entry.response
+
+    series = await db.get(EventSeries, series_id)
+    if not series:
+        raise _not_found()
+    window_start = datetime.combine(start_day, datetime.min.time())
+    window_end = datetime.combine(end_day, datetime.min.time())
+    return await cache.store(
+        entry, List[SeriesOccurrence], recurrence.occurrences(series, window_start, window_end)
+    )
+
+@router.post("/{series_id}/occurrences/skip", response_model=EventSeriesResponse)
+async def skip_occurrence(
+    series_id: int,
+    occurrence: SeriesOccurrenceRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Omitir una ocurrencia de la serie, que deja libre el venue"""
+    series = await _get_occurrence(db, series_id, occurrence.start_time)
+    series.exdates = sorted([*series.exdates, occurrence.start_time.isoformat()])
+    series.updated_at = datetime.utcnow()
+    await db.commit()
+    await cache.invalidate("series", f"series:{series_id}")
+    await changefeed.publish("series", "updated", series_id)
+    await db.refresh(series)
+    etags.set_etag(response, series)
+    return series
+
+@router.post("/{series_id}/occurrences/materialize", response_model=EventResponse)
+async def materialize_occurrence(
+    series_id: int,
+    occurrence: SeriesOccurrenceRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Convertir una ocurrencia en un evento, para asignarle personal, reservar stock o editarla por separado"""
+    series = await _get_occurrence(db, series_id, occurrence.start_time)
+    start_time = occurrence.start_time
+    end_time = start_time + (series.end_time - series.start_time)
+    series.exdates = sorted([*series.exdates, start_time.isoformat()])
+    series.updated_at = datetime.utcnow()
+
+    # Otro evento pudo reservarse después del horizonte que se verificó al crear la serie
+    conflict = await scheduling.find_venue_conflict(
+        db, series.venue, start_time, end_time, exclude_series_id=series.id
+    )
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=VENUE_UNAVAILABLE)
+
+    event = Event(
+        name=series.name,
+        client_id=series.client_id,
+        event_type=series.event_type,
+        date=datetime.combine(start_time.date(), datetime.min.time()),
+        start_time=start_time,
+        end_time=end_time,
+        venue=series.venue,
+        guests_count=series.guests_count,
+        budget=series.budget,
+        notes=series.notes,
+        series_id=series.id,
+    )
+    async with scheduling.booking_writes(db):
+        db.add(event)
+        await db.flush()
+        await rollups.record_event_created(db, event)
+        await occupancy.record_event_created(db, event)
+    await cache.invalidate("events", "analytics", "series", f"series:{series_id}")
+    await changefeed.publish("events", "created", event.id)
+    await changefeed.publish("series", "updated", series_id)
+    await db.refresh(event)
+    etags.set_etag(response, event)
+    return event
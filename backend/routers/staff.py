@@ -1,47 +1,103 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, List, Optional
 
-from database import get_db
-from models import Staff, StaffStatus
-from schemas import StaffCreate, StaffResponse
+import batch
+import cache
+import changefeed
+import etags
+import fastjson
+import includes
+from database import get_async_db
+from pagination import paginate, next_cursor_headers
+from models import Staff, StaffAssignment, StaffStatus
+from schemas import BatchDeleteRequest, BatchResponse, StaffCreate, StaffDetailResponse, StaffResponse
 
 router = APIRouter()
 
-@router.get("/", response_model=List[StaffResponse])
+# Columns accepted by the `sort` parameter of the list endpoint
+STAFF_SORT_COLUMNS = {
+    "id": Staff.id,
+    "name": Staff.name,
+    "email": Staff.email,
+}
+
+# Relationships accepted by the `include` parameter
+STAFF_INCLUDES = {
+    "assignments": includes.Relation(selectinload(Staff.assignments), "assignments"),
+}
+
+# Columns of StaffResponse, for the list without relationships
+STAFF_ROWS = fastjson.RowEncoder(Staff, StaffResponse)
+
+@router.get("/", response_model=List[StaffDetailResponse], response_model_exclude_unset=True)
 async def get_staff(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
     status_filter: str = None,
-    db: Session = Depends(get_db)
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get a list of all staff members with optional status filtering"""
-    query = db.query(Staff)
+    """Get a list of all staff members with optional status filtering and assignments"""
+    options, include_tags = includes.parse_include(include, STAFF_INCLUDES)
+    entry = await cache.lookup(request, "staff", *include_tags)
+    if entry.response:
+        return entry.response
+    
+    # Without relationships the page is encoded from plain columns
+    fast = fastjson.ENABLED and not options
+    query = STAFF_ROWS.select() if fast else select(Staff).options(*options)
     
     if status_filter:
-        query = query.filter(Staff.status == status_filter)
+        query = query.where(Staff.status == status_filter)
     
-    staff = query.offset(skip).limit(limit).all()
-    return staff
+    staff, next_cursor = await paginate(
+        db, query, Staff, STAFF_SORT_COLUMNS,
+        sort=sort, cursor=cursor, skip=skip, limit=limit
+    )
+    return await cache.store(
+        entry, List[StaffDetailResponse], staff if fast else includes.loaded(staff), next_cursor_headers(next_cursor),
+        etag=None if options else etags.list_etag(staff, next_cursor), exclude_unset=True,
+        encoder=STAFF_ROWS.dump if fast else None
+    )
 
-@router.get("/{staff_id}", response_model=StaffResponse)
-async def get_staff_member(staff_id: int, db: Session = Depends(get_db)):
-    """Get a specific staff member by ID"""
-    staff = db.query(Staff).filter(Staff.id == staff_id).first()
+@router.get("/{staff_id}", response_model=StaffDetailResponse, response_model_exclude_unset=True)
+async def get_staff_member(
+    staff_id: int,
+    request: Request,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific staff member by ID, optionally with their assignments"""
+    options, include_tags = includes.parse_include(include, STAFF_INCLUDES)
+    entry = await cache.lookup(request, f"staff:{staff_id}", *include_tags)
+    if entry.response:
+        return entry.response
+    
+    staff = await db.get(Staff, staff_id, options=options)
     if not staff:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Staff member not found"
         )
-    return staff
+    return await cache.store(
+        entry, StaffDetailResponse, includes.loaded(staff),
+        etag=None if options else etags.resource_etag(staff), exclude_unset=True
+    )
 
 @router.post("/", response_model=StaffResponse)
-async def create_staff_member(staff: StaffCreate, db: Session = Depends(get_db)):
+async def create_staff_member(staff: StaffCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Create a new staff member"""
     # Check if staff with the same email already exists
-    existing_staff = db.query(Staff).filter(Staff.email == staff.email).first()
-    if existing_staff:
+    email_taken = await db.scalar(select(exists().where(Staff.email == staff.email)))
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -49,28 +105,117 @@ async def create_staff_member(staff: StaffCreate, db: Session = Depends(get_db))
     
     db_staff = Staff(**staff.dict())
     db.add(db_staff)
-    db.commit()
-    db.refresh(db_staff)
+    await db.commit()
+    await cache.invalidate("staff")
+    await changefeed.publish("staff", "created", db_staff.id)
+    await db.refresh(db_staff)
+    etags.set_etag(response, db_staff)
     return db_staff
 
+@router.post("/batch", response_model=BatchResponse)
+async def upsert_staff_batch(
+    rows: List[Any] = Body(...),
+    all_or_nothing: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create or update staff members in one transaction, matched by email"""
+    batch.check_size(rows)
+    results = batch.new_results(len(rows))
+    members = batch.validate_rows(rows, StaffCreate, results)
+    emails = {index: member.email for index, member in members.items()}
+    batch.reject_duplicates(emails, results, "Email repeated in the batch")
+    
+    # One IN query finds the members to update; the rest are created
+    existing = dict((await db.execute(
+        select(Staff.email, Staff.id)
+        .where(Staff.email.in_(set(emails.values())))
+        .order_by(Staff.id)
+        .with_for_update()
+    )).all())
+    to_insert, to_update = {}, {}
+    for index, email in emails.items():
+        values = members[index].model_dump()
+        if email in existing:
+            to_update[index] = {"id": existing[email], **values}
+        else:
+            to_insert[index] = values
+    batch.fail_if_any(results, all_or_nothing)
+    
+    try:
+        created = await batch.insert_rows(db, Staff, to_insert, results)
+        updated = await batch.update_rows(db, Staff, to_update, results)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another request registered one of these emails; retry the batch"
+        )
+    await cache.invalidate("staff", *(f"staff:{staff_id}" for staff_id in updated))
+    if created:
+        await changefeed.publish("staff", "created", *created)
+    if updated:
+        await changefeed.publish("staff", "updated", *updated)
+    return batch.summarize(results)
+
+@router.post("/batch/delete", response_model=BatchResponse)
+async def delete_staff_batch(
+    request: BatchDeleteRequest,
+    all_or_nothing: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete staff members in one transaction; members with assignments are kept"""
+    batch.check_size(request.ids)
+    results = batch.new_results(len(request.ids), request.ids)
+    has_assignments = select(StaffAssignment.id).where(StaffAssignment.staff_id == Staff.id).exists()
+    found = dict((await db.execute(
+        select(Staff.id, has_assignments)
+        .where(Staff.id.in_(set(request.ids)))
+        .with_for_update(of=Staff)
+    )).all())
+    blockers = {
+        staff_id: "Staff member has assignments" if assigned else None
+        for staff_id, assigned in found.items()
+    }
+    ids = batch.plan_deletes(request.ids, blockers, results, "Staff member not found")
+    batch.fail_if_any(results, all_or_nothing)
+    
+    try:
+        if ids:
+            await db.execute(delete(Staff).where(Staff.id.in_(ids)))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Staff members were assigned while deleting; retry the batch"
+        )
+    if ids:
+        await cache.invalidate("staff", *(f"staff:{staff_id}" for staff_id in ids))
+        await changefeed.publish("staff", "deleted", *ids)
+    return batch.summarize(results)
+
 @router.put("/{staff_id}", response_model=StaffResponse)
 async def update_staff_member(
     staff_id: int,
     staff_data: StaffCreate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing staff member"""
-    staff = db.query(Staff).filter(Staff.id == staff_id).first()
+    staff = await db.get(Staff, staff_id, with_for_update=True)
     if not staff:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Staff member not found"
         )
+    etags.check_if_match(request, staff)
     
     # Check if updated email conflicts with another staff member
     if staff_data.email != staff.email:
-        existing_staff = db.query(Staff).filter(Staff.email == staff_data.email).first()
-        if existing_staff:
+        email_taken = await db.scalar(select(exists().where(Staff.email == staff_data.email)))
+        if email_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -79,25 +224,34 @@ async def update_staff_member(
     for key, value in staff_data.dict().items():
         setattr(staff, key, value)
     
-    db.commit()
-    db.refresh(staff)
+    await db.commit()
+    await cache.invalidate("staff", f"staff:{staff_id}")
+    await changefeed.publish("staff", "updated", staff_id)
+    await db.refresh(staff)
+    etags.set_etag(response, staff)
     return staff
 
 @router.put("/{staff_id}/status")
 async def update_staff_status(
     staff_id: int,
-    status: StaffStatus,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    new_status: StaffStatus = Query(alias="status"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a staff member's status"""
-    staff = db.query(Staff).filter(Staff.id == staff_id).first()
+    staff = await db.get(Staff, staff_id, with_for_update=True)
     if not staff:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Staff member not found"
         )
+    etags.check_if_match(request, staff)
     
-    staff.status = status
-    db.commit()
-    db.refresh(staff)
-    return {"message": "Status updated successfully", "status": status}
+    staff.status = new_status
+    await db.commit()
+    await cache.invalidate("staff", f"staff:{staff_id}")
+    await changefeed.publish("staff", "updated", staff_id)
+    await db.refresh(staff)
+    etags.set_etag(response, staff)
+    return {"message": "Status updated successfully", "status": new_status}
@@ -0,0 +1,168 @@
+"""Venue scheduling rules shared by the event endpoints.
+
+Two bookings of the same venue conflict when their [start_time, end_time)
+intervals overlap and neither is cancelled. Events are limited to
+``MAX_EVENT_DURATION`` so the overlap query can bound ``start_time`` on
+both sides and stay a short range scan on the (venue, start_time,
+end_time) index, however many past bookings a venue has. The occurrences
+of recurring series (``recurrence``) are bookings too, computed for the
+window instead of read from ``events``.
+"""
+import bisect
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import recurrence
+from models import Event, EventStatus
+
+MAX_EVENT_DURATION = timedelta(hours=int(os.getenv("EVENT_MAX_DURATION_HOURS", "72")))
+
+# Name of the Postgres exclusion constraint backing the same rule
+OVERLAP_CONSTRAINT = "ex_events_venue_overlap"
+
+VENUE_UNAVAILABLE = "El venue no está disponible en ese horario"
+
+
+def validate_time_range(start_time: datetime, end_time: datetime) -> Optional[str]:
+    """Return an error message if the booking interval is not acceptable"""
+    if end_time <= start_time:
+        return "La hora de fin debe ser posterior a la hora de inicio"
+    if end_time - start_time > MAX_EVENT_DURATION:
+        hours = int(MAX_EVENT_DURATION.total_seconds() // 3600)
+        return f"La duración del evento no puede superar {hours} horas"
+    return None
+
+
+def overlap_conditions(venue: str, start_time: datetime, end_time: datetime):
+    """WHERE conditions matching non-cancelled events of ``venue`` overlapping the interval"""
+    return (
+        Event.venue == venue,
+        Event.start_time < end_time,
+        Event.start_time > start_time - MAX_EVENT_DURATION,
+        Event.end_time > start_time,
+        Event.status != EventStatus.CANCELLED,
+    )
+
+
+async def find_venue_conflict(
+    db: AsyncSession,
+    venue: str,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_event_id: Optional[int] = None,
+    exclude_series_id: Optional[int] = None,
+) -> Optional[Union[Event, recurrence.Occurrence]]:
+    """First existing booking that overlaps the interval, if any: an event or a series occurrence"""
+    query = select(Event).where(*overlap_conditions(venue, start_time, end_time))
+    if exclude_event_id is not None:
+        query = query.where(Event.id != exclude_event_id)
+    conflict = await db.scalar(query.limit(1))
+    if conflict is not None:
+        return conflict
+    occurrences = await recurrence.occurrences_in_window(
+        db, start_time, end_time, [venue],
+        exclude_series_ids=() if exclude_series_id is None else (exclude_series_id,)
+    )
+    return occurrences[0] if occurrences else None
+
+
+class VenueTimeline:
+    """In-memory index of bookings per venue for checking many intervals at once.
+
+    Bookings are kept sorted by start time together with the running maximum
+    of their end times, so an overlap test is one bisect per interval.
+    """
+
+    def __init__(self, bookings: Iterable[Tuple[str, datetime, datetime]] = ()):
+        self._starts: Dict[str, List[datetime]] = defaultdict(list)
+        self._max_ends: Dict[str, List[datetime]] = defaultdict(list)
+        for venue, start_time, end_time in sorted(bookings, key=lambda b: (b[0], b[1])):
+            self._append(venue, start_time, end_time)
+
+    def _append(self, venue: str, start_time: datetime, end_time: datetime):
+        max_ends = self._max_ends[venue]
+        self._starts[venue].append(start_time)
+        max_ends.append(max(end_time, max_ends[-1]) if max_ends else end_time)
+
+    def overlaps(self, venue: str, start_time: datetime, end_time: datetime) -> bool:
+        starts = self._starts.get(venue)
+        if not starts:
+            return False
+        # Bookings starting before end_time; one of them overlaps if any ends after start_time
+        index = bisect.bisect_left(starts, end_time)
+        return index > 0 and self._max_ends[venue][index - 1] > start_time
+
+    def add(self, venue: str, start_time: datetime, end_time: datetime):
+        """Add a booking; bookings of a venue must be added by increasing start_time"""
+        starts = self._starts[venue]
+        if starts and start_time < starts[-1]:
+            raise ValueError("bookings must be added in start_time order")
+        self._append(venue, start_time, end_time)
+
+
+async def load_venue_timeline(
+    db: AsyncSession,
+    venues: Iterable[str],
+    window_start: datetime,
+    window_end: datetime,
+    exclude_event_ids: Iterable[int] = (),
+    exclude_series_ids: Iterable[int] = (),
+) -> VenueTimeline:
+    """Load every booking of ``venues`` that can overlap the window: one query for the events, one for the series"""
+    venues = set(venues)
+    if not venues:
+        return VenueTimeline()
+    query = select(Event.venue, Event.start_time, Event.end_time).where(
+        Event.venue.in_(venues),
+        Event.start_time < window_end,
+        Event.start_time > window_start - MAX_EVENT_DURATION,
+        Event.end_time > window_start,
+        Event.status != EventStatus.CANCELLED,
+    )
+    exclude_event_ids = list(exclude_event_ids)
+    if exclude_event_ids:
+        query = query.where(Event.id.notin_(exclude_event_ids))
+    bookings = (await db.execute(query)).all()
+    bookings.extend(
+        (occurrence.venue, occurrence.start_time, occurrence.end_time)
+        for occurrence in await recurrence.occurrences_in_window(
+            db, window_start, window_end, venues, exclude_series_ids
+        )
+    )
+    return VenueTimeline(bookings)
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    """True if the database rejected a write because of the exclusion constraint"""
+    return OVERLAP_CONSTRAINT in str(exc.orig)
+
+
+@asynccontextmanager
+async def booking_writes(db: AsyncSession):
+    """Run the writes of a booking and commit them, answering 400 if the constraint rejects them.
+
+    The exclusion constraint is checked by each INSERT or UPDATE, which
+    may run at an explicit flush, at an autoflush before a later query or
+    at the commit. All of them go inside the block:
+
+        async with scheduling.booking_writes(db):
+            db.add(event)
+            await db.flush()
+            await rollups.record_event_created(db, event)
+    """
+    try:
+        yield
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_overlap_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=VENUE_UNAVAILABLE)
+        raise
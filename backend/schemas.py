@@ -1,17 +1,32 @@
 
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional, List
-from models import EventStatus, StaffStatus
+from pydantic import AfterValidator, BaseModel, BeforeValidator, EmailStr
+from datetime import date, datetime, timezone
+from typing import Annotated, Dict, List, Literal, Optional
+from models import EventStatus, StaffStatus, StockMovementType
+
+def _day_to_datetime(value):
+    # The event form sends the day alone ("2024-08-15"); it is stored as midnight
+    if isinstance(value, str) and len(value) == 10:
+        return datetime.fromisoformat(value)
+    return value
+
+def _to_naive_utc(value: datetime) -> datetime:
+    # Columns hold naive UTC (datetime.utcnow); offsets are converted, not dropped
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+UtcDateTime = Annotated[datetime, AfterValidator(_to_naive_utc)]
+EventDay = Annotated[datetime, BeforeValidator(_day_to_datetime), AfterValidator(_to_naive_utc)]
 
 # Event Schemas
 class EventBase(BaseModel):
     name: str
     client_id: int
     event_type: str
-    date: datetime
-    start_time: datetime
-    end_time: datetime
+    date: EventDay
+    start_time: UtcDateTime
+    end_time: UtcDateTime
     venue: str
     guests_count: int
     budget: float
@@ -23,9 +38,9 @@ class EventCreate(EventBase):
 class EventUpdate(BaseModel):
     name: Optional[str] = None
     event_type: Optional[str] = None
-    date: Optional[datetime] = None
-    start_time: Optional[datetime] = None
-    end_time: Optional[datetime] = None
+    date: Optional[EventDay] = None
+    start_time: Optional[UtcDateTime] = None
+    end_time: Optional[UtcDateTime] = None
     venue: Optional[str] = None
     guests_count: Optional[int] = None
     budget: Optional[float] = None
@@ -35,12 +50,141 @@ class EventUpdate(BaseModel):
 class EventResponse(EventBase):
     id: int
     status: EventStatus
+    series_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class EventImportResult(BaseModel):
+    index: int
+    status: str  # "created" or "error"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class EventImportResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[EventImportResult]
+
+class RoleAvailability(BaseModel):
+    role: str
+    required: int
+    available: int
+    assigned: int
+
+class InventoryAvailability(BaseModel):
+    category: str
+    required: int
+    in_stock: int
+
+class EventAvailability(BaseModel):
+    event_id: Optional[int] = None
+    venue: str
+    start_time: datetime
+    end_time: datetime
+    guests_count: int
+    venue_available: bool
+    staff_available: bool
+    inventory_sufficient: bool
+    staff: List[RoleAvailability]
+    inventory: List[InventoryAvailability]
+    recommendations: List[str]
+
+# Recurring Series Schemas
+class EventSeriesBase(BaseModel):
+    name: str
+    client_id: int
+    event_type: str
+    venue: str
+    guests_count: int
+    budget: float
+    notes: Optional[str] = None
+    # Slot of the first occurrence
+    start_time: UtcDateTime
+    end_time: UtcDateTime
+    # RFC 5545 RRULE, e.g. "FREQ=WEEKLY;BYDAY=TU;COUNT=20"
+    rrule: str
+
+class EventSeriesCreate(EventSeriesBase):
+    pass
+
+class EventSeriesUpdate(BaseModel):
+    name: Optional[str] = None
+    event_type: Optional[str] = None
+    venue: Optional[str] = None
+    guests_count: Optional[int] = None
+    budget: Optional[float] = None
+    notes: Optional[str] = None
+    start_time: Optional[UtcDateTime] = None
+    end_time: Optional[UtcDateTime] = None
+    rrule: Optional[str] = None
+
+class EventSeriesResponse(EventSeriesBase):
+    id: int
+    last_end: Optional[datetime] = None
+    exdates: List[str]
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SeriesOccurrence(BaseModel):
+    series_id: int
+    venue: str
+    start_time: datetime
+    end_time: datetime
+
+    class Config:
+        from_attributes = True
+
+class SeriesOccurrenceRequest(BaseModel):
+    start_time: UtcDateTime
+
+# Calendar Schemas
+class CalendarEvent(BaseModel):
+    # Occurrences of a series have no id until they are materialized
+    id: Optional[int] = None
+    name: str
+    client_id: Optional[int] = None
+    event_type: str
+    venue: str
+    start_time: datetime
+    end_time: datetime
+    guests_count: int
+    status: EventStatus
+    series_id: Optional[int] = None
+
+class VenueDayOccupancy(BaseModel):
+    venue: str
+    events_count: int
+    booked_minutes: int
+    staff_count: int
+
+class CalendarDay(BaseModel):
+    date: date
+    # Events touching the day; one lasting past midnight appears on each of its days
+    events: List[CalendarEvent]
+    venues: List[VenueDayOccupancy]
+    staff_count: int
+
+class CalendarResponse(BaseModel):
+    date_from: date
+    date_to: date
+    days: List[CalendarDay]
+
+class AvailabilityCandidate(BaseModel):
+    venue: str
+    start_time: UtcDateTime
+    end_time: UtcDateTime
+    guests_count: int
+
+class AvailabilityBatchRequest(BaseModel):
+    event_ids: List[int] = []
+    candidates: List[AvailabilityCandidate] = []
+
 # Client Schemas
 class ClientBase(BaseModel):
     name: str
@@ -56,6 +200,7 @@ class ClientCreate(ClientBase):
 class ClientResponse(ClientBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -78,10 +223,52 @@ class StaffResponse(StaffBase):
     rating: float
     total_events: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+# Staff Assignment Schemas
+class StaffAssignmentCreate(BaseModel):
+    staff_ids: List[int]
+    notes: Optional[str] = None
+
+class StaffAssignmentResponse(BaseModel):
+    id: int
+    event_id: int
+    staff_id: int
+    assigned_at: datetime
+    notes: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# Responses of the read endpoints, with the relationships requested through include=
+class EventDetailResponse(EventResponse):
+    client: Optional[ClientResponse] = None
+    staff_assignments: Optional[List[StaffAssignmentResponse]] = None
+
+class ClientDetailResponse(ClientResponse):
+    events: Optional[List[EventResponse]] = None
+
+class StaffDetailResponse(StaffResponse):
+    assignments: Optional[List[StaffAssignmentResponse]] = None
+
+class AutoAssignRequest(BaseModel):
+    # People needed per role; derived from the guest count when omitted
+    roles: Optional[Dict[str, int]] = None
+    strategy: Literal["rating", "cost"] = "rating"
+    min_rating: Optional[float] = None
+    dry_run: bool = False
+
+class AutoAssignResponse(BaseModel):
+    event_id: int
+    requested: Dict[str, int]
+    already_assigned: Dict[str, int]
+    assigned: Dict[str, List[int]]
+    missing: Dict[str, int]
+    assignments: List[StaffAssignmentResponse]
+
 # Inventory Schemas
 class InventoryItemBase(BaseModel):
     name: str
@@ -98,12 +285,83 @@ class InventoryItemCreate(InventoryItemBase):
 
 class InventoryItemResponse(InventoryItemBase):
     id: int
+    reserved_stock: int = 0
+    available_stock: int
     last_restocked: Optional[datetime] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class StockMovementCreate(BaseModel):
+    movement_type: StockMovementType
+    # Units to move; adjustments may be negative
+    quantity: int
+    event_id: Optional[int] = None
+    notes: Optional[str] = None
+
+class StockMovementResponse(BaseModel):
+    id: int
+    item_id: int
+    event_id: Optional[int] = None
+    movement_type: StockMovementType
+    quantity: int
+    notes: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class StockAlertResponse(BaseModel):
+    id: int
+    item_id: int
+    current_stock: int
+    minimum_stock: int
+    created_at: datetime
+    resolved_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class StockReservationLine(BaseModel):
+    item_id: int
+    quantity: int
+
+class StockReservationRequest(BaseModel):
+    event_id: int
+    items: List[StockReservationLine]
+
+class StockReleaseResponse(BaseModel):
+    event_id: int
+    released: Dict[int, int]
+
+# Batch Schemas
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # "created", "updated", "deleted" or "error"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+    results: List[BatchItemResult]
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[int]
+
+# Search Schemas
+class SearchHit(BaseModel):
+    type: str  # "clients", "events" or "staff"
+    id: int
+    score: float
+    title: str
+    # The other matched columns, e.g. company and email of a client
+    details: Dict[str, Optional[str]]
+
 # Analytics Schemas
 class RevenueData(BaseModel):
     month: str
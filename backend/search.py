@@ -0,0 +1,187 @@
+"""Ranked full-text search over clients, events and staff.
+
+Each searchable table declares the text columns it is matched on, most
+important first (``attach``). The index behind it depends on the
+database:
+
+- Postgres: a stored generated ``search_vector`` column, the
+  ``to_tsvector('simple', ...)`` of the unaccented columns with the first
+  one weighted ``A`` and the rest ``B``, under a GIN index. Queries rank
+  with ``ts_rank``.
+- SQLite: an external-content FTS5 table ``<table>_search`` kept in sync
+  by triggers, with the ``unicode61 remove_diacritics`` tokenizer and
+  prefix indexes. Queries rank with ``bm25`` using the same weights.
+
+Both match every term of the query as a prefix, ignoring case and
+accents, so "garc boda" finds "Boda García". There is no stemming or
+typo tolerance: the ``simple`` configuration keeps Spanish and English
+text alike. Hits of all tables are merged by score (higher is better)
+and paged with a keyset cursor on (score, type, id), like the lists.
+Other databases have no index to search and raise ``NotImplementedError``.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import DDL, Table, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Searchable table -> text columns, most important first
+SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {}
+
+# Weight of the first column and of the others (ts_rank's A and B defaults)
+TITLE_WEIGHT = 1.0
+OTHER_WEIGHT = 0.4
+
+# Shorter terms match too much of a large table to rank it quickly
+MIN_TERM_LENGTH = 2
+MAX_TERMS = 8
+
+SEARCH_VECTOR = "search_vector"
+
+_PG_UNACCENT = (
+    "CREATE OR REPLACE FUNCTION search_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+)
+
+
+class Hit(NamedTuple):
+    type: str
+    id: int
+    score: float
+    fields: Tuple[Optional[str], ...]
+
+
+def terms(query: str) -> List[str]:
+    """Lowercase words of ``query`` long enough to search for"""
+    words = re.findall(r"\w+", query.lower())
+    return [word for word in words if len(word) >= MIN_TERM_LENGTH][:MAX_TERMS]
+
+
+def _pg_document(fields: Sequence[str]) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('simple', search_unaccent(coalesce({field}, ''))), '{'A' if index == 0 else 'B'}')"
+        for index, field in enumerate(fields)
+    )
+
+
+def postgres_ddl(table: str, fields: Sequence[str], concurrently: bool = False) -> List[str]:
+    """Statements adding the search column and its GIN index to ``table``"""
+    return [
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        _PG_UNACCENT,
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector "
+        f"GENERATED ALWAYS AS ({_pg_document(fields)}) STORED",
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS ix_{table}_search "
+        f"ON {table} USING gin ({SEARCH_VECTOR})",
+    ]
+
+
+def sqlite_ddl(table: str, fields: Sequence[str]) -> List[str]:
+    """Statements creating the FTS5 table of ``table`` and the triggers keeping it in sync"""
+    columns = ", ".join(fields)
+    new_values = ", ".join(f"new.{field}" for field in fields)
+    old_values = ", ".join(f"old.{field}" for field in fields)
+    index = f"{table}_search"
+    insert_new = f"INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = f"INSERT INTO {index}({index}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({columns}, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def attach(table: Table, *fields: str):
+    """Make ``table`` searchable on ``fields``; the index is built with the table"""
+    SEARCH_FIELDS[table.name] = fields
+    for statement in postgres_ddl(table.name, fields):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in sqlite_ddl(table.name, fields):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        table, "before_drop", DDL(f"DROP TABLE IF EXISTS {table.name}_search").execute_if(dialect="sqlite")
+    )
+
+
+def is_search_object(name: str) -> bool:
+    """True for the columns, indexes and FTS tables created here, which models.py does not declare"""
+    return name == SEARCH_VECTOR or any(
+        name == f"ix_{table}_search" or name.startswith(f"{table}_search") for table in SEARCH_FIELDS
+    )
+
+
+def _after(type_index: int, cursor: Optional[Tuple[float, int, int]]) -> Tuple[str, dict]:
+    """Keyset condition on ``score``/``id`` for the hits of one table after ``cursor``"""
+    if cursor is None:
+        return "", {}
+    score, cursor_type, cursor_id = cursor
+    params = {"cursor_score": score, "cursor_id": cursor_id}
+    if type_index > cursor_type:
+        return " AND score <= :cursor_score", params
+    if type_index < cursor_type:
+        return " AND score < :cursor_score", params
+    return " AND (score < :cursor_score OR (score = :cursor_score AND id > :cursor_id))", params
+
+
+def _postgres_query(table: str, fields: Sequence[str], after: str) -> str:
+    columns = ", ".join(fields)
+    return (
+        f"SELECT * FROM (SELECT id, ts_rank({SEARCH_VECTOR}, query) AS score, {columns} "
+        f"FROM {table}, to_tsquery('simple', search_unaccent(:query)) AS query "
+        f"WHERE {SEARCH_VECTOR} @@ query) AS hits "
+        f"WHERE true{after} ORDER BY score DESC, id LIMIT :limit"
+    )
+
+
+def _sqlite_query(table: str, fields: Sequence[str], after: str) -> str:
+    index = f"{table}_search"
+    columns = ", ".join(fields)
+    weights = ", ".join(str(TITLE_WEIGHT if position == 0 else OTHER_WEIGHT) for position in range(len(fields)))
+    return (
+        f"SELECT * FROM (SELECT rowid AS id, -bm25({index}, {weights}) AS score, {columns} "
+        f"FROM {index} WHERE {index} MATCH :query) "
+        f"WHERE 1{after} ORDER BY score DESC, id LIMIT :limit"
+    )
+
+
+async def search(
+    db: AsyncSession,
+    query_terms: Sequence[str],
+    types: Sequence[str],
+    limit: int,
+    cursor: Optional[Tuple[float, int, int]] = None,
+) -> Tuple[List[Hit], Optional[Tuple[float, int, int]]]:
+    """Best ``limit`` hits of ``types`` after ``cursor``, and the cursor of the next page.
+
+    ``types`` must be keys of ``SEARCH_FIELDS``; their order decides ties.
+    Each table is asked for ``limit + 1`` hits, so a page costs one
+    ranked query per table whatever the page number.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        query = " & ".join(f"{term}:*" for term in query_terms)
+        build = _postgres_query
+    elif dialect == "sqlite":
+        query = " AND ".join(f'"{term}"*' for term in query_terms)
+        build = _sqlite_query
+    else:
+        raise NotImplementedError(f"Search is not supported on {dialect}")
+
+    hits = []
+    for type_index, table in enumerate(types):
+        fields = SEARCH_FIELDS[table]
+        after, params = _after(type_index, cursor)
+        rows = await db.execute(text(build(table, fields, after)), {"query": query, "limit": limit + 1, **params})
+        hits.extend(Hit(table, row[0], row[1], tuple(row[2:])) for row in rows)
+
+    order = {table: index for index, table in enumerate(types)}
+    hits.sort(key=lambda hit: (-hit.score, order[hit.type], hit.id))
+    next_cursor = None
+    if len(hits) > limit:
+        last = hits[limit - 1]
+        next_cursor = (last.score, order[last.type], last.id)
+    return hits[:limit], next_cursor
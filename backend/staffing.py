@@ -0,0 +1,144 @@
+"""Staff assignment rules and the automatic assignment engine.
+
+An event needs a number of people per role, derived from its guest count
+(``STAFFING_RATIOS``) or given explicitly. A staff member can take an
+event when their status is AVAILABLE and they have no assignment to a
+non-cancelled event overlapping it.
+
+Every staff member has exactly one role and the score of a pick does not
+depend on the other picks, so the optimal assignment for one event is
+the top N candidates of each role. The engine gets them in a single
+query: a NOT EXISTS probe on the (staff_id, event_id) index drops busy
+people and ``row_number()`` partitioned by role ranks the rest.
+"""
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import scheduling
+from models import Event, EventStatus, Staff, StaffAssignment, StaffStatus
+
+# role -> (guests per staff member, minimum per event)
+STAFFING_RATIOS: Dict[str, Tuple[int, int]] = {
+    "Mesero": (15, 1),
+    "Chef": (50, 1),
+    "Sous Chef": (100, 0),
+    "Bartender": (75, 1),
+    "Coordinador": (250, 1),
+    "Personal de Limpieza": (100, 1),
+    "Seguridad": (150, 0),
+}
+
+# Key of the Postgres advisory lock serializing assignment transactions
+ASSIGNMENT_LOCK_KEY = 7_310_001
+
+
+def required_staff(guests_count: int) -> Dict[str, int]:
+    """Number of people needed per role for an event of ``guests_count`` guests"""
+    needed = {}
+    for role, (guests_per_staff, minimum) in STAFFING_RATIOS.items():
+        count = max(minimum, math.ceil(guests_count / guests_per_staff))
+        if count:
+            needed[role] = count
+    return needed
+
+
+def busy_condition(event: Event):
+    """True for staff rows assigned to a non-cancelled event overlapping ``event``"""
+    return exists().where(
+        StaffAssignment.staff_id == Staff.id,
+        StaffAssignment.event_id == Event.id,
+        Event.start_time < event.end_time,
+        Event.start_time > event.start_time - scheduling.MAX_EVENT_DURATION,
+        Event.end_time > event.start_time,
+        Event.status != EventStatus.CANCELLED,
+    ).correlate(Staff)
+
+
+async def lock_assignments(db: AsyncSession):
+    """Serialize assignment writes so two events cannot take the same person at once"""
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(ASSIGNMENT_LOCK_KEY)))
+
+
+async def assigned_by_role(db: AsyncSession, event_id: int) -> Dict[str, int]:
+    """People already assigned to the event, counted per role"""
+    rows = await db.execute(
+        select(Staff.role, func.count())
+        .join(StaffAssignment, StaffAssignment.staff_id == Staff.id)
+        .where(StaffAssignment.event_id == event_id)
+        .group_by(Staff.role)
+    )
+    return dict(rows.all())
+
+
+async def pick_staff(
+    db: AsyncSession,
+    event: Event,
+    needed: Dict[str, int],
+    strategy: str = "rating",
+    min_rating: Optional[float] = None,
+) -> Dict[str, List[int]]:
+    """Best available staff ids per role for ``event``, at most ``needed[role]`` each.
+
+    ``strategy`` "rating" prefers the best rated (cheapest on ties), "cost"
+    the cheapest (best rated on ties).
+    """
+    needed = {role: count for role, count in needed.items() if count > 0}
+    if not needed:
+        return {}
+
+    by_rating = (Staff.rating.desc().nulls_last(), Staff.hourly_rate.asc().nulls_last())
+    by_cost = (Staff.hourly_rate.asc().nulls_last(), Staff.rating.desc().nulls_last())
+    order_by = (*(by_cost if strategy == "cost" else by_rating), Staff.id)
+
+    candidates = select(
+        Staff.id,
+        Staff.role,
+        func.row_number().over(partition_by=Staff.role, order_by=order_by).label("rank"),
+    ).where(
+        Staff.role.in_(needed),
+        Staff.status == StaffStatus.AVAILABLE,
+        ~busy_condition(event),
+    )
+    if min_rating is not None:
+        candidates = candidates.where(Staff.rating >= min_rating)
+    candidates = candidates.subquery()
+
+    rows = await db.execute(
+        select(candidates.c.id, candidates.c.role)
+        .where(candidates.c.rank <= case(needed, value=candidates.c.role, else_=0))
+        .order_by(candidates.c.role, candidates.c.rank)
+    )
+    picked: Dict[str, List[int]] = {}
+    for staff_id, role in rows.all():
+        picked.setdefault(role, []).append(staff_id)
+    return picked
+
+
+async def busy_staff_ids(db: AsyncSession, event: Event, staff_ids: Iterable[int]) -> List[int]:
+    """Subset of ``staff_ids`` already committed to an overlapping event"""
+    return list((await db.scalars(
+        select(Staff.id).where(Staff.id.in_(list(staff_ids)), busy_condition(event))
+    )).all())
+
+
+async def create_assignments(
+    db: AsyncSession,
+    event_id: int,
+    staff_ids: List[int],
+    notes: Optional[str] = None,
+) -> List[StaffAssignment]:
+    """Insert one assignment per staff id with a single executemany and load them back"""
+    if not staff_ids:
+        return []
+    await db.execute(insert(StaffAssignment), [
+        {"event_id": event_id, "staff_id": staff_id, "notes": notes} for staff_id in staff_ids
+    ])
+    return list((await db.scalars(
+        select(StaffAssignment)
+        .where(StaffAssignment.event_id == event_id, StaffAssignment.staff_id.in_(staff_ids))
+        .order_by(StaffAssignment.id)
+    )).all())
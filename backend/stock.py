@@ -0,0 +1,189 @@
+"""Inventory stock movements.
+
+Every change to an item's stock is one atomic conditional UPDATE on
+``inventory_items`` plus one row in the append-only ``stock_movements``
+ledger, in the same transaction:
+
+    movement           current_stock  reserved_stock  available_stock
+    restock            +q                             +q
+    reserve                           +q              -q   needs available >= q
+    release                           -q              +q   needs the event's reservation >= q
+    consume (event)    -q             -q                   needs the event's reservation >= q
+    consume            -q                             -q   needs available >= q
+    adjust             +d                             +d   needs current + d >= reserved
+
+The precondition lives in the WHERE clause of the UPDATE, so concurrent
+writers never lose an update or oversell: they queue on the row lock and
+re-evaluate the condition against the committed values. Checks against
+an event's outstanding reservation read the ledger after the UPDATE,
+while the row lock is held, so they cannot race with another movement of
+the same item. On any ``StockError`` the transaction must be rolled back.
+
+The UPDATE returns the new stock, so movements that change
+``current_stock`` report low-stock crossings to ``alerts`` without
+reading the item again.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import alerts
+from models import InventoryItem, StockMovement, StockMovementType
+
+
+class StockError(Exception):
+    def __init__(self, item_id: int, message: str):
+        super().__init__(message)
+        self.item_id = item_id
+
+
+class ItemNotFound(StockError):
+    pass
+
+
+class InsufficientStock(StockError):
+    pass
+
+
+# movement -> multipliers of the quantity for (current, reserved, available)
+_EFFECTS = {
+    StockMovementType.RESTOCK: (1, 0, 1),
+    StockMovementType.RESERVE: (0, 1, -1),
+    StockMovementType.RELEASE: (0, -1, 1),
+    StockMovementType.ADJUST: (1, 0, 1),
+}
+_CONSUME_RESERVED = (-1, -1, 0)
+_CONSUME_AVAILABLE = (-1, 0, -1)
+
+# Movements that draw on an event's reservation
+_FROM_RESERVATION = (StockMovementType.RELEASE, StockMovementType.CONSUME)
+
+
+def _effects(movement_type: StockMovementType, event_id: Optional[int]):
+    if movement_type == StockMovementType.CONSUME:
+        return _CONSUME_RESERVED if event_id is not None else _CONSUME_AVAILABLE
+    return _EFFECTS[movement_type]
+
+
+def reservation_balance():
+    """Aggregate of reserved minus released/consumed units; pair with ``reservation_movements``"""
+    return func.sum(case(
+        (StockMovement.movement_type == StockMovementType.RESERVE, StockMovement.quantity),
+        else_=-StockMovement.quantity,
+    ))
+
+
+def reservation_movements():
+    return StockMovement.movement_type.in_((StockMovementType.RESERVE, *_FROM_RESERVATION))
+
+
+async def outstanding_reservations(
+    db: AsyncSession,
+    event_id: int,
+    item_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, int]:
+    """Units still reserved for ``event_id`` per item, from the ledger"""
+    query = (
+        select(StockMovement.item_id, reservation_balance())
+        .where(StockMovement.event_id == event_id, reservation_movements())
+        .group_by(StockMovement.item_id)
+    )
+    if item_ids is not None:
+        query = query.where(StockMovement.item_id.in_(list(item_ids)))
+    return {item_id: units for item_id, units in (await db.execute(query)).all() if units}
+
+
+async def _update_stock(
+    db: AsyncSession,
+    item_id: int,
+    movement_type: StockMovementType,
+    quantity: int,
+    event_id: Optional[int],
+):
+    current, reserved, available = (sign * quantity for sign in _effects(movement_type, event_id))
+    values = {}
+    conditions = [InventoryItem.id == item_id]
+    for column, delta in (
+        (InventoryItem.current_stock, current),
+        (InventoryItem.reserved_stock, reserved),
+        (InventoryItem.available_stock, available),
+    ):
+        if delta:
+            values[column.key] = column + delta
+        if delta < 0:
+            conditions.append(column >= -delta)
+    if movement_type == StockMovementType.RESTOCK:
+        values["last_restocked"] = datetime.utcnow()
+
+    row = (await db.execute(
+        update(InventoryItem)
+        .where(*conditions)
+        .values(**values)
+        .returning(InventoryItem.current_stock, InventoryItem.minimum_stock)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if row is None:
+        if await db.scalar(select(InventoryItem.id).where(InventoryItem.id == item_id)) is None:
+            raise ItemNotFound(item_id, f"Inventory item {item_id} not found")
+        raise InsufficientStock(item_id, f"Insufficient stock for inventory item {item_id}")
+    if current:
+        current_stock, minimum_stock = row
+        await alerts.record_transition(
+            db, item_id, alerts.is_low(current_stock - current, minimum_stock), current_stock, minimum_stock
+        )
+
+    if event_id is not None and movement_type in _FROM_RESERVATION:
+        reserved_units = (await outstanding_reservations(db, event_id, [item_id])).get(item_id, 0)
+        if reserved_units < quantity:
+            raise InsufficientStock(
+                item_id,
+                f"Event {event_id} has only {reserved_units} units of inventory item {item_id} reserved"
+            )
+
+
+async def apply_movements(
+    db: AsyncSession,
+    movement_type: StockMovementType,
+    quantities: Dict[int, int],
+    event_id: Optional[int] = None,
+    notes: Optional[str] = None,
+):
+    """Apply one movement per item and append them to the ledger with one executemany.
+
+    Items are updated in id order so concurrent multi-item movements lock
+    rows in the same order and cannot deadlock.
+    """
+    for item_id in sorted(quantities):
+        await _update_stock(db, item_id, movement_type, quantities[item_id], event_id)
+    if quantities:
+        await db.execute(insert(StockMovement), [
+            {
+                "item_id": item_id,
+                "event_id": event_id,
+                "movement_type": movement_type,
+                "quantity": quantity,
+                "notes": notes,
+            }
+            for item_id, quantity in quantities.items()
+        ])
+
+
+async def apply_movement(
+    db: AsyncSession,
+    item_id: int,
+    movement_type: StockMovementType,
+    quantity: int,
+    event_id: Optional[int] = None,
+    notes: Optional[str] = None,
+):
+    await apply_movements(db, movement_type, {item_id: quantity}, event_id=event_id, notes=notes)
+
+
+async def release_event(db: AsyncSession, event_id: int, notes: Optional[str] = None) -> Dict[int, int]:
+    """Release everything still reserved for an event; returns the released units per item"""
+    reserved = await outstanding_reservations(db, event_id)
+    await apply_movements(db, StockMovementType.RELEASE, reserved, event_id=event_id, notes=notes)
+    return reserved
+
@@ -1,15 +1,25 @@
+import asyncio
+import os
+from contextlib import contextmanager
+
+# Define the SQLite URL for testing. Set before the app modules are imported,
+# since they read their configuration at import time; the fixtures below
+# create the schema, so the app's startup step is skipped
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+os.environ["DB_CREATE_SCHEMA"] = "false"
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
-
-from backend.database import Base, get_db
-from backend.main import app # Import your FastAPI app
-from backend.models import Client # Import models that might be needed for pre-population
+from typing import AsyncGenerator, Generator
 
-# Define the SQLite URL for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+from cache import clear_cache
+from database import Base, get_async_db
+from main import app # Import your FastAPI app
+from models import Client # Import models that might be needed for pre-population
 
 # Create a SQLAlchemy engine for SQLite
 engine = create_engine(
@@ -19,6 +29,10 @@ engine = create_engine(
 # Create a sessionmaker to create database sessions
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API runs on the async engine; point it at the same SQLite file
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 # Fixture to create the database tables before tests run and drop them after
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
@@ -30,18 +44,19 @@ def setup_db():
 @pytest.fixture(scope="function")
 def db_session() -> Generator[Session, None, None]:
     """
-    Provides a transactional database session for tests.
-    Rolls back changes after each test.
+    Provides a database session for tests.
+    The API commits through its own async connection, so every table is
+    emptied after each test instead of rolling back a shared transaction.
     """
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal()
 
     yield session
 
     session.close()
-    transaction.rollback()
-    connection.close()
+    asyncio.run(clear_cache())
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
 
 
 @pytest.fixture(scope="function")
@@ -50,16 +65,64 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
     Provides a TestClient instance that uses the test database session.
     """
 
-    def override_get_db() -> Generator[Session, None, None]:
-        try:
-            yield db_session
-        finally:
-            db_session.close() # Ensure session is closed, though rollback handles data
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with TestingAsyncSessionLocal() as session:
+            yield session
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
-    del app.dependency_overrides[get_db] # Clean up override
+    del app.dependency_overrides[get_async_db] # Clean up override
+
+
+@pytest.fixture(scope="function")
+def count_queries():
+    """
+    Counts the SQL statements the API runs, to catch N+1 regressions:
+
+        with count_queries() as statements:
+            client.get("/api/v1/events?include=client")
+        assert len(statements) <= 2
+    """
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
+
+
+@pytest.fixture(scope="function")
+def run_in_session():
+    """
+    Runs a coroutine function with an async session on the test database,
+    for the maintenance code the API does not expose (e.g. rollup rebuilds):
+
+        run_in_session(rollups.rebuild)
+    """
+
+    def run(function):
+        async def main():
+            # A fresh engine: the API's connections belong to the TestClient's event loop
+            engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await function(session)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
 
 
 # Example fixture to pre-populate data if needed for multiple tests
@@ -72,8 +135,7 @@ def test_client_user(db_session: Session) -> Client:
         "name": "Test Client User",
         "email": "testclient@example.com",
         "phone": "1234567890",
-        "company_name": "Test Corp",
-        "notes": "A client for testing purposes"
+        "company": "Test Corp",
     }
     client = Client(**client_data)
     db_session.add(client)
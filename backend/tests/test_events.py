@@ -1,10 +1,29 @@
+import asyncio
+import csv
+import io
+import json
+
 import pytest
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import List
 from datetime import datetime, timedelta, timezone
 
-from backend.models import Event as EventModel, Client as ClientModel # Import your SQLAlchemy models
-from backend.schemas import EventCreate, EventStatus # Import your Pydantic schemas
+import broker
+import cache
+import changefeed
+import query_plans
+import recurrence
+import rollups
+from models import Event as EventModel, Client as ClientModel, EventRollup, InventoryItem # Import your SQLAlchemy models
+from schemas import EventCreate, EventResponse, EventStatus, InventoryItemResponse # Import your Pydantic schemas
+
+# The API stores naive UTC; read both sides of a comparison as UTC instants
+def as_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
 # Helper function to create a valid event payload
 def create_event_payload(client_id: int, venue: str = "Test Venue", days_from_now: int = 7) -> dict:
@@ -40,14 +59,15 @@ def test_create_event_success(client: TestClient, db_session: Session, test_clie
     assert data["name"] == payload["name"]
     assert data["client_id"] == payload["client_id"]
     assert data["venue"] == payload["venue"]
-    assert data["date"] == payload["date"]
+    # The day alone is accepted and stored as midnight
+    assert datetime.fromisoformat(data["date"]) == datetime.fromisoformat(payload["date"])
     # Compare start_time and end_time by parsing them back to datetime objects for robustness
-    assert datetime.fromisoformat(data["start_time"]) == datetime.fromisoformat(payload["start_time"])
-    assert datetime.fromisoformat(data["end_time"]) == datetime.fromisoformat(payload["end_time"])
+    assert as_utc(data["start_time"]) == as_utc(payload["start_time"])
+    assert as_utc(data["end_time"]) == as_utc(payload["end_time"])
     assert data["guests_count"] == payload["guests_count"]
     assert data["budget"] == payload["budget"]
     assert data["notes"] == payload["notes"]
-    assert data["status"] == EventStatus.PLANNED.value # Check default status
+    assert data["status"] == EventStatus.PLANNING.value # Check default status
 
     # Verify the event was saved to the database
     db_event = db_session.query(EventModel).filter(EventModel.id == data["id"]).first()
@@ -57,9 +77,9 @@ def test_create_event_success(client: TestClient, db_session: Session, test_clie
     assert db_event.venue == payload["venue"]
     # For datetime fields, ensure they are stored correctly (potentially with timezone awareness)
     # Date comparison needs care if stored as datetime in DB
-    assert db_event.date.isoformat() == payload["date"]
-    assert db_event.start_time.isoformat() == payload["start_time"]
-    assert db_event.end_time.isoformat() == payload["end_time"]
+    assert db_event.date.date().isoformat() == payload["date"]
+    assert as_utc(db_event.start_time.isoformat()) == as_utc(payload["start_time"])
+    assert as_utc(db_event.end_time.isoformat()) == as_utc(payload["end_time"])
 
 
 def test_create_event_missing_client(client: TestClient):
@@ -72,7 +92,7 @@ def test_create_event_missing_client(client: TestClient):
 
     assert response.status_code == 404
     data = response.json()
-    assert "Client not found" in data["detail"]
+    assert "Cliente no encontrado" in data["detail"]
 
 
 def test_create_event_venue_conflict(client: TestClient, db_session: Session, test_client_user: ClientModel):
@@ -93,7 +113,7 @@ def test_create_event_venue_conflict(client: TestClient, db_session: Session, te
 
     assert response2.status_code == 400
     data = response2.json()
-    assert "Venue is already booked for this date" in data["detail"]
+    assert "El venue no está disponible en ese horario" in data["detail"]
 
 
 def test_get_events_empty(client: TestClient):
@@ -135,6 +155,48 @@ def test_get_events_with_data(client: TestClient, db_session: Session, test_clie
     # Further checks can be done to ensure all data matches
 
 
+def test_cursor_pagination_walks_ties_and_rejects_foreign_cursors(client: TestClient, test_client_user: ClientModel):
+    """
+    Walking the list with X-Next-Cursor visits every event once, even when the sort column ties.
+    """
+    created = []
+    for index, name in enumerate(["B", "A", "B", "B", "A"]):
+        payload = create_event_payload(client_id=test_client_user.id, venue=f"Venue {index}", days_from_now=5)
+        payload["name"] = name
+        response = client.post("/api/v1/events", json=payload)
+        assert response.status_code == 200
+        created.append(response.json()["id"])
+
+    for sort in ("name", "-name"):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"sort": sort, "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/events", params=params)
+            assert response.status_code == 200
+            seen.extend((event["name"], event["id"]) for event in response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        # The last page is short and carries no cursor
+        assert pages == 3
+        assert len(response.json()) == 1
+        expected = sorted((name, event_id) for event_id, name in zip(created, ["B", "A", "B", "B", "A"]))
+        assert seen == (expected[::-1] if sort == "-name" else expected)
+
+    first_page = client.get("/api/v1/events", params={"sort": "name", "limit": 2})
+    cursor = first_page.headers["X-Next-Cursor"]
+    # A cursor only continues the order it was issued for
+    response = client.get("/api/v1/events", params={"sort": "start_time", "limit": 2, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+    response = client.get("/api/v1/events", params={"sort": "name", "limit": 2, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
 def test_get_event_by_id_success(client: TestClient, db_session: Session, test_client_user: ClientModel):
     """
     Test getting a single event by its ID successfully.
@@ -152,8 +214,8 @@ def test_get_event_by_id_success(client: TestClient, db_session: Session, test_c
     assert data["id"] == event_id
     assert data["name"] == payload["name"]
     assert data["venue"] == payload["venue"]
-    assert data["date"] == payload["date"]
-    assert datetime.fromisoformat(data["start_time"]) == datetime.fromisoformat(payload["start_time"])
+    assert datetime.fromisoformat(data["date"]) == datetime.fromisoformat(payload["date"])
+    assert as_utc(data["start_time"]) == as_utc(payload["start_time"])
 
 
 def test_get_event_by_id_not_found(client: TestClient):
@@ -164,4 +226,713 @@ def test_get_event_by_id_not_found(client: TestClient):
     response = client.get(f"/api/v1/events/{non_existent_event_id}")
     assert response.status_code == 404
     data = response.json()
-    assert "Event not found" in data["detail"]
+    assert "Evento no encontrado" in data["detail"]
+
+
+def test_create_event_overlapping_time_conflict(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a booking overlapping another one in the same venue is rejected,
+    while an adjacent booking is accepted.
+    """
+    initial_payload = create_event_payload(client_id=test_client_user.id, venue="Overlap Hall", days_from_now=12)
+    response1 = client.post("/api/v1/events", json=initial_payload)
+    assert response1.status_code == 200
+
+    overlapping_payload = create_event_payload(client_id=test_client_user.id, venue="Overlap Hall", days_from_now=12)
+    overlapping_payload["start_time"] = (datetime.fromisoformat(initial_payload["start_time"]) + timedelta(hours=1)).isoformat()
+    overlapping_payload["end_time"] = (datetime.fromisoformat(initial_payload["end_time"]) + timedelta(hours=1)).isoformat()
+    response2 = client.post("/api/v1/events", json=overlapping_payload)
+    assert response2.status_code == 400
+
+    adjacent_payload = create_event_payload(client_id=test_client_user.id, venue="Overlap Hall", days_from_now=12)
+    adjacent_payload["start_time"] = initial_payload["end_time"]
+    adjacent_payload["end_time"] = (datetime.fromisoformat(initial_payload["end_time"]) + timedelta(hours=2)).isoformat()
+    response3 = client.post("/api/v1/events", json=adjacent_payload)
+    assert response3.status_code == 200
+
+
+def test_update_event_into_overlap_conflict(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that moving an event onto another booking of the same venue is rejected.
+    """
+    first_payload = create_event_payload(client_id=test_client_user.id, venue="Update Hall", days_from_now=14)
+    assert client.post("/api/v1/events", json=first_payload).status_code == 200
+
+    second_payload = create_event_payload(client_id=test_client_user.id, venue="Update Hall", days_from_now=15)
+    second_response = client.post("/api/v1/events", json=second_payload)
+    assert second_response.status_code == 200
+
+    response = client.put(
+        f"/api/v1/events/{second_response.json()['id']}",
+        json={"start_time": first_payload["start_time"], "end_time": first_payload["end_time"]},
+    )
+    assert response.status_code == 400
+
+
+def test_bulk_import_events_reports_per_row_results(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a bulk import creates valid rows and reports conflicting or invalid ones.
+    """
+    first = create_event_payload(client_id=test_client_user.id, venue="Bulk Hall", days_from_now=20)
+    overlapping = create_event_payload(client_id=test_client_user.id, venue="Bulk Hall", days_from_now=20)
+    missing_client = create_event_payload(client_id=99999, venue="Other Hall", days_from_now=20)
+    invalid = {"name": "Incomplete"}
+
+    response = client.post("/api/v1/events/bulk", json=[first, overlapping, missing_client, invalid])
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["created"] == 1
+    assert data["failed"] == 3
+    statuses = [result["status"] for result in data["results"]]
+    assert statuses == ["created", "error", "error", "error"]
+    assert client.get(f"/api/v1/events/{data['results'][0]['id']}").status_code == 200
+
+    response = client.post("/api/v1/events/bulk?all_or_nothing=true", json=[overlapping])
+    assert response.status_code == 422
+
+
+def test_get_event_reflects_update_after_cached_read(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a cached event detail is invalidated when the event is updated.
+    """
+    payload = create_event_payload(client_id=test_client_user.id, venue="Cache Hall", days_from_now=25)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+
+    assert client.get(f"/api/v1/events/{event_id}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/api/v1/events/{event_id}").headers["X-Cache"] == "HIT"
+
+    assert client.put(f"/api/v1/events/{event_id}", json={"name": "Renamed Event"}).status_code == 200
+    response = client.get(f"/api/v1/events/{event_id}")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["name"] == "Renamed Event"
+
+
+def test_memory_cache_forgets_tag_versions_without_serving_stale_entries(client: TestClient, test_client_user: ClientModel, monkeypatch):
+    """
+    Test that the in-memory tag versions stay bounded and evicting one only causes misses.
+    """
+    monkeypatch.setattr(cache.backend, "max_tags", 2)
+    payload = create_event_payload(client_id=test_client_user.id, venue="Cache Hall", days_from_now=25)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+    assert client.get(f"/api/v1/events/{event_id}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/api/v1/events/{event_id}").headers["X-Cache"] == "HIT"
+
+    # Writes to other resources push the event tags out of the version table
+    for index in range(3):
+        client.post("/api/v1/clients", json={"name": f"Other {index}", "email": f"other{index}@example.com", "phone": "555-0100"})
+    assert len(cache.backend._versions) <= 2
+    assert client.get(f"/api/v1/events/{event_id}").headers["X-Cache"] == "MISS"
+
+    assert client.put(f"/api/v1/events/{event_id}", json={"name": "Renamed Event"}).status_code == 200
+    response = client.get(f"/api/v1/events/{event_id}")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["name"] == "Renamed Event"
+    assert client.get(f"/api/v1/events/{event_id}").json()["name"] == "Renamed Event"
+
+def test_event_conditional_requests(client: TestClient, test_client_user: ClientModel):
+    """
+    Test If-None-Match on reads and If-Match on writes for an event.
+    """
+    payload = create_event_payload(client_id=test_client_user.id, venue="ETag Hall", days_from_now=30)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+
+    etag = client.get(f"/api/v1/events/{event_id}").headers["ETag"]
+    response = client.get(f"/api/v1/events/{event_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.put(f"/api/v1/events/{event_id}", json={"name": "First"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    response = client.put(f"/api/v1/events/{event_id}", json={"name": "Second"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/api/v1/events/{event_id}").json()["name"] == "First"
+
+def test_staff_status_update_sets_etag_and_404s(client: TestClient):
+    """
+    Test that a staff status change honours If-Match, returns the new ETag and 404s for unknown staff.
+    """
+    member = client.post("/api/v1/staff/", json={"name": "Eva", "email": "eva@example.com", "role": "waiter"}).json()
+    etag = client.get(f"/api/v1/staff/{member['id']}").headers["ETag"]
+
+    response = client.put(f"/api/v1/staff/{member['id']}/status", params={"status": "busy"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["status"] == "busy"
+    assert response.headers["ETag"] == client.get(f"/api/v1/staff/{member['id']}").headers["ETag"] != etag
+
+    response = client.put(f"/api/v1/staff/{member['id']}/status", params={"status": "available"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.put("/api/v1/staff/9999/status", params={"status": "busy"}).status_code == 404
+
+
+def test_auto_assign_staff_skips_busy_staff(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that auto-assignment fills roles and never books a person on two overlapping events.
+    """
+    for index in range(3):
+        response = client.post("/api/v1/staff", json={
+            "name": f"Mesero {index}",
+            "email": f"mesero{index}@example.com",
+            "role": "Mesero",
+            "hourly_rate": 20 + index,
+        })
+        assert response.status_code == 200
+
+    first = create_event_payload(client_id=test_client_user.id, venue="Staff Hall A", days_from_now=40)
+    second = create_event_payload(client_id=test_client_user.id, venue="Staff Hall B", days_from_now=40)
+    first_id = client.post("/api/v1/events", json=first).json()["id"]
+    second_id = client.post("/api/v1/events", json=second).json()["id"]
+
+    response = client.post(f"/api/v1/events/{first_id}/staff/auto", json={"roles": {"Mesero": 2}})
+    assert response.status_code == 200
+    first_staff = set(response.json()["assigned"]["Mesero"])
+    assert len(first_staff) == 2
+
+    response = client.post(f"/api/v1/events/{second_id}/staff/auto", json={"roles": {"Mesero": 2}})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["assigned"]["Mesero"]) == 1
+    assert not first_staff & set(data["assigned"]["Mesero"])
+    assert data["missing"] == {"Mesero": 1}
+
+
+def test_check_availability_batch_reports_venue_conflicts(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that the batch availability check flags a candidate overlapping an existing booking.
+    """
+    payload = create_event_payload(client_id=test_client_user.id, venue="Planning Hall", days_from_now=50)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+
+    overlapping = {key: payload[key] for key in ("venue", "start_time", "end_time", "guests_count")}
+    free_day = dict(overlapping, venue="Other Planning Hall")
+    response = client.post("/api/v1/events/availability", json={
+        "event_ids": [event_id],
+        "candidates": [overlapping, free_day],
+    })
+    assert response.status_code == 200
+    results = response.json()
+
+    assert [result["event_id"] for result in results] == [event_id, None, None]
+    assert [result["venue_available"] for result in results] == [True, False, True]
+    assert all("staff" in result and "inventory" in result for result in results)
+
+
+def test_stock_reservations_are_all_or_nothing_and_released_on_cancel(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a reservation exceeding the available stock reserves nothing and that cancelling frees it.
+    """
+    plates = client.post("/api/v1/inventory/", json={
+        "name": "Plates", "category": "Vajilla", "current_stock": 100, "minimum_stock": 10, "maximum_stock": 500,
+    }).json()
+    glasses = client.post("/api/v1/inventory/", json={
+        "name": "Glasses", "category": "Cristalería", "current_stock": 10, "minimum_stock": 5, "maximum_stock": 500,
+    }).json()
+    payload = create_event_payload(client_id=test_client_user.id, venue="Stock Hall", days_from_now=60)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+
+    response = client.post("/api/v1/inventory/reservations", json={"event_id": event_id, "items": [
+        {"item_id": plates["id"], "quantity": 80},
+        {"item_id": glasses["id"], "quantity": 20},
+    ]})
+    assert response.status_code == 409
+    assert client.get(f"/api/v1/inventory/{plates['id']}").json()["available_stock"] == 100
+
+    response = client.post("/api/v1/inventory/reservations", json={"event_id": event_id, "items": [
+        {"item_id": plates["id"], "quantity": 80},
+    ]})
+    assert response.status_code == 200
+    assert response.json()[0]["reserved_stock"] == 80
+    assert response.json()[0]["available_stock"] == 20
+
+    response = client.put(f"/api/v1/events/{event_id}", json={"status": EventStatus.CANCELLED.value})
+    assert response.status_code == 200
+    item = client.get(f"/api/v1/inventory/{plates['id']}").json()
+    assert (item["current_stock"], item["reserved_stock"], item["available_stock"]) == (100, 0, 100)
+
+
+def test_low_stock_alert_opens_and_resolves_on_crossings(client: TestClient):
+    """
+    Test that consuming below the minimum opens an alert and restocking resolves it.
+    """
+    item = client.post("/api/v1/inventory/", json={
+        "name": "Napkins", "category": "Mantelería", "current_stock": 30, "minimum_stock": 10, "maximum_stock": 200,
+    }).json()
+
+    response = client.post(f"/api/v1/inventory/{item['id']}/movements", json={"movement_type": "consume", "quantity": 25})
+    assert response.status_code == 200
+    open_alerts = client.get("/api/v1/inventory/alerts").json()
+    assert [(alert["item_id"], alert["current_stock"]) for alert in open_alerts] == [(item["id"], 5)]
+
+    response = client.put(f"/api/v1/inventory/{item['id']}/restock?quantity=50")
+    assert response.status_code == 200
+    assert client.get("/api/v1/inventory/alerts").json() == []
+    resolved = client.get("/api/v1/inventory/alerts?include_resolved=true").json()
+    assert resolved[0]["resolved_at"] is not None
+
+
+def test_change_feed_records_writes_in_sequence(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that writes are announced on the change feed and can be replayed from a sequence number.
+    """
+    start = changefeed.buffer.last_seq
+    payload = create_event_payload(client_id=test_client_user.id, venue="Feed Hall", days_from_now=70)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+    client.put(f"/api/v1/events/{event_id}", json={"guests_count": 120})
+    client.delete(f"/api/v1/events/{event_id}")
+
+    changes = changefeed.buffer.since(start)
+    assert [(change["resource"], change["action"], change["ids"]) for change in changes] == [
+        ("events", "created", [event_id]),
+        ("events", "updated", [event_id]),
+        ("events", "deleted", [event_id]),
+    ]
+    assert [change["seq"] for change in changes] == list(range(start + 1, start + 4))
+    assert changefeed.buffer.since(start + 3) == []
+    assert changefeed.buffer.since(start + 10) is None
+
+
+def test_change_feed_listener_resubscribes_and_resets_streams(monkeypatch):
+    """
+    Test that the Redis listener survives a dropped connection and tells open streams to reload.
+    """
+    class FakePubSub:
+        def __init__(self, messages):
+            self.messages = messages
+
+        async def subscribe(self, channel):
+            pass
+
+        async def listen(self):
+            for message in self.messages:
+                if isinstance(message, Exception):
+                    raise message
+                yield message
+            await asyncio.Event().wait()
+
+        async def aclose(self):
+            pass
+
+    class FakeRedis:
+        def __init__(self):
+            self.seq = 0
+            self.connections = [
+                [{"type": "message", "data": b'1 {"resource": "events"}'}, ConnectionError("connection lost")],
+                [{"type": "message", "data": b'4 {"resource": "staff"}'}],
+            ]
+
+        def pubsub(self):
+            # The second subscription sees the changes published while disconnected
+            self.seq = 3 if self.seq else 1
+            return FakePubSub(self.connections.pop(0))
+
+        async def get(self, key):
+            return str(self.seq).encode()
+
+    async def main():
+        monkeypatch.setattr(changefeed, "_RECONNECT_INITIAL_SECONDS", 0)
+        monkeypatch.setattr(changefeed, "buffer", changefeed.ChangeBuffer(10))
+        redis = FakeRedis()
+        pubsub, changefeed.buffer.last_seq = await changefeed._subscribe(redis)
+        subscription = broker.subscribe(changefeed.CHANGES_TOPIC)
+        listener = asyncio.create_task(changefeed._listen(redis, pubsub))
+        try:
+            received = [await subscription.get(timeout=1) for _ in range(2)]
+        finally:
+            listener.cancel()
+            subscription.close()
+        return received
+
+    reset, change = asyncio.run(main())
+    assert reset == {"seq": 3, "reset": True}
+    assert change["seq"] == 4 and change["resource"] == "staff"
+    assert changefeed.buffer.since(3) == [change]
+    assert changefeed.buffer.since(1) is None
+
+
+def test_list_events_with_includes_runs_constant_queries(client: TestClient, test_client_user: ClientModel, count_queries):
+    """
+    Test that include= eager loads relationships for the whole page instead of one query per event.
+    """
+    for days in range(80, 86):
+        payload = create_event_payload(client_id=test_client_user.id, venue=f"Include Hall {days}", days_from_now=days)
+        assert client.post("/api/v1/events", json=payload).status_code == 200
+
+    with count_queries() as statements:
+        response = client.get("/api/v1/events?include=client,staff_assignments")
+    assert response.status_code == 200
+    events = response.json()
+    assert len(events) == 6
+    assert all(event["client"]["id"] == test_client_user.id for event in events)
+    assert all(event["staff_assignments"] == [] for event in events)
+    # The page, then the assignments of every event in one SELECT ... IN
+    assert len(statements) <= 3
+
+    response = client.get("/api/v1/events")
+    assert "client" not in response.json()[0]
+    assert client.get("/api/v1/events?include=invoices").status_code == 400
+
+
+def test_metrics_endpoint_reports_route_latency_and_queries(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that /metrics exposes per-route histograms labelled with the route template.
+    """
+    payload = create_event_payload(client_id=test_client_user.id, venue="Metrics Hall", days_from_now=90)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+    client.get(f"/api/v1/events/{event_id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    route = 'method="GET",route="/api/v1/events/{event_id}"'
+    assert f"http_request_duration_seconds_count{{{route}}}" in body
+    assert f"http_request_db_queries_bucket{{{route},le=\"+Inf\"}}" in body
+    assert f'http_requests_total{{{route},status="200"}}' in body
+    assert f"/api/v1/events/{event_id}" not in body
+
+
+def test_hot_queries_use_their_indexes(db_session: Session):
+    """
+    Test that EXPLAIN picks the intended index for every hot query.
+    """
+    with db_session.get_bind().connect() as connection:
+        results = query_plans.check(connection)
+    assert [result.name for result in results if not result.ok] == []
+
+
+def test_export_events_streams_filtered_rows(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that the export streams every matching event as CSV or NDJSON with the list filters.
+    """
+    ids = []
+    for days in range(100, 104):
+        payload = create_event_payload(client_id=test_client_user.id, venue=f"Export Hall {days}", days_from_now=days)
+        ids.append(client.post("/api/v1/events", json=payload).json()["id"])
+    client.put(f"/api/v1/events/{ids[0]}", json={"status": "confirmed"})
+
+    response = client.get("/api/v1/events/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="events-')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == ids
+    assert rows[0]["status"] == "confirmed"
+
+    response = client.get("/api/v1/events/export", params={"format": "ndjson", "status_filter": "planning"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in exported] == ids[1:]
+    # The list endpoint applies the same filter
+    assert [event["id"] for event in client.get("/api/v1/events?status_filter=planning").json()] == ids[1:]
+
+    date_from = (datetime.now(timezone.utc).date() + timedelta(days=101)).isoformat()
+    date_to = (datetime.now(timezone.utc).date() + timedelta(days=103)).isoformat()
+    response = client.get("/api/v1/events/export", params={"format": "ndjson", "date_from": date_from, "date_to": date_to})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids[1:3]
+
+    assert client.get("/api/v1/events/export", params={"format": "xml"}).status_code == 400
+
+
+def test_staff_batch_upserts_by_email_and_deletes_unassigned(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a staff batch creates and updates by email in one response and deletes only unassigned members.
+    """
+    existing = client.post("/api/v1/staff/", json={"name": "Ana", "email": "ana@example.com", "role": "waiter"}).json()
+    response = client.post("/api/v1/staff/batch", json=[
+        {"name": "Ana Gómez", "email": "ana@example.com", "role": "waiter", "hourly_rate": 18},
+        {"name": "Luis", "email": "luis@example.com", "role": "chef"},
+        {"name": "Luis bis", "email": "luis@example.com", "role": "chef"},
+        {"name": "Sin correo", "role": "chef"},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["updated"], body["failed"]) == (1, 1, 2)
+    assert [result["status"] for result in body["results"]] == ["updated", "created", "error", "error"]
+    assert body["results"][0]["id"] == existing["id"]
+    member = client.get(f"/api/v1/staff/{existing['id']}").json()
+    assert (member["name"], member["hourly_rate"]) == ("Ana Gómez", 18)
+    assert member["updated_at"] != existing["updated_at"]
+
+    response = client.post("/api/v1/staff/batch?all_or_nothing=true", json=[
+        {"name": "Marta", "email": "marta@example.com", "role": "dj"},
+        {"name": "Sin correo", "role": "dj"},
+    ])
+    assert response.status_code == 422
+    assert [member["email"] for member in client.get("/api/v1/staff").json()] == ["ana@example.com", "luis@example.com"]
+
+    payload = create_event_payload(client_id=test_client_user.id, venue="Batch Hall", days_from_now=110)
+    event_id = client.post("/api/v1/events", json=payload).json()["id"]
+    client.post(f"/api/v1/events/{event_id}/staff", json={"staff_ids": [existing["id"]]})
+    luis = body["results"][1]["id"]
+    response = client.post("/api/v1/staff/batch/delete", json={"ids": [existing["id"], luis, 9999]})
+    assert [(result["id"], result["status"]) for result in response.json()["results"]] == [
+        (existing["id"], "error"), (luis, "deleted"), (9999, "error"),
+    ]
+    assert client.get(f"/api/v1/staff/{luis}").status_code == 404
+
+
+def test_inventory_batch_upserts_by_name_and_location_through_the_ledger(client: TestClient):
+    """
+    Test that an inventory batch matches items by name and location and records stock changes as adjustments.
+    """
+    chairs = client.post("/api/v1/inventory/", json={
+        "name": "Chairs", "category": "Mobiliario", "current_stock": 50, "minimum_stock": 10,
+        "maximum_stock": 300, "location": "A",
+    }).json()
+    response = client.post("/api/v1/inventory/batch", json=[
+        {"name": "Chairs", "category": "Mobiliario", "current_stock": 8, "minimum_stock": 10,
+         "maximum_stock": 300, "location": "A"},
+        {"name": "Chairs", "category": "Mobiliario", "current_stock": 20, "minimum_stock": 5,
+         "maximum_stock": 100, "location": "B"},
+        {"name": "Tables", "category": "Mobiliario", "current_stock": -1},
+    ])
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["updated", "created", "error"]
+    assert body["results"][0]["id"] == chairs["id"]
+
+    item = client.get(f"/api/v1/inventory/{chairs['id']}").json()
+    assert (item["current_stock"], item["available_stock"]) == (8, 8)
+    movements = client.get(f"/api/v1/inventory/{chairs['id']}/movements").json()
+    assert [(movement["movement_type"], movement["quantity"]) for movement in movements] == [("adjust", -42)]
+    assert [alert["item_id"] for alert in client.get("/api/v1/inventory/alerts").json()] == [chairs["id"]]
+    created = client.get(f"/api/v1/inventory/{body['results'][1]['id']}").json()
+    assert (created["current_stock"], created["available_stock"], created["location"]) == (20, 20, "B")
+
+    response = client.post("/api/v1/inventory/batch/delete", json={"ids": [chairs["id"], created["id"]]})
+    assert [result["status"] for result in response.json()["results"]] == ["error", "deleted"]
+    assert [item["id"] for item in client.get("/api/v1/inventory").json()] == [chairs["id"]]
+
+
+def test_list_fast_path_matches_response_models(client: TestClient, db_session: Session, test_client_user: ClientModel):
+    """
+    Test that the lists encoded from plain columns are byte for byte what the response models produce.
+    """
+    for days in (120, 121):
+        payload = create_event_payload(client_id=test_client_user.id, venue=f"Fast Hall {days}", days_from_now=days)
+        event_id = client.post("/api/v1/events", json={**payload, "notes": "Menú vegano ñ"}).json()["id"]
+    client.put(f"/api/v1/events/{event_id}", json={"status": "confirmed", "budget": 2500})
+    client.post("/api/v1/inventory/", json={
+        "name": "Cups", "category": "Cristalería", "current_stock": 40, "minimum_stock": 5, "maximum_stock": 100,
+    })
+
+    for url, model, response_model in (
+        ("/api/v1/events", EventModel, EventResponse),
+        ("/api/v1/inventory", InventoryItem, InventoryItemResponse),
+    ):
+        rows = db_session.scalars(select(model).order_by(model.id)).all()
+        adapter = TypeAdapter(List[response_model])
+        response = client.get(url)
+        assert response.content == adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+        # The ETag still comes from the rows, so it is the same on both paths
+        assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_search_ranks_clients_events_and_staff_ignoring_accents(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that search matches word prefixes without accents across resources, pages with a cursor and follows updates.
+    """
+    garcia = client.post("/api/v1/clients/", json={"name": "María García", "email": "maria@example.com", "company": "Grupo Pérez"}).json()
+    payload = create_event_payload(client_id=garcia["id"], venue="Jardín Central", days_from_now=130)
+    wedding = client.post("/api/v1/events", json={**payload, "name": "Boda García-López"}).json()
+    payload = create_event_payload(client_id=garcia["id"], venue="Salón Norte", days_from_now=131)
+    client.post("/api/v1/events", json={**payload, "name": "Conferencia anual", "notes": "Catering de García"})
+    chef = client.post("/api/v1/staff/", json={"name": "Luis Garcia", "email": "luis@example.com", "role": "Chef"}).json()
+
+    response = client.get("/api/v1/search", params={"q": "boda GARCIA"})
+    assert response.status_code == 200
+    assert [(hit["type"], hit["id"], hit["title"]) for hit in response.json()] == [("events", wedding["id"], "Boda García-López")]
+    assert response.json()[0]["details"] == {"venue": "Jardín Central", "notes": wedding["notes"]}
+
+    hits = client.get("/api/v1/search", params={"q": "garc"}).json()
+    assert len(hits) == 4
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+    # A match in the title outranks one in the notes
+    assert [hit["title"] for hit in hits if hit["type"] == "events"] == ["Boda García-López", "Conferencia anual"]
+
+    first = client.get("/api/v1/search", params={"q": "garc", "limit": 3})
+    rest = client.get("/api/v1/search", params={"q": "garc", "limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [(hit["type"], hit["id"]) for hit in first.json() + rest.json()] == [(hit["type"], hit["id"]) for hit in hits]
+    assert "x-next-cursor" not in rest.headers
+    assert client.get("/api/v1/search", params={"q": "luis", "cursor": first.headers["x-next-cursor"]}).status_code == 400
+
+    assert [hit["id"] for hit in client.get("/api/v1/search", params={"q": "garc", "types": "staff"}).json()] == [chef["id"]]
+    client.put(f"/api/v1/staff/{chef['id']}", json={"name": "Luis Ortega", "email": "luis@example.com", "role": "Chef"})
+    assert client.get("/api/v1/search", params={"q": "garc", "types": "staff"}).json() == []
+    assert client.get("/api/v1/search", params={"q": "ortega"}).json()[0]["id"] == chef["id"]
+
+    assert client.get("/api/v1/search", params={"q": "a"}).status_code == 400
+    assert client.get("/api/v1/search", params={"q": "garc", "types": "suppliers"}).status_code == 400
+
+
+def test_calendar_groups_events_by_day_with_venue_occupancy(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that the calendar lists events on every day they touch and keeps occupancy in step with writes.
+    """
+    day = datetime.now(timezone.utc).date() + timedelta(days=150)
+    night = create_event_payload(client_id=test_client_user.id, venue="Calendar Hall", days_from_now=150)
+    night["start_time"] = f"{day.isoformat()}T22:00:00+00:00"
+    night["end_time"] = f"{(day + timedelta(days=1)).isoformat()}T02:00:00+00:00"
+    night_id = client.post("/api/v1/events", json=night).json()["id"]
+    lunch = create_event_payload(client_id=test_client_user.id, venue="Calendar Garden", days_from_now=150)
+    lunch_id = client.post("/api/v1/events", json=lunch).json()["id"]
+    client.post("/api/v1/staff", json={"name": "Mesera Calendario", "email": "calendario@example.com", "role": "Mesero"})
+    assert client.post(f"/api/v1/events/{night_id}/staff/auto", json={"roles": {"Mesero": 1}}).status_code == 200
+
+    params = {"from": day.isoformat(), "to": (day + timedelta(days=3)).isoformat()}
+    response = client.get("/api/v1/events/calendar", params=params)
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert [entry["date"] for entry in days] == [(day + timedelta(days=offset)).isoformat() for offset in range(3)]
+    assert [event["id"] for event in days[0]["events"]] == [lunch_id, night_id]
+    assert [event["id"] for event in days[1]["events"]] == [night_id]
+    assert days[2]["events"] == []
+    assert days[0]["venues"] == [
+        {"venue": "Calendar Garden", "events_count": 1, "booked_minutes": 120, "staff_count": 0},
+        {"venue": "Calendar Hall", "events_count": 1, "booked_minutes": 120, "staff_count": 1},
+    ]
+    assert days[1]["venues"] == [{"venue": "Calendar Hall", "events_count": 1, "booked_minutes": 120, "staff_count": 1}]
+    assert days[0]["staff_count"] == 1
+
+    client.put(f"/api/v1/events/{lunch_id}", json={"status": "cancelled"})
+    days = client.get("/api/v1/events/calendar", params={**params, "venue": "Calendar Garden"}).json()["days"]
+    assert days[0]["events"] == [] and days[0]["venues"] == []
+    days = client.get("/api/v1/events/calendar", params={**params, "include_events": False}).json()["days"]
+    assert days[0]["events"] == []
+    assert [venue["venue"] for venue in days[0]["venues"]] == ["Calendar Hall"]
+
+    assert client.get("/api/v1/events/calendar", params={"from": params["to"], "to": params["from"]}).status_code == 400
+    assert client.get("/api/v1/events/calendar", params={"from": "2026-01-01", "to": "2028-01-01"}).status_code == 400
+
+def test_series_expands_occurrences_lazily_and_checks_the_venue(client: TestClient, test_client_user: ClientModel):
+    """
+    Test that a weekly series books its venue without stored occurrences, in the calendar and the overlap check.
+    """
+    first = datetime.now(timezone.utc).date() + timedelta(days=200)
+    payload = {
+        "name": "Comité semanal",
+        "client_id": test_client_user.id,
+        "event_type": "Corporate",
+        "venue": "Series Room",
+        "guests_count": 20,
+        "budget": 800.0,
+        "start_time": f"{first.isoformat()}T09:00:00+00:00",
+        "end_time": f"{first.isoformat()}T11:00:00+00:00",
+        "rrule": "FREQ=WEEKLY;COUNT=4",
+    }
+    taken = create_event_payload(client_id=test_client_user.id, venue="Series Room", days_from_now=207)
+    taken_id = client.post("/api/v1/events", json=taken).json()["id"]
+
+    # The second week is taken by an event: rejected unless that occurrence is skipped
+    response = client.post("/api/v1/series", json=payload)
+    assert response.status_code == 400
+    assert (first + timedelta(days=7)).isoformat() in response.json()["detail"]
+    response = client.post("/api/v1/series", params={"skip_conflicts": True}, json=payload)
+    assert response.status_code == 200
+    series = response.json()
+    assert series["exdates"] == [f"{(first + timedelta(days=7)).isoformat()}T09:00:00"]
+    assert as_utc(series["last_end"]) == as_utc(f"{(first + timedelta(days=21)).isoformat()}T11:00:00+00:00")
+    assert client.post("/api/v1/series", json={**payload, "rrule": "FREQ=HOURLY"}).status_code == 400
+    # Rules that would take unbounded time to expand are rejected
+    response = client.post("/api/v1/series", json={**payload, "rrule": "FREQ=WEEKLY;INTERVAL=0"})
+    assert response.status_code == 400
+    assert "INTERVAL" in response.json()["detail"]
+    response = client.post("/api/v1/series", json={**payload, "rrule": "FREQ=DAILY;UNTIL=99991231"})
+    assert response.status_code == 400
+    assert str(recurrence.MAX_COUNT) in response.json()["detail"]
+
+    window = {"from": first.isoformat(), "to": (first + timedelta(days=28)).isoformat()}
+    occurrences = client.get(f"/api/v1/series/{series['id']}/occurrences", params=window).json()
+    starts = [as_utc(occurrence["start_time"]).date() for occurrence in occurrences]
+    assert starts == [first, first + timedelta(days=14), first + timedelta(days=21)]
+
+    # Occurrences book the venue like events
+    clash = create_event_payload(client_id=test_client_user.id, venue="Series Room", days_from_now=214)
+    assert client.post("/api/v1/events", json=clash).status_code == 400
+
+    days = client.get("/api/v1/events/calendar", params={**window, "venue": "Series Room"}).json()["days"]
+    assert [event["series_id"] for event in days[0]["events"]] == [series["id"]]
+    assert days[0]["events"][0]["id"] is None
+    assert days[0]["venues"] == [{"venue": "Series Room", "events_count": 1, "booked_minutes": 120, "staff_count": 0}]
+    assert [event["id"] for event in days[7]["events"]] == [taken_id]
+
+    # Materializing turns the occurrence into an event; skipping frees the slot
+    start = f"{(first + timedelta(days=14)).isoformat()}T09:00:00+00:00"
+    response = client.post(f"/api/v1/series/{series['id']}/occurrences/materialize", json={"start_time": start})
+    assert response.status_code == 200
+    event = response.json()
+    assert event["series_id"] == series["id"] and event["venue"] == "Series Room"
+    days = client.get("/api/v1/events/calendar", params={**window, "venue": "Series Room"}).json()["days"]
+    assert [item["id"] for item in days[14]["events"]] == [event["id"]]
+    assert days[14]["venues"][0]["events_count"] == 1
+    assert client.post(f"/api/v1/series/{series['id']}/occurrences/materialize", json={"start_time": start}).status_code == 404
+
+    start = f"{(first + timedelta(days=21)).isoformat()}T09:00:00+00:00"
+    assert client.post(f"/api/v1/series/{series['id']}/occurrences/skip", json={"start_time": start}).status_code == 200
+    assert client.post("/api/v1/events", json=create_event_payload(
+        client_id=test_client_user.id, venue="Series Room", days_from_now=221
+    )).status_code == 200
+
+    assert client.delete(f"/api/v1/series/{series['id']}").status_code == 200
+    assert client.get(f"/api/v1/events/{event['id']}").json()["series_id"] is None
+
+def test_delete_client_with_series_is_rejected(client: TestClient):
+    """
+    Test that a client whose only bookings are a recurring series cannot be deleted.
+    """
+    owner = client.post("/api/v1/clients/", json={"name": "Serie SA", "email": "serie@example.com", "is_corporate": True}).json()
+    first = datetime.now(timezone.utc).date() + timedelta(days=240)
+    response = client.post("/api/v1/series", json={
+        "name": "Desayuno mensual",
+        "client_id": owner["id"],
+        "event_type": "Corporate",
+        "venue": "Series Terrace",
+        "guests_count": 30,
+        "budget": 1200.0,
+        "start_time": f"{first.isoformat()}T08:00:00+00:00",
+        "end_time": f"{first.isoformat()}T10:00:00+00:00",
+        "rrule": "FREQ=MONTHLY;COUNT=6",
+    })
+    assert response.status_code == 200
+    series_id = response.json()["id"]
+
+    response = client.delete(f"/api/v1/clients/{owner['id']}")
+    assert response.status_code == 400
+    assert "associated events" in response.json()["detail"]
+    assert client.get(f"/api/v1/clients/{owner['id']}").status_code == 200
+    assert client.get(f"/api/v1/series/{series_id}").status_code == 200
+
+def test_rollups_follow_event_writes_and_match_a_rebuild(client: TestClient, db_session: Session, test_client_user: ClientModel, run_in_session):
+    """
+    Test that the rollups maintained on create, update and delete serve the summary and equal a full rebuild.
+    """
+    def rollup_rows():
+        db_session.expire_all()
+        return sorted(
+            (row.period, row.period_start, row.event_type, row.status, row.events_count, round(row.budget_total, 2))
+            for row in db_session.scalars(select(EventRollup).where(EventRollup.events_count != 0))
+        )
+
+    ids = []
+    for days_ago, event_type in ((40, "Boda"), (45, "Boda"), (70, "Corporativo"), (100, "Corporativo")):
+        payload = create_event_payload(client_id=test_client_user.id, venue=f"Rollup {days_ago}", days_from_now=-days_ago)
+        payload["event_type"] = event_type
+        ids.append(client.post("/api/v1/events", json=payload).json()["id"])
+    for event_id in ids:
+        assert client.put(f"/api/v1/events/{event_id}", json={"status": "completed"}).status_code == 200
+
+    # Type, date and budget move an event between buckets; cancelling and deleting take it out
+    moved = (datetime.now(timezone.utc) - timedelta(days=200)).date().isoformat()
+    client.put(f"/api/v1/events/{ids[1]}", json={"event_type": "Corporativo", "budget": 7500.0})
+    client.put(f"/api/v1/events/{ids[2]}", json={"date": moved})
+    client.put(f"/api/v1/events/{ids[3]}", json={"status": "cancelled"})
+    client.delete(f"/api/v1/events/{ids[0]}")
+
+    summary = client.get("/api/v1/analytics/summary").json()
+    assert summary["total_events"] == 2
+    assert sum(month["revenue"] for month in summary["monthly_revenue"]) == 12500.0
+    assert {item["event_type"]: item["count"] for item in summary["event_types"]} == {"Corporativo": 2}
+
+    maintained = rollup_rows()
+    run_in_session(rollups.rebuild)
+    assert rollup_rows() == maintained
@@ -0,0 +1,38 @@
+// src/hooks/useChangeFeed.ts
+import { useEffect, useRef } from 'react';
+import { API_ENDPOINTS } from '@/lib/api';
+
+export type ChangeResource = 'events' | 'clients' | 'staff' | 'inventory' | 'series';
+
+export interface Change {
+  seq: number;
+  resource: ChangeResource;
+  action: 'created' | 'updated' | 'deleted';
+  ids: number[];
+  at: string;
+}
+
+interface ChangeFeedHandlers {
+  onChange: (change: Change) => void;
+  // Changes were missed (server restart or too long offline): reload everything shown
+  onReset?: () => void;
+}
+
+// Subscribe to create/update/delete notifications instead of polling lists.
+// EventSource reconnects on its own and sends Last-Event-ID, so missed changes are replayed.
+export function useChangeFeed(resources: ChangeResource[], handlers: ChangeFeedHandlers) {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+  const key = resources.join(',');
+
+  useEffect(() => {
+    const source = new EventSource(API_ENDPOINTS.changes(key ? key.split(',') : undefined));
+    source.addEventListener('change', (event) => {
+      handlersRef.current.onChange(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('reset', () => {
+      handlersRef.current.onReset?.();
+    });
+    return () => source.close();
+  }, [key]);
+}
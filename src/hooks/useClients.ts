@@ -1,6 +1,6 @@
 // src/hooks/useClients.ts
-import { useState, useEffect } from 'react';
-import { apiRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
+import { useState, useEffect, useRef } from 'react';
+import { apiRequest, apiPageRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
 
 export interface Client {
@@ -25,16 +25,22 @@ export interface ClientFormData {
 
 export interface ClientUpdateData extends Partial<ClientFormData> {}
 
+export interface ClientsFilters {
+  skip?: number;
+  limit?: number;
+  sort?: string;
+  cursor?: string;
+}
+
 export function useClients() {
   const [clients, setClients] = useState<Client[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const lastFilters = useRef<ClientsFilters | undefined>(undefined);
   const { toast } = useToast();
 
-  const fetchClients = async (filters?: {
-    skip?: number;
-    limit?: number;
-  }) => {
+  const fetchClients = async (filters?: ClientsFilters) => {
     setLoading(true);
     setError(null);
     
@@ -42,11 +48,16 @@ export function useClients() {
       const searchParams = new URLSearchParams();
       if (filters?.skip) searchParams.set('skip', filters.skip.toString());
       if (filters?.limit) searchParams.set('limit', filters.limit.toString());
+      if (filters?.sort) searchParams.set('sort', filters.sort);
+      if (filters?.cursor) searchParams.set('cursor', filters.cursor);
       
       const url = `${API_ENDPOINTS.clients.list()}${searchParams.toString() ? '?' + searchParams.toString() : ''}`;
-      const data = await apiRequest<Client[]>(url);
+      const page = await apiPageRequest<Client>(url);
       
-      setClients(data);
+      // A cursor continues the current list; anything else starts a new one
+      setClients(prev => filters?.cursor ? [...prev, ...page.items] : page.items);
+      setNextCursor(page.nextCursor);
+      lastFilters.current = filters;
     } catch (error) {
       const errorMessage = error instanceof ApiError ? error.message : 'Error fetching clients';
       setError(errorMessage);
@@ -60,6 +71,12 @@ export function useClients() {
     }
   };
 
+  // Load the page after the last one fetched (keyset pagination)
+  const fetchMoreClients = async () => {
+    if (!nextCursor) return;
+    await fetchClients({ ...lastFilters.current, skip: undefined, cursor: nextCursor });
+  };
+
   const createClient = async (clientData: ClientFormData): Promise<Client | null> => {
     setLoading(true);
     
@@ -200,6 +217,9 @@ export function useClients() {
     loading,
     error,
     fetchClients,
+    fetchMoreClients,
+    nextCursor,
+    hasMore: nextCursor !== null,
     createClient,
     updateClient,
     deleteClient,
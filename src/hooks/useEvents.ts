@@ -1,6 +1,6 @@
 // src/hooks/useEvents.ts
-import { useState, useEffect } from 'react';
-import { apiRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
+import { useState, useEffect, useRef } from 'react';
+import { apiRequest, apiPageRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
 
 export interface Event {
@@ -37,17 +37,58 @@ export interface EventUpdateData extends Partial<EventFormData> {
   status?: Event['status'];
 }
 
+export interface RoleAvailability {
+  role: string;
+  required: number;
+  available: number;
+  assigned: number;
+}
+
+export interface InventoryAvailability {
+  category: string;
+  required: number;
+  in_stock: number;
+}
+
+export interface EventAvailability {
+  event_id: number | null;
+  venue: string;
+  start_time: string;
+  end_time: string;
+  guests_count: number;
+  venue_available: boolean;
+  staff_available: boolean;
+  inventory_sufficient: boolean;
+  staff: RoleAvailability[];
+  inventory: InventoryAvailability[];
+  recommendations: string[];
+}
+
+// A hypothetical booking, e.g. one per day of the month on the planning page
+export interface AvailabilityCandidate {
+  venue: string;
+  start_time: string;
+  end_time: string;
+  guests_count: number;
+}
+
+export interface EventsFilters {
+  skip?: number;
+  limit?: number;
+  status_filter?: string;
+  sort?: string;
+  cursor?: string;
+}
+
 export function useEvents() {
   const [events, setEvents] = useState<Event[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const lastFilters = useRef<EventsFilters | undefined>(undefined);
   const { toast } = useToast();
 
-  const fetchEvents = async (filters?: {
-    skip?: number;
-    limit?: number;
-    status_filter?: string;
-  }) => {
+  const fetchEvents = async (filters?: EventsFilters) => {
     setLoading(true);
     setError(null);
     
@@ -56,11 +97,16 @@ export function useEvents() {
       if (filters?.skip) searchParams.set('skip', filters.skip.toString());
       if (filters?.limit) searchParams.set('limit', filters.limit.toString());
       if (filters?.status_filter) searchParams.set('status_filter', filters.status_filter);
+      if (filters?.sort) searchParams.set('sort', filters.sort);
+      if (filters?.cursor) searchParams.set('cursor', filters.cursor);
       
       const url = `${API_ENDPOINTS.events.list()}${searchParams.toString() ? '?' + searchParams.toString() : ''}`;
-      const data = await apiRequest<Event[]>(url);
+      const page = await apiPageRequest<Event>(url);
       
-      setEvents(data);
+      // A cursor continues the current list; anything else starts a new one
+      setEvents(prev => filters?.cursor ? [...prev, ...page.items] : page.items);
+      setNextCursor(page.nextCursor);
+      lastFilters.current = filters;
     } catch (error) {
       const errorMessage = error instanceof ApiError ? error.message : 'Error fetching events';
       setError(errorMessage);
@@ -74,6 +120,12 @@ export function useEvents() {
     }
   };
 
+  // Load the page after the last one fetched (keyset pagination)
+  const fetchMoreEvents = async () => {
+    if (!nextCursor) return;
+    await fetchEvents({ ...lastFilters.current, skip: undefined, cursor: nextCursor });
+  };
+
   const createEvent = async (eventData: EventFormData): Promise<Event | null> => {
     setLoading(true);
     
@@ -186,7 +238,7 @@ export function useEvents() {
 
   const checkAvailability = async (id: number) => {
     try {
-      const availability = await apiRequest(API_ENDPOINTS.events.availability(id));
+      const availability = await apiRequest<EventAvailability>(API_ENDPOINTS.events.availability(id));
       return availability;
     } catch (error) {
       const errorMessage = error instanceof ApiError ? error.message : 'Error checking availability';
@@ -199,6 +251,24 @@ export function useEvents() {
     }
   };
 
+  // Check many events and candidate bookings with a single request
+  const checkAvailabilityBatch = async (eventIds: number[], candidates: AvailabilityCandidate[] = []) => {
+    try {
+      return await apiRequest<EventAvailability[]>(API_ENDPOINTS.events.availabilityBatch(), {
+        method: 'POST',
+        body: JSON.stringify({ event_ids: eventIds, candidates }),
+      });
+    } catch (error) {
+      const errorMessage = error instanceof ApiError ? error.message : 'Error checking availability';
+      toast({
+        title: 'Error',
+        description: errorMessage,
+        variant: 'destructive',
+      });
+      return null;
+    }
+  };
+
   // Fetch events on mount
   useEffect(() => {
     fetchEvents();
@@ -209,10 +279,14 @@ export function useEvents() {
     loading,
     error,
     fetchEvents,
+    fetchMoreEvents,
+    nextCursor,
+    hasMore: nextCursor !== null,
     createEvent,
     updateEvent,
     deleteEvent,
     getEvent,
     checkAvailability,
+    checkAvailabilityBatch,
   };
 }
\ No newline at end of file
@@ -1,7 +1,8 @@
 // src/hooks/useInventory.ts
-import { useState, useEffect } from 'react';
-import { apiRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
+import { useState, useEffect, useRef } from 'react';
+import { apiRequest, apiPageRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
+import { useChangeFeed } from '@/hooks/useChangeFeed';
 
 export interface InventoryItem {
   id: number;
@@ -30,18 +31,24 @@ export interface InventoryItemFormData {
 
 export interface InventoryItemUpdateData extends Partial<InventoryItemFormData> {}
 
+export interface InventoryFilters {
+  skip?: number;
+  limit?: number;
+  category?: string;
+  low_stock?: boolean;
+  sort?: string;
+  cursor?: string;
+}
+
 export function useInventory() {
   const [inventory, setInventory] = useState<InventoryItem[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const lastFilters = useRef<InventoryFilters | undefined>(undefined);
   const { toast } = useToast();
 
-  const fetchInventory = async (filters?: {
-    skip?: number;
-    limit?: number;
-    category?: string;
-    low_stock?: boolean;
-  }) => {
+  const fetchInventory = async (filters?: InventoryFilters) => {
     setLoading(true);
     setError(null);
     
@@ -51,11 +58,16 @@ export function useInventory() {
       if (filters?.limit) searchParams.set('limit', filters.limit.toString());
       if (filters?.category) searchParams.set('category', filters.category);
       if (filters?.low_stock) searchParams.set('low_stock', 'true');
+      if (filters?.sort) searchParams.set('sort', filters.sort);
+      if (filters?.cursor) searchParams.set('cursor', filters.cursor);
       
       const url = `${API_ENDPOINTS.inventory.list()}${searchParams.toString() ? '?' + searchParams.toString() : ''}`;
-      const data = await apiRequest<InventoryItem[]>(url);
+      const page = await apiPageRequest<InventoryItem>(url);
       
-      setInventory(data);
+      // A cursor continues the current list; anything else starts a new one
+      setInventory(prev => filters?.cursor ? [...prev, ...page.items] : page.items);
+      setNextCursor(page.nextCursor);
+      lastFilters.current = filters;
     } catch (error) {
       const errorMessage = error instanceof ApiError ? error.message : 'Error fetching inventory';
       setError(errorMessage);
@@ -70,6 +82,12 @@ export function useInventory() {
     }
   };
 
+  // Load the page after the last one fetched (keyset pagination)
+  const fetchMoreInventory = async () => {
+    if (!nextCursor) return;
+    await fetchInventory({ ...lastFilters.current, skip: undefined, cursor: nextCursor });
+  };
+
   const createInventoryItem = async (itemData: InventoryItemFormData): Promise<InventoryItem | null> => {
     setLoading(true);
     
@@ -188,11 +206,33 @@ export function useInventory() {
     fetchInventory();
   }, []);
 
+  // Keep the loaded items current from the change feed instead of refetching the list
+  useChangeFeed(['inventory'], {
+    onChange: async (change) => {
+      if (change.action === 'created') {
+        await fetchInventory(lastFilters.current);
+        return;
+      }
+      if (change.action === 'deleted') {
+        setInventory(prev => prev.filter(item => !change.ids.includes(item.id)));
+        return;
+      }
+      const updated = await Promise.all(
+        change.ids.map(id => apiRequest<InventoryItem>(API_ENDPOINTS.inventory.get(id)).catch(() => null))
+      );
+      setInventory(prev => prev.map(item => updated.find(fresh => fresh?.id === item.id) ?? item));
+    },
+    onReset: () => fetchInventory(lastFilters.current),
+  });
+
   return {
     inventory,
     loading,
     error,
     fetchInventory,
+    fetchMoreInventory,
+    nextCursor,
+    hasMore: nextCursor !== null,
     createInventoryItem,
     updateInventoryItem,
     restockItem,
@@ -1,6 +1,6 @@
 // src/hooks/useStaff.ts
-import { useState, useEffect } from 'react';
-import { apiRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
+import { useState, useEffect, useRef } from 'react';
+import { apiRequest, apiPageRequest, API_ENDPOINTS, ApiError } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
 
 export interface StaffMember {
@@ -30,17 +30,23 @@ export interface StaffUpdateData extends Partial<StaffFormData> {
   status?: StaffMember['status'];
 }
 
+export interface StaffFilters {
+  skip?: number;
+  limit?: number;
+  status_filter?: string;
+  sort?: string;
+  cursor?: string;
+}
+
 export function useStaff() {
   const [staff, setStaff] = useState<StaffMember[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const lastFilters = useRef<StaffFilters | undefined>(undefined);
   const { toast } = useToast();
 
-  const fetchStaff = async (filters?: {
-    skip?: number;
-    limit?: number;
-    status_filter?: string;
-  }) => {
+  const fetchStaff = async (filters?: StaffFilters) => {
     setLoading(true);
     setError(null);
     
@@ -49,11 +55,16 @@ export function useStaff() {
       if (filters?.skip) searchParams.set('skip', filters.skip.toString());
       if (filters?.limit) searchParams.set('limit', filters.limit.toString());
       if (filters?.status_filter) searchParams.set('status_filter', filters.status_filter);
+      if (filters?.sort) searchParams.set('sort', filters.sort);
+      if (filters?.cursor) searchParams.set('cursor', filters.cursor);
       
       const url = `${API_ENDPOINTS.staff.list()}${searchParams.toString() ? '?' + searchParams.toString() : ''}`;
-      const data = await apiRequest<StaffMember[]>(url);
+      const page = await apiPageRequest<StaffMember>(url);
       
-      setStaff(data);
+      // A cursor continues the current list; anything else starts a new one
+      setStaff(prev => filters?.cursor ? [...prev, ...page.items] : page.items);
+      setNextCursor(page.nextCursor);
+      lastFilters.current = filters;
     } catch (error) {
       const errorMessage = error instanceof ApiError ? error.message : 'Error fetching staff';
       setError(errorMessage);
@@ -67,6 +78,12 @@ export function useStaff() {
     }
   };
 
+  // Load the page after the last one fetched (keyset pagination)
+  const fetchMoreStaff = async () => {
+    if (!nextCursor) return;
+    await fetchStaff({ ...lastFilters.current, skip: undefined, cursor: nextCursor });
+  };
+
   const createStaffMember = async (staffData: StaffFormData): Promise<StaffMember | null> => {
     setLoading(true);
     
@@ -190,6 +207,9 @@ export function useStaff() {
     loading,
     error,
     fetchStaff,
+    fetchMoreStaff,
+    nextCursor,
+    hasMore: nextCursor !== null,
     createStaffMember,
     updateStaffMember,
     updateStaffStatus,
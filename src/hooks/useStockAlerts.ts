@@ -0,0 +1,52 @@
+// src/hooks/useStockAlerts.ts
+import { useEffect, useState } from 'react';
+import { API_ENDPOINTS } from '@/lib/api';
+
+export interface StockAlert {
+  id: number;
+  item_id: number;
+  current_stock: number;
+  minimum_stock: number;
+  created_at: string;
+  resolved_at?: string | null;
+}
+
+// Open low-stock alerts, kept current by the server-sent event stream instead of polling
+export function useStockAlerts() {
+  const [alerts, setAlerts] = useState<StockAlert[]>([]);
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    const source = new EventSource(API_ENDPOINTS.inventory.alertsStream());
+    // The stream replays the open alerts on every (re)connection; start over with them
+    let backlog: StockAlert[] = [];
+    let ready = false;
+
+    source.addEventListener('low_stock', (event) => {
+      const alert: StockAlert = JSON.parse((event as MessageEvent).data);
+      if (!ready) {
+        backlog.push(alert);
+        return;
+      }
+      setAlerts(prev => [...prev.filter(item => item.item_id !== alert.item_id), alert]);
+    });
+    source.addEventListener('stock_restored', (event) => {
+      const alert: StockAlert = JSON.parse((event as MessageEvent).data);
+      setAlerts(prev => prev.filter(item => item.id !== alert.id));
+    });
+    source.addEventListener('ready', () => {
+      ready = true;
+      setAlerts(backlog);
+      setConnected(true);
+    });
+    source.onerror = () => {
+      ready = false;
+      backlog = [];
+      setConnected(false);
+    };
+
+    return () => source.close();
+  }, []);
+
+  return { alerts, connected };
+}
@@ -10,6 +10,10 @@ export const API_ENDPOINTS = {
     update: (id: number) => `${API_BASE_URL}/events/${id}`,
     delete: (id: number) => `${API_BASE_URL}/events/${id}`,
     availability: (id: number) => `${API_BASE_URL}/events/${id}/availability`,
+    availabilityBatch: () => `${API_BASE_URL}/events/availability`,
+    calendar: (from: string, to: string, venue?: string, includeEvents = true) =>
+      `${API_BASE_URL}/events/calendar?from=${from}&to=${to}${venue ? `&venue=${encodeURIComponent(venue)}` : ''}${includeEvents ? '' : '&include_events=false'}`,
+    export: (format: 'csv' | 'ndjson' = 'csv') => `${API_BASE_URL}/events/export?format=${format}`,
   },
   // Clients
   clients: {
@@ -18,6 +22,7 @@ export const API_ENDPOINTS = {
     get: (id: number) => `${API_BASE_URL}/clients/${id}`,
     update: (id: number) => `${API_BASE_URL}/clients/${id}`,
     delete: (id: number) => `${API_BASE_URL}/clients/${id}`,
+    export: (format: 'csv' | 'ndjson' = 'csv') => `${API_BASE_URL}/clients/export?format=${format}`,
   },
   // Staff
   staff: {
@@ -26,6 +31,8 @@ export const API_ENDPOINTS = {
     get: (id: number) => `${API_BASE_URL}/staff/${id}`,
     update: (id: number) => `${API_BASE_URL}/staff/${id}`,
     updateStatus: (id: number) => `${API_BASE_URL}/staff/${id}/status`,
+    batch: () => `${API_BASE_URL}/staff/batch`,
+    batchDelete: () => `${API_BASE_URL}/staff/batch/delete`,
   },
   // Inventory
   inventory: {
@@ -34,7 +41,30 @@ export const API_ENDPOINTS = {
     get: (id: number) => `${API_BASE_URL}/inventory/${id}/`,
     update: (id: number) => `${API_BASE_URL}/inventory/${id}/`,
     restock: (id: number) => `${API_BASE_URL}/inventory/${id}/restock/`,
+    alerts: () => `${API_BASE_URL}/inventory/alerts`,
+    alertsStream: () => `${API_BASE_URL}/inventory/alerts/stream`,
+    export: (format: 'csv' | 'ndjson' = 'csv') => `${API_BASE_URL}/inventory/export?format=${format}`,
+    batch: () => `${API_BASE_URL}/inventory/batch`,
+    batchDelete: () => `${API_BASE_URL}/inventory/batch/delete`,
   },
+  // Recurring event series
+  series: {
+    list: () => `${API_BASE_URL}/series`,
+    create: (skipConflicts = false) => `${API_BASE_URL}/series${skipConflicts ? '?skip_conflicts=true' : ''}`,
+    get: (id: number) => `${API_BASE_URL}/series/${id}`,
+    update: (id: number) => `${API_BASE_URL}/series/${id}`,
+    delete: (id: number) => `${API_BASE_URL}/series/${id}`,
+    occurrences: (id: number, from: string, to: string) =>
+      `${API_BASE_URL}/series/${id}/occurrences?from=${from}&to=${to}`,
+    skip: (id: number) => `${API_BASE_URL}/series/${id}/occurrences/skip`,
+    materialize: (id: number) => `${API_BASE_URL}/series/${id}/occurrences/materialize`,
+  },
+  // Change feed (server-sent events)
+  changes: (resources?: string[]) =>
+    `${API_BASE_URL}/changes${resources?.length ? `?resources=${resources.join(',')}` : ''}`,
+  // Search over clients, events and staff
+  search: (query: string, types?: string[]) =>
+    `${API_BASE_URL}/search?q=${encodeURIComponent(query)}${types?.length ? `&types=${types.join(',')}` : ''}`,
   // Analytics
   analytics: {
     summary: () => `${API_BASE_URL}/analytics/summary`,
@@ -48,10 +78,15 @@ class ApiError extends Error {
   }
 }
 
-export async function apiRequest<T>(
-  url: string,
-  options: RequestInit = {}
-): Promise<T> {
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// Header carrying the cursor of the next page on list endpoints
+export const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+
+async function fetchOrThrow(url: string, options: RequestInit = {}): Promise<Response> {
   const config: RequestInit = {
     headers: {
       'Content-Type': 'application/json',
@@ -78,13 +113,7 @@ export async function apiRequest<T>(
       throw new ApiError(response.status, errorMessage, errorData);
     }
 
-    // Handle empty responses (like 204 No Content)
-    if (response.status === 204) {
-      return {} as T;
-    }
-
-    const data = await response.json();
-    return data;
+    return response;
   } catch (error) {
     if (error instanceof ApiError) {
       throw error;
@@ -95,4 +124,32 @@ export async function apiRequest<T>(
   }
 }
 
+export async function apiRequest<T>(
+  url: string,
+  options: RequestInit = {}
+): Promise<T> {
+  const response = await fetchOrThrow(url, options);
+
+  // Handle empty responses (like 204 No Content)
+  if (response.status === 204) {
+    return {} as T;
+  }
+
+  const data = await response.json();
+  return data;
+}
+
+// Fetch one page of a list endpoint together with the cursor of the next page
+export async function apiPageRequest<T>(
+  url: string,
+  options: RequestInit = {}
+): Promise<Page<T>> {
+  const response = await fetchOrThrow(url, options);
+  const items = await response.json();
+  return {
+    items,
+    nextCursor: response.headers.get(NEXT_CURSOR_HEADER),
+  };
+}
+
 export { ApiError };
\ No newline at end of file